@@ -0,0 +1,4 @@
+"""Synthetic wikis and benchmarks of parsing, querying and saving them.
+
+Run the benchmarks with `doit bench` or `python -m benchmarks.bench --help`.
+"""
@@ -0,0 +1,314 @@
+"""Benchmark the operations of the parser on generated wikis.
+
+Each operation is run on a fresh copy of a generated wiki of each format. The
+time is the fastest of `--repeat` runs, the peak memory is measured with
+`tracemalloc` in one more run. The results can be written to a JSON file and
+compared with the results of an earlier run, the baseline:
+
+    python -m benchmarks.bench --tiddlers 10000 --output baseline.json
+    python -m benchmarks.bench --tiddlers 10000 --baseline baseline.json
+
+With a baseline, the exit status is 1 if any operation got slower or used more
+memory than the baseline by more than `--tolerance`.
+"""
+
+import argparse
+import gc
+import json
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from benchmarks.generate import TEMPLATES, WikiFormat, WikiSpec, generate_wiki
+from tiddlyparse import parse
+from tiddlyparse.parser import Tiddler, TiddlyParser
+
+# Number of tiddlers read, added, removed or modified by an operation
+SAMPLE_SIZE = 1_000
+# Changes smaller than these are noise and never regressions
+MIN_CHANGE = {"seconds": 0.005, "peak_bytes": 1024 * 1024}
+
+
+class Operation(NamedTuple):
+    name: str
+    # Returns the state of a run from the path of a fresh copy of the wiki.
+    # Only `run` is measured.
+    setup: Callable[[Path], Any]
+    run: Callable[[Any], object]
+
+
+class Measurement(NamedTuple):
+    seconds: float
+    peak_bytes: int
+
+
+def _parsed(path: Path) -> TiddlyParser:
+    return parse(path)
+
+
+def _sample(wiki: TiddlyParser) -> list[Tiddler]:
+    tiddlers = list(wiki.items())
+    return random.Random(0).sample(tiddlers, min(SAMPLE_SIZE, len(tiddlers)))
+
+
+def _setup_get(path: Path) -> tuple[TiddlyParser, list[str]]:
+    wiki = parse(path, lazy=True)
+    return wiki, [tiddler.title for tiddler in _sample(wiki)]
+
+
+def _run_get(state: tuple[TiddlyParser, list[str]]) -> None:
+    wiki, titles = state
+    for title in titles:
+        wiki[title].text
+
+
+def _setup_add(path: Path) -> tuple[TiddlyParser, list[Tiddler]]:
+    wiki = parse(path)
+    tiddlers = []
+    for index in range(SAMPLE_SIZE):
+        tiddler = wiki.new_tiddler(f"Added tiddler {index}")
+        tiddler.text = "Text"
+        tiddler.tags = "Added"
+        tiddlers.append(tiddler)
+    return wiki, tiddlers
+
+
+def _run_add(state: tuple[TiddlyParser, list[Tiddler]]) -> None:
+    wiki, tiddlers = state
+    for tiddler in tiddlers:
+        wiki.add(tiddler)
+
+
+def _setup_remove(path: Path) -> tuple[TiddlyParser, list[Tiddler]]:
+    wiki = parse(path)
+    return wiki, _sample(wiki)
+
+
+def _run_remove(state: tuple[TiddlyParser, list[Tiddler]]) -> None:
+    wiki, tiddlers = state
+    for tiddler in tiddlers:
+        wiki.remove(tiddler)
+
+
+def _setup_modified(path: Path) -> TiddlyParser:
+    wiki = parse(path)
+    for tiddler in _sample(wiki):
+        tiddler.text += "\n\nModified"
+        wiki.add(tiddler)
+    return wiki
+
+
+OPERATIONS = [
+    Operation("parse", lambda path: path, parse),
+    Operation("parse_lazy", lambda path: path, lambda path: parse(path, lazy=True)),
+    Operation("get", _setup_get, _run_get),
+    Operation("search", _parsed, lambda wiki: wiki.search(type="image/png")),
+    Operation("add", _setup_add, _run_add),
+    Operation("remove", _setup_remove, _run_remove),
+    Operation("save", _setup_modified, lambda wiki: wiki.save()),
+    Operation("dump_to_file", _setup_modified, lambda wiki: wiki.dump_to_file()),
+]
+
+
+def measure(operation: Operation, wiki_file: Path, repeat: int) -> Measurement:
+    """Measure the operation on copies of the wiki file."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "wiki.html"
+        seconds = float("inf")
+        for _ in range(repeat):
+            state = _fresh_state(operation, wiki_file, path)
+            start = time.perf_counter()
+            operation.run(state)
+            seconds = min(seconds, time.perf_counter() - start)
+            del state
+
+        state = _fresh_state(operation, wiki_file, path)
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            operation.run(state)
+            peak_bytes = tracemalloc.get_traced_memory()[1] - before
+        finally:
+            tracemalloc.stop()
+    return Measurement(seconds, peak_bytes)
+
+
+def _fresh_state(operation: Operation, wiki_file: Path, path: Path) -> Any:
+    shutil.copyfile(wiki_file, path)
+    state = operation.setup(path)
+    gc.collect()
+    return state
+
+
+def run_benchmarks(
+    spec: WikiSpec,
+    formats: Sequence[WikiFormat],
+    *,
+    operations: Sequence[Operation] = OPERATIONS,
+    repeat: int = 3,
+    workdir: Optional[Path] = None,
+) -> dict[str, dict[str, Measurement]]:
+    """Return the measurements of the operations by format and name.
+
+    The wikis are generated in `workdir` and reused by later runs with the same
+    spec, or generated in a temporary directory.
+    """
+    if workdir is None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            return run_benchmarks(
+                spec,
+                formats,
+                operations=operations,
+                repeat=repeat,
+                workdir=Path(tmpdir),
+            )
+
+    results: dict[str, dict[str, Measurement]] = {}
+    for format in formats:
+        wiki_file = workdir / _wiki_name(format, spec)
+        if not wiki_file.exists():
+            generate_wiki(wiki_file, format, spec)
+        results[format] = {
+            operation.name: measure(operation, wiki_file, repeat)
+            for operation in operations
+        }
+    return results
+
+
+def _wiki_name(format: WikiFormat, spec: WikiSpec) -> str:
+    return f"{format}-" + "-".join(str(value) for value in spec) + ".html"
+
+
+def compare(
+    results: dict[str, dict[str, Measurement]],
+    baseline: dict[str, dict[str, Measurement]],
+    tolerance: float,
+) -> list[str]:
+    """Return a description of each regression from the baseline."""
+    regressions = []
+    for format, measurements in results.items():
+        for name, measurement in measurements.items():
+            base = baseline.get(format, {}).get(name)
+            if base is None:
+                continue
+            for metric in Measurement._fields:
+                value = getattr(measurement, metric)
+                base_value = getattr(base, metric)
+                if (
+                    value > base_value * (1 + tolerance)
+                    and value - base_value > MIN_CHANGE[metric]
+                ):
+                    regressions.append(
+                        f"{format} {name}: {metric} {value:.4g}"
+                        f" > {base_value:.4g} ({_change(value, base_value)})"
+                    )
+    return regressions
+
+
+def format_table(
+    results: dict[str, dict[str, Measurement]],
+    baseline: Optional[dict[str, dict[str, Measurement]]] = None,
+) -> str:
+    lines = [f"{'format':<6} {'operation':<14} {'seconds':>10} {'peak MiB':>10}"]
+    for format, measurements in results.items():
+        for name, measurement in measurements.items():
+            line = (
+                f"{format:<6} {name:<14} {measurement.seconds:>10.4f}"
+                f" {measurement.peak_bytes / 2**20:>10.1f}"
+            )
+            base = (baseline or {}).get(format, {}).get(name)
+            if base is not None:
+                line += (
+                    f"  {_change(measurement.seconds, base.seconds):>6}"
+                    f" {_change(measurement.peak_bytes, base.peak_bytes):>6}"
+                )
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def _change(value: float, base: float) -> str:
+    return f"{value / base - 1:+.0%}" if base else "n/a"
+
+
+def dump_results(results: dict[str, dict[str, Measurement]], spec: WikiSpec) -> str:
+    return json.dumps(
+        {
+            "spec": spec._asdict(),
+            "results": {
+                format: {name: m._asdict() for name, m in measurements.items()}
+                for format, measurements in results.items()
+            },
+        },
+        indent=2,
+    )
+
+
+def load_results(content: str) -> tuple[WikiSpec, dict[str, dict[str, Measurement]]]:
+    data = json.loads(content)
+    results = {
+        format: {name: Measurement(**m) for name, m in measurements.items()}
+        for format, measurements in data["results"].items()
+    }
+    return WikiSpec(**data["spec"]), results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the parser on generated wikis."
+    )
+    parser.add_argument("--format", nargs="+", choices=list(TEMPLATES))
+    parser.add_argument("--operation", nargs="+", choices=[o.name for o in OPERATIONS])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workdir", type=Path, help="keep the generated wikis here")
+    parser.add_argument("--output", type=Path, help="write the results to this file")
+    parser.add_argument("--baseline", type=Path, help="compare with these results")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    for name, default in WikiSpec._field_defaults.items():
+        parser.add_argument(
+            "--" + name.replace("_", "-"), type=type(default), default=default
+        )
+    args = parser.parse_args()
+
+    spec = WikiSpec(**{name: getattr(args, name) for name in WikiSpec._fields})
+    operations = [
+        operation
+        for operation in OPERATIONS
+        if args.operation is None or operation.name in args.operation
+    ]
+    if args.workdir is not None:
+        args.workdir.mkdir(parents=True, exist_ok=True)
+    results = run_benchmarks(
+        spec,
+        args.format or list(TEMPLATES),
+        operations=operations,
+        repeat=args.repeat,
+        workdir=args.workdir,
+    )
+
+    baseline = None
+    if args.baseline is not None:
+        baseline_spec, baseline = load_results(args.baseline.read_text())
+        if baseline_spec != spec:
+            print(
+                f"Warning: the baseline was measured for {baseline_spec}",
+                file=sys.stderr,
+            )
+    print(format_table(results, baseline))
+    if args.output is not None:
+        args.output.write_text(dump_results(results, spec) + "\n")
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
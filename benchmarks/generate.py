@@ -0,0 +1,184 @@
+"""Generate wikis of any size with realistic tiddlers.
+
+The tiddlers are written into a copy of one of the empty wikis of the test
+fixtures, so the result is a complete wiki in the DIV format of TiddlyWiki
+5.1.x or the JSON format of 5.2 and later. The content is pseudo-random but
+reproducible from the seed of the `WikiSpec`:
+
+- The texts are wikitext of words, links to other tiddlers, headings and
+  lists, whose lengths vary around `text_size` characters.
+- Tags are drawn from a pool of `tags` titles with a Zipf distribution, so a
+  few tags are on many tiddlers and most on few, like in real wikis.
+- A fraction of the tiddlers are journal entries or system tiddlers.
+- `binary` of the tiddlers are images, with base64 encoded random content.
+- `plugins` tiddlers are plugins with `plugin_tiddlers` shadow tiddlers each.
+
+    python -m benchmarks.generate --format div --tiddlers 10000 wiki.html
+"""
+
+import argparse
+import base64
+import json
+import random
+import shutil
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Literal, NamedTuple
+
+from tiddlyparse import parse
+from tiddlyparse.tags import stringify_list
+
+WikiFormat = Literal["json", "div"]
+
+TEMPLATES: dict[WikiFormat, Path] = {
+    "json": Path(__file__).parent.parent / "tests" / "fixtures" / "empty-5.2.0.html",
+    "div": Path(__file__).parent.parent / "tests" / "fixtures" / "empty-5.1.23.html",
+}
+
+# Timestamps are spread over the ten years from this time on
+_EPOCH = 1_450_000_000
+_SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "ta", "sho", "ven", "dar", "qui", "xel"]
+
+
+class WikiSpec(NamedTuple):
+    """The size and shape of a generated wiki."""
+
+    tiddlers: int = 10_000
+    # Average number of characters of the text of a tiddler
+    text_size: int = 600
+    # Number of distinct tags, and the maximum number of tags of a tiddler
+    tags: int = 200
+    tags_per_tiddler: int = 4
+    # Fraction of the tiddlers that are images, and their size in bytes
+    binary: float = 0.01
+    binary_size: int = 30_000
+    plugins: int = 2
+    plugin_tiddlers: int = 200
+    seed: int = 0
+
+
+def generate_tiddlers(spec: WikiSpec) -> Iterator[dict[str, str]]:
+    """Yield the fields of the tiddlers of a wiki of the spec."""
+    rng = random.Random(spec.seed)
+    words = list(
+        {"".join(rng.choices(_SYLLABLES, k=rng.randint(1, 4))) for _ in range(2_000)}
+    )
+    words.sort()
+    titles = [_title(rng, words, index) for index in range(spec.tiddlers)]
+    tags = [_tag(rng, words, index) for index in range(spec.tags)]
+    # Zipf distribution: the k-th tag is used in proportion to 1/k
+    tag_weights = [1 / rank for rank in range(1, len(tags) + 1)]
+
+    for index, title in enumerate(titles):
+        created = _EPOCH + rng.randrange(10 * 365 * 86_400)
+        fields = {
+            "title": title,
+            "created": _timestamp(created),
+            "modified": _timestamp(created + rng.randrange(365 * 86_400)),
+        }
+        if tags:
+            count = rng.randint(0, spec.tags_per_tiddler)
+            chosen = dict.fromkeys(rng.choices(tags, tag_weights, k=count))
+            if chosen:
+                fields["tags"] = stringify_list(chosen)
+        if rng.random() < spec.binary:
+            content = rng.randbytes(spec.binary_size)
+            fields["type"] = "image/png"
+            fields["text"] = base64.b64encode(content).decode("ascii")
+        else:
+            if rng.random() < 0.2:
+                fields["status"] = rng.choice(["draft", "review", "done"])
+            if rng.random() < 0.05:
+                fields["caption"] = " ".join(rng.choices(words, k=3)).title()
+            fields["text"] = _text(rng, words, titles, spec.text_size)
+        yield fields
+
+    for index in range(spec.plugins):
+        yield _plugin(rng, words, index, spec)
+
+
+def generate_wiki(dest: Path, format: WikiFormat, spec: WikiSpec) -> None:
+    """Write a wiki of the spec in the format to `dest`."""
+    shutil.copyfile(TEMPLATES[format], dest)
+    wiki = parse(dest)
+    wiki.import_tiddlers(generate_tiddlers(spec))
+    wiki.save()
+
+
+def _title(rng: random.Random, words: list[str], index: int) -> str:
+    kind = rng.random()
+    if kind < 0.1:
+        day = time.gmtime(_EPOCH + index * 86_400)
+        return time.strftime("%Y-%m-%d", day) + f" {index}"
+    elif kind < 0.15:
+        return f"$:/config/{rng.choice(words)}/{index}"
+    name = " ".join(rng.choices(words, k=rng.randint(1, 4)))
+    return f"{name.capitalize()} {index}"
+
+
+def _tag(rng: random.Random, words: list[str], index: int) -> str:
+    name = " ".join(rng.choices(words, k=rng.randint(1, 2))).capitalize()
+    # Some tags are single words, which aren't bracketed in lists
+    return f"{name} {index}" if index % 3 else f"{name.replace(' ', '-')}-{index}"
+
+
+def _text(rng: random.Random, words: list[str], titles: list[str], size: int) -> str:
+    # Log-normal around `size`, so a few tiddlers are much longer
+    target = int(rng.lognormvariate(0, 0.75) * size * 0.75)
+    parts: list[str] = []
+    length = 0
+    while length < target:
+        kind = rng.random()
+        if kind < 0.05:
+            part = "\n\n! " + " ".join(rng.choices(words, k=3)).capitalize() + "\n\n"
+        elif kind < 0.1:
+            part = "\n* " + " ".join(rng.choices(words, k=5))
+        elif kind < 0.15:
+            part = f" [[{rng.choice(titles)}]]"
+        else:
+            part = " " + rng.choice(words)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts).strip()
+
+
+def _plugin(
+    rng: random.Random, words: list[str], index: int, spec: WikiSpec
+) -> dict[str, str]:
+    title = f"$:/plugins/bench/plugin-{index}"
+    shadows = {}
+    for shadow in range(spec.plugin_tiddlers):
+        shadow_title = f"{title}/{rng.choice(words)}-{shadow}"
+        shadows[shadow_title] = {
+            "title": shadow_title,
+            "text": _text(rng, words, [title], spec.text_size),
+        }
+    return {
+        "title": title,
+        "type": "application/json",
+        "plugin-type": "plugin",
+        "version": "1.0.0",
+        "text": json.dumps({"tiddlers": shadows}),
+    }
+
+
+def _timestamp(seconds: int) -> str:
+    return time.strftime("%Y%m%d%H%M%S000", time.gmtime(seconds))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a wiki.")
+    parser.add_argument("dest", type=Path, help="the wiki file to write")
+    parser.add_argument("--format", choices=list(TEMPLATES), default="json")
+    for name, default in WikiSpec._field_defaults.items():
+        parser.add_argument(
+            "--" + name.replace("_", "-"), type=type(default), default=default
+        )
+    args = parser.parse_args()
+    spec = WikiSpec(**{name: getattr(args, name) for name in WikiSpec._fields})
+    generate_wiki(args.dest, args.format, spec)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,8 +17,12 @@ SRC_PATH = HERE / "tiddlyparse"
 SRC_FILES = sorted(SRC_PATH.rglob("*.py"), key=_path_sortkey)
 TESTS_PATH = HERE / "tests"
 TESTS_FILES = sorted(TESTS_PATH.rglob("*.py"), key=_path_sortkey)
+BENCHMARKS_PATH = HERE / "benchmarks"
+BENCHMARKS_FILES = sorted(BENCHMARKS_PATH.rglob("*.py"), key=_path_sortkey)
 
-ALL_PY_FILES = sorted([THIS, *SRC_FILES, *TESTS_FILES], key=_path_sortkey)
+ALL_PY_FILES = sorted(
+    [THIS, *SRC_FILES, *TESTS_FILES, *BENCHMARKS_FILES], key=_path_sortkey
+)
 
 # outputs
 DIST_PATH = HERE / "dist"
@@ -53,6 +57,20 @@ def task_test():
     }
 
 
+def task_bench():
+    """Benchmark the parser on generated wikis
+
+    Arguments after `--` are passed on, e.g. `doit bench -- --tiddlers 100000
+    --baseline baseline.json`, see `python -m benchmarks.bench --help`.
+    """
+    return {
+        "setup": ["poetry_install"],
+        "actions": with_poetry("python -m benchmarks.bench %(args)s"),
+        "pos_arg": "args",
+        "verbosity": 2,
+    }
+
+
 def task_lint():
     """Lint the code with isort, flake8 and mypy"""
     yield {
@@ -0,0 +1,34 @@
+import shutil
+
+from pytest import fixture
+
+from tests.helpers import DIV_FIXTURE, FIXTURES, JSON_FIXTURE
+from tiddlyparse import parse
+
+
+@fixture(params=[JSON_FIXTURE.name, DIV_FIXTURE.name])
+def wiki_file(request, tmp_path):
+    """A copy of an empty wiki in each format, which tests can save."""
+    path = tmp_path / "wiki.html"
+    shutil.copy(FIXTURES / request.param, path)
+    yield path
+
+
+@fixture
+def div_file_name():
+    yield DIV_FIXTURE
+
+
+@fixture
+def div_wiki(div_file_name):
+    yield parse(file=div_file_name)
+
+
+@fixture
+def json_file_name():
+    yield JSON_FIXTURE
+
+
+@fixture
+def json_wiki(json_file_name):
+    yield parse(file=json_file_name)
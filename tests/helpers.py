@@ -0,0 +1,15 @@
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent / "fixtures"
+JSON_FIXTURE = FIXTURES / "empty-5.2.0.html"
+DIV_FIXTURE = FIXTURES / "empty-5.1.23.html"
+
+
+def add_tiddler(wiki, title, text="Text", **fields):
+    """Add a tiddler with the fields to the wiki, like an edit in TiddlyWiki."""
+    tiddler = wiki.get_or_create(title)
+    tiddler.text = text
+    for key, value in fields.items():
+        setattr(tiddler, key, value)
+    wiki.add(tiddler)
+    return tiddler
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+
+from pytest import raises
+
+from tiddlyparse import aparse, parse, parser
+
+
+def test_aparse_and_asave(wiki_file, tmp_path):
+    async def edit():
+        wiki = await aparse(wiki_file, cache=tmp_path / "cache.sqlite")
+        tiddler = wiki.get_or_create("New tiddler")
+        tiddler.text = "Text"
+        wiki.add(tiddler)
+        await wiki.asave()
+        return wiki
+
+    wiki = asyncio.run(edit())
+    assert wiki.changes == []
+    assert parse(wiki_file)["New tiddler"].text == "Text"
+
+
+def test_cancelled_aparse_closes_journal(wiki_file, monkeypatch):
+    started = threading.Event()
+    resume = threading.Event()
+    parsed = []
+    _parse = parser._parse
+
+    def slow_parse(*args, **kwargs):
+        started.set()
+        resume.wait(5)
+        wiki = _parse(*args, **kwargs)
+        parsed.append(wiki)
+        return wiki
+
+    monkeypatch.setattr(parser, "_parse", slow_parse)
+
+    async def cancel_parse():
+        task = asyncio.create_task(aparse(wiki_file, journal=True))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        with raises(asyncio.CancelledError):
+            await task
+        resume.set()
+        # The parse finishes in the background
+        for _ in range(100):
+            if parsed and parsed[0]._journal is None:
+                break
+            await asyncio.sleep(0.05)
+
+    asyncio.run(cancel_parse())
+    assert parsed[0]._journal is None
+    assert parsed[0].journal_path.exists()
+
+
+def test_cancelled_asave_completes(wiki_file, monkeypatch):
+    started = threading.Event()
+    resume = threading.Event()
+    splice_file = parser.splice_file
+
+    def slow_splice_file(*args, **kwargs):
+        started.set()
+        resume.wait(5)
+        splice_file(*args, **kwargs)
+
+    monkeypatch.setattr(parser, "splice_file", slow_splice_file)
+
+    async def cancel_save():
+        wiki = parse(wiki_file)
+        tiddler = wiki.get_or_create("New tiddler")
+        tiddler.text = "Text"
+        wiki.add(tiddler)
+        task = asyncio.create_task(wiki.asave())
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        # The save is still running, so the task can't be cancelled yet
+        assert not task.done()
+        resume.set()
+        with raises(asyncio.CancelledError):
+            await task
+        return wiki
+
+    wiki = asyncio.run(cancel_save())
+    assert wiki.changes == []
+    assert parse(wiki_file)["New tiddler"].text == "Text"
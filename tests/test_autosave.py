@@ -0,0 +1,96 @@
+import threading
+import time
+
+from pytest import raises
+
+from tests.helpers import add_tiddler
+from tiddlyparse import parse
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out"
+        time.sleep(0.01)
+
+
+def test_burst_of_changes_is_saved_once(wiki_file):
+    wiki = parse(wiki_file)
+    with wiki.autosave(quiet_period=0.2, max_delay=5) as autosave:
+        for index in range(100):
+            add_tiddler(wiki, f"Tiddler {index}")
+        wiki.remove(wiki["$:/isEncrypted"])
+        assert autosave.pending
+
+        _wait_for(lambda: not autosave.pending)
+        assert wiki.stats.counters["changes_saved"] == 101
+        assert "Tiddler 99" in [t.title for t in parse(wiki_file).items()]
+        assert parse(wiki_file).get("$:/isEncrypted") is None
+
+
+def test_max_delay(wiki_file):
+    wiki = parse(wiki_file)
+    with wiki.autosave(quiet_period=0.2, max_delay=0.3):
+        # Changes keep coming faster than the quiet period
+        start = time.monotonic()
+        while time.monotonic() - start < 1:
+            add_tiddler(wiki, "Busy tiddler")
+            time.sleep(0.05)
+        assert wiki.stats.counters["changes_saved"] > 0
+    assert parse(wiki_file)["Busy tiddler"].text == "Text"
+
+
+def test_flush_and_close(wiki_file):
+    wiki = parse(wiki_file)
+    autosave = wiki.autosave(quiet_period=60, max_delay=60)
+    with raises(RuntimeError):
+        wiki.autosave()
+
+    add_tiddler(wiki, "Flushed")
+    autosave.flush()
+    assert not autosave.pending
+    assert parse(wiki_file).get("Flushed")
+
+    add_tiddler(wiki, "Closed")
+    autosave.close()
+    assert parse(wiki_file).get("Closed")
+    assert wiki._autosave is None
+    assert not autosave._thread.is_alive()
+
+
+def test_concurrent_changes(wiki_file):
+    wiki = parse(wiki_file)
+
+    def add_tiddlers(thread):
+        for index in range(200):
+            add_tiddler(wiki, f"Thread {thread} tiddler {index}")
+
+    with wiki.autosave(quiet_period=0, max_delay=0):
+        threads = [threading.Thread(target=add_tiddlers, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(parse(wiki_file)) == len(wiki)
+
+
+def test_background_error_is_raised_by_flush(wiki_file, monkeypatch):
+    wiki = parse(wiki_file)
+    errors = []
+    with wiki.autosave(quiet_period=0, max_delay=60, on_error=errors.append):
+        monkeypatch.setattr(wiki, "save", lambda: 1 / 0)
+        add_tiddler(wiki, "Unsaved")
+        _wait_for(lambda: errors)
+        assert isinstance(errors[0], ZeroDivisionError)
+        monkeypatch.undo()
+
+    autosave = wiki.autosave(quiet_period=0, max_delay=60)
+    monkeypatch.setattr(wiki, "save", lambda: 1 / 0)
+    add_tiddler(wiki, "Unsaved")
+    _wait_for(lambda: autosave._error is not None)
+    with raises(ZeroDivisionError):
+        autosave.flush()
+    monkeypatch.undo()
+    autosave.close()
+    assert parse(wiki_file).get("Unsaved")
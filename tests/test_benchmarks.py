@@ -0,0 +1,31 @@
+from pytest import mark
+
+from benchmarks.bench import OPERATIONS, Measurement, compare, run_benchmarks
+from benchmarks.generate import WikiSpec, generate_wiki
+from tiddlyparse import parse
+
+SPEC = WikiSpec(tiddlers=50, binary=0.1, binary_size=100, plugin_tiddlers=3)
+
+
+@mark.parametrize("format", ["json", "div"])
+def test_generate_wiki(tmp_path, format):
+    path = tmp_path / "wiki.html"
+    generate_wiki(path, format, SPEC)
+
+    wiki = parse(path, fast=False)
+    assert len(wiki.titles_with_prefix("$:/plugins/bench/")) == 2
+    assert wiki.search(type="image/png")
+    assert wiki.tagged(wiki.tags_of(wiki.search(tags=True)[0].title)[0])
+    assert len(wiki) >= SPEC.tiddlers + SPEC.plugins
+
+
+def test_benchmarks(tmp_path):
+    results = run_benchmarks(SPEC, ["json", "div"], repeat=1, workdir=tmp_path)
+
+    assert list(results["div"]) == [operation.name for operation in OPERATIONS]
+    assert compare(results, results, 0.25) == []
+    baseline = {"json": {"parse": Measurement(0.001, 0)}}
+    slower = {"json": {"parse": Measurement(1.0, 0)}}
+    assert compare(slower, baseline, 0.25) == [
+        "json parse: seconds 1 > 0.001 (+99900%)"
+    ]
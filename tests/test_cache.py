@@ -0,0 +1,85 @@
+import os
+
+from pytest import fixture, mark
+
+from tiddlyparse import cache, parse
+from tiddlyparse.cache import ParseCache
+from tiddlyparse.parser import DivTiddlyParser, JsonTiddlyParser
+
+# A modification time well before the time of the tests
+OLD_MTIME_NS = 1_600_000_000_000_000_000
+
+
+@fixture
+def wiki_file(wiki_file):
+    os.utime(wiki_file, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+    yield wiki_file
+
+
+@fixture
+def parse_cache(tmp_path):
+    with ParseCache(tmp_path / "cache.sqlite") as parse_cache:
+        yield parse_cache
+
+
+def _no_records(*args, **kwargs):
+    raise AssertionError("The store area shouldn't be read again.")
+
+
+def test_parse_from_cache(wiki_file, parse_cache, monkeypatch):
+    wiki = parse(wiki_file, cache=parse_cache)
+
+    monkeypatch.setattr(JsonTiddlyParser, "read_records", _no_records)
+    monkeypatch.setattr(DivTiddlyParser, "read_records", _no_records)
+    monkeypatch.setattr(cache, "file_digest", _no_records)
+    cached = parse(wiki_file, cache=parse_cache)
+
+    assert cached.fileformat == wiki.fileformat
+    assert [t.to_dict() for t in cached.items()] == [t.to_dict() for t in wiki.items()]
+
+
+def test_write_after_parse_from_cache(wiki_file, parse_cache):
+    original = wiki_file.read_bytes()
+    parse(wiki_file, cache=parse_cache)
+
+    wiki = parse(wiki_file, cache=parse_cache)
+    wiki.save()
+    assert wiki_file.read_bytes() == original
+
+    tiddler = wiki.get_or_create("New tiddler")
+    tiddler.text = "Text"
+    wiki.add(tiddler)
+    wiki.save()
+    assert parse(wiki_file, cache=parse_cache)["New tiddler"].text == "Text"
+
+
+@mark.parametrize("lazy,mmap", [(False, False), (True, False), (True, True)])
+def test_cache_by_path(wiki_file, tmp_path, lazy, mmap):
+    cache_path = tmp_path / "cache.sqlite"
+    parse(wiki_file, lazy=lazy, cache=cache_path, mmap=mmap)
+
+    wiki = parse(wiki_file, lazy=lazy, cache=cache_path, mmap=mmap)
+    assert wiki["$:/isEncrypted"].text == "no"
+
+
+def test_changed_file_is_parsed_again(wiki_file, parse_cache):
+    parse(wiki_file, cache=parse_cache)
+    data = wiki_file.read_bytes()
+    wiki_file.write_bytes(data.replace(b"TiddlyWiki", b"TiddlyWikx", 1))
+
+    wiki = parse(wiki_file, cache=parse_cache)
+    assert "$:/isEncrypted" in [t.title for t in wiki.items()]
+    assert parse_cache.get(wiki_file, wiki_file.stat()) is not None
+
+
+def test_racy_file_is_compared_by_digest(wiki_file, parse_cache):
+    os.utime(wiki_file)
+    parse(wiki_file, cache=parse_cache)
+    # Same size and modification time, but a different content
+    stat = wiki_file.stat()
+    data = wiki_file.read_bytes().replace(b"isEncrypted", b"isEncryptex")
+    wiki_file.write_bytes(data)
+    os.utime(wiki_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert parse_cache.get(wiki_file, wiki_file.stat()) is None
+    assert parse(wiki_file, cache=parse_cache).get("$:/isEncryptex")
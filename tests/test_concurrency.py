@@ -0,0 +1,243 @@
+import json
+import threading
+import time
+
+from pytest import mark, raises
+
+from tiddlyparse import parse
+from tiddlyparse.concurrency import ConcurrentWiki, RWLock
+
+
+def _run_threads(*targets):
+    errors = []
+
+    def run(target):
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_readers_and_writers(wiki_file):
+    wiki = ConcurrentWiki(parse(wiki_file))
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            for tiddler in wiki.items():
+                tiddler.to_dict()
+            wiki.search(tags="Writer")
+            wiki.tagged("Writer")
+            wiki.filter("[tag[Writer]limit[5]]")
+            assert wiki.get("$:/core") is not None
+
+    def write(thread):
+        for index in range(100):
+            wiki.put({"title": f"Thread {thread} tiddler {index}", "tags": "Writer"})
+            if index % 25 == 0:
+                wiki.save()
+
+    def writers():
+        _run_threads(*(lambda i=i: write(i) for i in range(2)))
+        done.set()
+
+    _run_threads(read, read, read, writers)
+
+    assert len(wiki.tagged("Writer")) == 200
+    wiki.save()
+    assert len(parse(wiki_file)) == len(wiki)
+
+
+@mark.parametrize("mmap", [False, True])
+def test_concurrent_lazy_decoding(wiki_file, mmap):
+    wiki = parse(wiki_file)
+    wiki.add_many(wiki.new_tiddler(f"Tiddler {index}") for index in range(500))
+    wiki.save()
+    expected = {t.title: dict(t.to_dict()) for t in parse(wiki_file).items()}
+
+    for _ in range(5):
+        # Every reader decodes the tiddlers that aren't decoded yet
+        lazy = ConcurrentWiki(parse(wiki_file, lazy=True, mmap=mmap))
+        barrier = threading.Barrier(4)
+
+        def read():
+            barrier.wait()
+            for title, fields in expected.items():
+                tiddler = lazy.get(title)
+                assert dict(tiddler.stored_values) == fields
+                assert tiddler.text == fields.get("text", "")
+                assert tiddler.title == title
+
+        _run_threads(*[read] * 4)
+
+
+def test_snapshot_is_unaffected_by_changes(wiki_file, tmp_path):
+    wiki = ConcurrentWiki(parse(wiki_file))
+    before = [tiddler.to_dict() for tiddler in wiki.items()]
+    snapshot = wiki.snapshot()
+
+    wiki.update("$:/isEncrypted", text="Changed")
+    wiki.put({"title": "Added", "text": "Text"})
+    assert wiki.delete("$:/themes/tiddlywiki/vanilla")
+    assert not wiki.delete("No such tiddler")
+    wiki.save()
+
+    assert len(snapshot) == len(before)
+    assert "Added" not in snapshot
+    assert snapshot.get("$:/isEncrypted").text == "no"
+    assert [tiddler.to_dict() for tiddler in snapshot.items()] == before
+    assert wiki.get("$:/isEncrypted").text == "Changed"
+
+    snapshot.export("jsonl", tmp_path / "snapshot.jsonl")
+    with open(tmp_path / "snapshot.jsonl") as fp:
+        assert [json.loads(line) for line in fp] == before
+
+
+def test_snapshot_is_reused_until_changed(wiki_file):
+    wiki = ConcurrentWiki(parse(wiki_file))
+    snapshot = wiki.snapshot()
+    assert wiki.snapshot() is snapshot
+    wiki.save()
+    assert wiki.snapshot() is snapshot
+
+    wiki.put({"title": "Added"})
+    assert wiki.snapshot() is not snapshot
+    assert "Added" in wiki.snapshot()
+
+
+def test_indexes_are_built_once_by_concurrent_queries(wiki_file):
+    wiki = ConcurrentWiki(parse(wiki_file))
+    parser = wiki.wiki
+    sources = []
+
+    def slow_source():
+        sources.append(threading.get_ident())
+        time.sleep(0.05)
+        return list(parser._tiddlers.items())
+
+    for index in parser._indexes:
+        index._source = slow_source
+    queries = [
+        lambda: wiki.search(author="JeremyRuston"),
+        lambda: wiki.tagged("$:/tags/Stylesheet"),
+        lambda: wiki.fulltext("snow"),
+    ]
+
+    _run_threads(*queries * 4)
+
+    # One build each for the field, the tags and the full text
+    assert len(sources) == 3
+    assert wiki.search(author="JeremyRuston") == parser.search(author="JeremyRuston")
+
+
+def test_queries_run_in_parallel(wiki_file):
+    wiki = ConcurrentWiki(parse(wiki_file))
+    parser = wiki.wiki
+    wiki.search(author=True)
+    building = threading.Event()
+    release = threading.Event()
+
+    def blocked_source():
+        building.set()
+        assert release.wait(5)
+        return list(parser._tiddlers.items())
+
+    parser._tag_index._source = blocked_source
+    builder = threading.Thread(target=wiki.tagged, args=("Tag",))
+    builder.start()
+    assert building.wait(5)
+
+    # Other queries don't wait for the tag index
+    assert len(wiki.search(author=True)) > 0
+    assert wiki.filter("[has[author]limit[1]]")
+    release.set()
+    builder.join()
+
+
+def test_update_keeps_other_fields(wiki_file):
+    wiki = ConcurrentWiki(parse(wiki_file))
+    original = wiki.get("$:/core")
+
+    updated = wiki.update("$:/core", text="New text")
+
+    assert updated is not original
+    assert updated.text == "New text"
+    assert updated.author == original.author
+    assert wiki.get("$:/core") is updated
+    assert wiki.update("New", text="Text").title == "New"
+    with raises(ValueError):
+        wiki.put({"text": "No title"})
+
+
+def test_reads_continue_during_save(wiki_file, monkeypatch):
+    wiki = ConcurrentWiki(parse(wiki_file))
+    wiki.put({"title": "Added", "text": "Text"})
+    saving = threading.Event()
+    release = threading.Event()
+    dump_to_file = wiki.wiki.dump_to_file
+
+    def slow_dump_to_file():
+        saving.set()
+        assert release.wait(5)
+        dump_to_file()
+
+    monkeypatch.setattr(wiki.wiki, "dump_to_file", slow_dump_to_file)
+    saver = threading.Thread(target=wiki.save)
+    saver.start()
+    assert saving.wait(5)
+
+    # Readers aren't blocked by the save, writers wait for it
+    assert wiki.get("Added").text == "Text"
+    assert len(wiki.snapshot()) == len(wiki)
+    writer = threading.Thread(target=wiki.put, args=({"title": "Later"},))
+    writer.start()
+    writer.join(0.1)
+    assert writer.is_alive()
+
+    release.set()
+    saver.join()
+    writer.join()
+    assert parse(wiki_file).get("Added") is not None
+    assert wiki.get("Later") is not None
+
+
+def test_save_with_soup_excludes_readers(wiki_file):
+    wiki = ConcurrentWiki(parse(wiki_file, fast=False))
+    wiki.update("$:/isEncrypted", text="Changed")
+    wiki.delete("$:/themes/tiddlywiki/vanilla")
+
+    _run_threads(wiki.save, wiki.items, wiki.items)
+
+    saved = parse(wiki_file)
+    assert saved["$:/isEncrypted"].text == "Changed"
+    assert saved.get("$:/themes/tiddlywiki/vanilla") is None
+
+
+def test_rwlock_prefers_writers():
+    lock = RWLock()
+    events = []
+    with lock.read():
+        writer = threading.Thread(target=_hold, args=(lock.write, events, "write"))
+        writer.start()
+        while not lock._waiting_writers:
+            time.sleep(0.01)
+        # A reader arriving after the writer waits for it
+        reader = threading.Thread(target=_hold, args=(lock.read, events, "read"))
+        reader.start()
+        time.sleep(0.05)
+        assert events == []
+    writer.join()
+    reader.join()
+    assert events == ["write", "read"]
+
+
+def _hold(acquire, events, name):
+    with acquire():
+        events.append(name)
@@ -0,0 +1,81 @@
+import base64
+import json
+
+from pytest import fixture, raises
+
+PNG = b"\x89PNG\r\n\x1a\n"
+
+
+@fixture
+def wiki(json_wiki):
+    wiki = json_wiki
+    for title, fields in [
+        ("Journal/2021-07-24", {"text": "Line 1\nLine 2\n", "tags": "Journal"}),
+        ("journal/2021-07-24", {"text": "Same title in lowercase"}),
+        ("Multi-line", {"caption": "Line 1\nLine 2"}),
+        ("image.png", {"text": base64.b64encode(PNG).decode(), "type": "image/png"}),
+    ]:
+        tiddler = wiki.get_or_create(title)
+        for key, value in fields.items():
+            setattr(tiddler, key, value)
+        wiki.add(tiddler, track_modified=False)
+    yield wiki
+
+
+def test_export_jsonl(wiki, tmp_path):
+    wiki.export("jsonl", tmp_path / "wiki.jsonl")
+
+    lines = (tmp_path / "wiki.jsonl").read_text().splitlines()
+    assert [json.loads(line) for line in lines] == [t.to_dict() for t in wiki.items()]
+
+
+def test_export_tid(wiki, tmp_path):
+    dest = tmp_path / "tiddlers"
+    wiki.export("tid", dest)
+
+    assert sorted(path.name for path in dest.iterdir()) == [
+        "$__StoryList.tid",
+        "$__config_OfficialPluginLibrary.tid",
+        "$__core.tid",
+        "$__isEncrypted.tid",
+        "$__status_RequireReloadDueToPluginChange.tid",
+        "$__themes_tiddlywiki_snowwhite.tid",
+        "$__themes_tiddlywiki_vanilla.tid",
+        "Journal_2021-07-24.tid",
+        "Multi-line.json",
+        "image.png",
+        "image.png.meta",
+        "journal_2021-07-24 1.tid",
+    ]
+    assert (dest / "Journal_2021-07-24.tid").read_text() == (
+        "title: Journal/2021-07-24\ntags: Journal\n\nLine 1\nLine 2\n"
+    )
+    assert json.loads((dest / "Multi-line.json").read_text()) == [
+        {"title": "Multi-line", "caption": "Line 1\nLine 2"}
+    ]
+    assert (dest / "image.png").read_bytes() == PNG
+    meta = (dest / "image.png.meta").read_text()
+    assert meta == "title: image.png\ntype: image/png\n"
+
+
+def test_export_folder(wiki, tmp_path):
+    dest = tmp_path / "wiki"
+    wiki.export("folder", dest)
+
+    info = json.loads((dest / "tiddlywiki.info").read_text())
+    assert info == {
+        "plugins": ["tiddlywiki/tiddlyweb", "tiddlywiki/filesystem"],
+        "themes": ["tiddlywiki/snowwhite", "tiddlywiki/vanilla"],
+        "languages": [],
+    }
+    names = {path.name for path in (dest / "tiddlers").iterdir()}
+    assert "$__isEncrypted.tid" in names
+    assert "$__core.tid" not in names
+    assert "$__themes_tiddlywiki_vanilla.tid" not in names
+
+
+def test_export_to_non_empty_dir(wiki, tmp_path):
+    (tmp_path / "existing.tid").write_text("title: existing\n\n")
+
+    with raises(FileExistsError):
+        wiki.export("tid", tmp_path)
@@ -0,0 +1,41 @@
+from tiddlyparse.fields import FieldValues, get_layout
+from tiddlyparse.parser import JsonTiddler
+
+
+def test_layouts_are_shared():
+    layout = get_layout(["title", "text"])
+
+    assert get_layout(("title", "text")) is layout
+    assert get_layout(["text", "title"]) is not layout
+
+
+def test_field_values():
+    values = FieldValues(get_layout(["title", "text"]), ("Title", "Text"))
+
+    assert dict(values) == {"title": "Title", "text": "Text"}
+    assert "text" in values
+    assert values.get("tags") is None
+    assert values.get("tags", "") == ""
+
+
+def test_tiddlers_share_field_names():
+    tiddler1 = JsonTiddler({"title": "One", "text": "1"})
+    tiddler2 = JsonTiddler({"title": "Two", "text": "2"})
+
+    assert not hasattr(tiddler1, "__dict__")
+    assert tiddler1._stored._layout is tiddler2._stored._layout
+
+
+def test_tiddler_to_dict_keeps_order():
+    tiddler = JsonTiddler({"title": "One", "text": "1", "tags": "a"})
+    tiddler.color = "red"
+    tiddler.text = "changed"
+
+    assert list(tiddler.to_dict().items()) == [
+        ("title", "One"),
+        ("text", "changed"),
+        ("tags", "a"),
+        ("color", "red"),
+    ]
+    assert tiddler.stored_values["text"] == "1"
+    assert tiddler.missing == ""
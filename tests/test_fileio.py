@@ -0,0 +1,65 @@
+import errno
+import os
+
+import pytest
+
+from tiddlyparse import fileio
+
+
+def test_splice_file(tmp_path):
+    path = tmp_path / "wiki.html"
+    path.write_bytes(b"<html>old store</html>")
+
+    fileio.splice_file(path, 6, 15, b"new")
+
+    assert path.read_bytes() == b"<html>new</html>"
+    assert os.listdir(tmp_path) == ["wiki.html"]
+
+
+def test_splice_file_keeps_permissions(tmp_path):
+    path = tmp_path / "wiki.html"
+    path.write_bytes(b"<html>old store</html>")
+    path.chmod(0o640)
+
+    fileio.splice_file(path, 6, 15, b"new")
+
+    assert path.stat().st_mode & 0o777 == 0o640
+
+
+def test_splice_file_keeps_symlink(tmp_path):
+    path = tmp_path / "wiki.html"
+    path.write_bytes(b"<html>old store</html>")
+    link = tmp_path / "link.html"
+    link.symlink_to(path)
+
+    fileio.splice_file(link, 6, 15, b"new")
+
+    assert link.is_symlink()
+    assert path.read_bytes() == b"<html>new</html>"
+
+
+def test_splice_file_without_zero_copy(tmp_path, monkeypatch):
+    def unsupported(*args):
+        raise OSError(errno.EXDEV, "Cross-device link")
+
+    monkeypatch.setattr(fileio, "_ZERO_COPY_FUNCS", [unsupported])
+    monkeypatch.setattr(fileio, "COPY_BUFSIZE", 4)
+    path = tmp_path / "wiki.html"
+    path.write_bytes(b"<html>old store</html>")
+
+    fileio.splice_file(path, 6, 15, b"new")
+
+    assert path.read_bytes() == b"<html>new</html>"
+
+
+def test_atomic_write_failure_keeps_original(tmp_path):
+    path = tmp_path / "wiki.html"
+    path.write_bytes(b"original")
+
+    with pytest.raises(RuntimeError):
+        with fileio.atomic_write(path) as tmpf:
+            tmpf.write_bytes(b"partial")
+            raise RuntimeError()
+
+    assert path.read_bytes() == b"original"
+    assert os.listdir(tmp_path) == ["wiki.html"]
@@ -0,0 +1,81 @@
+from pytest import fixture, mark, raises
+
+from tiddlyparse.filters import FilterSyntaxError, compile_filter
+
+
+@fixture
+def wiki(json_wiki):
+    wiki = json_wiki
+    for title, tags, modified in [
+        ("Journal", "", "20210101000000000"),
+        ("2021-07-24", "Journal", "20210724000000000"),
+        ("2021-07-23", "Journal", "20210723000000000"),
+        ("Draft of '2021-07-25'", "Journal", "20210725000000000"),
+        ("Ideas", "[[Project ideas]]", "20210601000000000"),
+    ]:
+        tiddler = wiki.get_or_create(title)
+        tiddler.tags = tags
+        tiddler.modified = modified
+        if title.startswith("Draft"):
+            setattr(tiddler, "draft.of", "2021-07-25")
+        wiki.add(tiddler)
+    yield wiki
+
+
+@mark.parametrize(
+    "expression,titles",
+    [
+        ("[tag[Journal]]", ["2021-07-23", "2021-07-24", "Draft of '2021-07-25'"]),
+        ("[tag[Journal]!has[draft.of]sort[modified]]", ["2021-07-23", "2021-07-24"]),
+        (
+            "[tag[Journal]!sort[modified]limit[2]]",
+            ["Draft of '2021-07-25'", "2021-07-24"],
+        ),
+        ("[is[draft]]", ["Draft of '2021-07-25'"]),
+        (
+            "[prefix[$:/]!prefix[$:/themes/]limit[2]]",
+            ["$:/config/OfficialPluginLibrary", "$:/core"],
+        ),
+        ("[all[tiddlers]!is[system]tag[Journal]last[]]", ["Draft of '2021-07-25'"]),
+        ("[name[Snow White]]", ["$:/themes/tiddlywiki/snowwhite"]),
+        ("[field:name[Snow White]]", ["$:/themes/tiddlywiki/snowwhite"]),
+        ("[[Ideas]tags[]]", ["Project ideas"]),
+        ("[[Journal]tagging[]first[]]", ["2021-07-23"]),
+        ("Ideas [[2021-07-24]] Ideas", ["2021-07-24", "Ideas"]),
+        ("[tag[Journal]] -[[2021-07-23]] +[suffix[4]]", ["2021-07-24"]),
+        ("[tag[Missing]] ~[[fallback]]", ["fallback"]),
+        ("[tag[Journal]count[]]", ["3"]),
+        ("[[a]] [[b]] +[is[missing]reverse[]]", ["b", "a"]),
+    ],
+)
+def test_filter(wiki, expression, titles):
+    assert wiki.filter(expression) == titles
+
+
+def test_filter_follows_changes(wiki):
+    assert wiki.filter("[tag[Journal]limit[1]]") == ["2021-07-23"]
+
+    wiki.remove(wiki["2021-07-23"])
+
+    assert wiki.filter("[tag[Journal]limit[1]]") == ["2021-07-24"]
+
+
+def test_filters_are_cached():
+    assert compile_filter("[tag[x]sort[]]") is compile_filter("[tag[x]sort[]]")
+
+
+@mark.parametrize(
+    "expression",
+    [
+        "[tag[x]",
+        "[tag{x}]",
+        "[tag<x>]",
+        "[search[x]]",
+        "[all[shadows]]",
+        "[limit[many]]",
+        "=[[x]]",
+    ],
+)
+def test_filter_syntax_errors(expression):
+    with raises(FilterSyntaxError):
+        compile_filter(expression)
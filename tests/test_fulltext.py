@@ -0,0 +1,70 @@
+from pytest import raises
+
+from tests.helpers import add_tiddler
+from tiddlyparse import parse
+from tiddlyparse.fulltext import FullTextIndex, tokenize
+from tiddlyparse.parser import JsonTiddler
+
+
+def test_tokenize():
+    assert tokenize("Snow-White's ÄPFEL, 2 apples") == [
+        "snow",
+        "white",
+        "s",
+        "äpfel",
+        "2",
+        "apples",
+    ]
+
+
+def test_fulltext_index_search():
+    tiddlers = {
+        "One": JsonTiddler({"title": "One", "text": "apple banana apple"}),
+        "Two": JsonTiddler({"title": "Two", "text": "Apple pie"}),
+    }
+    index = FullTextIndex(lambda: tiddlers.items())
+    index.build()
+
+    assert index.search("apple") == {"One": 2, "Two": 1}
+    assert index.search("apple pie") == {"Two": 2}
+    assert index.search("app") == {}
+    assert index.search("app ban", prefix=True) == {"One": 3}
+
+
+def test_fulltext_ranking_and_updates(wiki_file):
+    wiki = parse(wiki_file)
+    add_tiddler(wiki, "Few", "A ranked quux")
+    add_tiddler(wiki, "Many", "Quux, quux and quux again")
+
+    assert [t.title for t in wiki.fulltext("quux")] == ["Many", "Few"]
+    assert [t.title for t in wiki.fulltext("quux", limit=1)] == ["Many"]
+
+    add_tiddler(wiki, "Few", "Nothing but xyzzy here")
+    wiki.remove(wiki["Many"])
+    assert wiki.fulltext("quux") == []
+    assert [t.title for t in wiki.fulltext("xyz", prefix=True)] == ["Few"]
+
+
+def test_fulltext_index_saved_next_to_wiki(wiki_file):
+    wiki = parse(wiki_file)
+    add_tiddler(wiki, "Note", "Persisted words")
+    with raises(ValueError):
+        wiki.save_fulltext_index()
+    wiki.save()
+    wiki.save_fulltext_index()
+    assert wiki.fulltext_index_path == wiki_file.parent / "wiki.html.fulltext.json"
+
+    wiki = parse(wiki_file)
+    assert [t.title for t in wiki.fulltext("persisted")] == ["Note"]
+    assert wiki._fulltext._counts["Note"] == {"persisted": 1, "words": 1}
+
+
+def test_fulltext_index_ignored_after_wiki_changed(wiki_file):
+    wiki = parse(wiki_file)
+    wiki.save_fulltext_index()
+    add_tiddler(wiki, "Note", "Added plugh")
+    wiki.save()
+
+    wiki = parse(wiki_file)
+    assert not wiki._load_fulltext_index()
+    assert [t.title for t in wiki.fulltext("plugh")] == ["Note"]
@@ -0,0 +1,114 @@
+import base64
+import io
+import json
+
+from pytest import fixture, raises
+
+from tests.helpers import JSON_FIXTURE
+from tiddlyparse import importer, parse
+from tiddlyparse.importer import parse_tid, read_tiddlers
+
+PNG = b"\x89PNG\r\n\x1a\n"
+
+
+@fixture
+def exported(json_wiki, tmp_path):
+    wiki = json_wiki
+    for title, fields in [
+        ("Journal/2021-07-24", {"text": "Line 1\nLine 2\n", "tags": "Journal"}),
+        ("Multi-line", {"caption": "Line 1\nLine 2"}),
+        ("image.png", {"text": base64.b64encode(PNG).decode(), "type": "image/png"}),
+    ]:
+        tiddler = wiki.get_or_create(title)
+        for key, value in fields.items():
+            setattr(tiddler, key, value)
+        wiki.add(tiddler, track_modified=False)
+    wiki.export("tid", tmp_path / "tiddlers")
+    yield wiki, tmp_path / "tiddlers"
+
+
+def test_parse_tid():
+    assert parse_tid("title: A\r\ntags: [[B C]]\nno colon\n\nText\n\nMore") == {
+        "title": "A",
+        "tags": "[[B C]]",
+        "text": "Text\n\nMore",
+    }
+    assert parse_tid("title: Only a header") == {"title": "Only a header", "text": ""}
+
+
+def test_import_exported_tiddlers(exported, wiki_file, monkeypatch):
+    monkeypatch.setattr(importer, "BATCH_SIZE", 2)
+    source, path = exported
+    wiki = parse(wiki_file)
+
+    result = wiki.import_tiddlers(read_tiddlers(path, workers=2))
+
+    assert result.added[-3:] == ["Journal/2021-07-24", "Multi-line", "image.png"]
+    assert "$:/core" in result.added + result.replaced
+    assert result.skipped == []
+    for title in ["$:/core", "Journal/2021-07-24", "Multi-line", "image.png"]:
+        assert _non_empty(wiki[title]) == _non_empty(source[title])
+
+
+def _non_empty(tiddler):
+    # Tiddlers in the DIV format always have a text
+    return {key: value for key, value in tiddler.to_dict().items() if value}
+
+
+def test_import_policies(json_wiki):
+    wiki = json_wiki
+    for title, modified in [("Old", "20210101000000000"), ("New", "20230101000000000")]:
+        tiddler = wiki.get_or_create(title)
+        tiddler.modified = modified
+        tiddler.text = "Existing"
+        wiki.add(tiddler, track_modified=False)
+    imported = [
+        {"title": title, "modified": "20220101000000000", "text": "Imported"}
+        for title in ["Old", "New", "Added"]
+    ]
+
+    assert wiki.import_tiddlers(imported, policy="newer") == (
+        ["Added"],
+        ["Old"],
+        ["New"],
+    )
+    assert [wiki[title].text for title in ["Old", "New"]] == ["Imported", "Existing"]
+    assert wiki.import_tiddlers(imported, policy="skip").skipped == [
+        "Old",
+        "New",
+        "Added",
+    ]
+    assert wiki.import_tiddlers(imported).replaced == ["Old", "New", "Added"]
+    assert wiki["New"].text == "Imported"
+    with raises(ValueError):
+        wiki.import_tiddlers(imported, policy="merge")
+
+
+def test_import_saved(wiki_file):
+    wiki = parse(wiki_file)
+    lines = io.StringIO(
+        json.dumps({"title": "$:/StoryList", "list": ["A B", "C"]})
+        + "\n\n"
+        + json.dumps({"title": "A B", "text": "Text", "revision": 2})
+        + "\n"
+    )
+
+    wiki.import_tiddlers(read_tiddlers(lines))
+    wiki.save()
+
+    wiki = parse(wiki_file)
+    assert wiki["$:/StoryList"].list == "[[A B]] C"
+    assert wiki["$:/StoryList"].text == ""
+    assert wiki["A B"].revision == "2"
+
+
+def test_read_files(exported, tmp_path):
+    _, path = exported
+    (tmp_path / "wiki.jsonl").write_text('{"title": "A"}\n')
+
+    assert list(read_tiddlers(path / "Multi-line.json")) == [
+        {"title": "Multi-line", "caption": "Line 1\nLine 2"}
+    ]
+    assert list(read_tiddlers(tmp_path / "wiki.jsonl")) == [{"title": "A"}]
+    with raises(ValueError):
+        list(read_tiddlers(JSON_FIXTURE))
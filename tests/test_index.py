@@ -0,0 +1,57 @@
+from tiddlyparse.index import FieldIndex
+from tiddlyparse.parser import JsonTiddler
+
+
+def test_field_index_match():
+    tiddlers = {
+        "One": JsonTiddler({"title": "One", "type": "a", "tags": "x"}),
+        "Two": JsonTiddler({"title": "Two", "type": "a"}),
+        "Three": JsonTiddler({"title": "Three", "type": "b", "tags": "x"}),
+    }
+    index = FieldIndex(lambda: tiddlers.items())
+
+    assert index.match({"type": "a"}) == {"One", "Two"}
+    assert index.match({"type": "a", "tags": True}) == {"One"}
+    assert index.match({"tags": ""}) == {"Two"}
+    assert index.match({"type": "c", "tags": True}) == set()
+
+
+def test_field_index_update_and_discard():
+    tiddlers = {"One": JsonTiddler({"title": "One", "type": "a"})}
+    index = FieldIndex(lambda: tiddlers.items())
+    assert index.lookup("type", "a") == {"One"}
+
+    tiddler = tiddlers["One"]
+    tiddler.type = "b"
+    index.update("One", tiddler)
+    assert index.lookup("type", "a") == set()
+    assert index.lookup("type", "b") == {"One"}
+
+    index.discard("One")
+    assert index.lookup("type", "b") == set()
+    assert index.present("type") == set()
+
+
+def test_search_follows_add_and_remove(json_wiki):
+    assert json_wiki.search(name="Snow White")
+
+    tiddler = json_wiki.get_or_create("Snow White copy")
+    tiddler.name = "Snow White"
+    json_wiki.add(tiddler)
+    snowwhite = json_wiki["$:/themes/tiddlywiki/snowwhite"]
+    json_wiki.remove(snowwhite)
+
+    assert [t.title for t in json_wiki.search(name="Snow White")] == ["Snow White copy"]
+
+
+def test_search_follows_rename(json_wiki):
+    tiddler = json_wiki["$:/themes/tiddlywiki/snowwhite"]
+    tiddler.title = "Renamed"
+    json_wiki.add(tiddler)
+
+    assert [t.title for t in json_wiki.search(name="Snow White")] == ["Renamed"]
+    assert len(json_wiki.search(author=True)) == 3
+
+
+def test_search_without_query(json_wiki):
+    assert len(json_wiki.search()) == len(json_wiki)
@@ -0,0 +1,82 @@
+from pytest import mark, raises
+
+from tests.helpers import add_tiddler
+from tiddlyparse import parse
+
+
+def _titles(wiki):
+    return [t.title for t in wiki.items()]
+
+
+def test_changes_are_replayed(wiki_file):
+    original = wiki_file.read_bytes()
+    wiki = parse(wiki_file, journal=True)
+    add_tiddler(wiki, "Added")
+    add_tiddler(wiki, "$:/isEncrypted", text="Changed")
+    wiki.remove(wiki["$:/themes/tiddlywiki/vanilla"])
+    with wiki.batch():
+        renamed = wiki["$:/themes/tiddlywiki/snowwhite"]
+        renamed.title = "$:/themes/renamed"
+        wiki.add(renamed)
+    assert wiki_file.read_bytes() == original
+
+    # Like after a crash, without saving or closing the journal
+    replayed = parse(wiki_file, journal=True)
+    assert _titles(replayed) == _titles(wiki)
+    assert replayed["$:/isEncrypted"].text == "Changed"
+    assert replayed["$:/themes/renamed"].to_dict() == renamed.to_dict()
+    assert replayed.stats.counters["journal_replayed"] == 5
+    replayed.close_journal()
+
+    assert parse(wiki_file).get("Added") is None
+    assert parse(wiki_file, journal=True).get("Added") is not None
+
+
+@mark.parametrize("fast", [True, False])
+def test_save_empties_journal(wiki_file, fast):
+    wiki = parse(wiki_file, fast=fast, journal=True)
+    add_tiddler(wiki, "Added")
+    assert wiki.journal_path.stat().st_size > 0
+
+    wiki.save()
+
+    assert wiki.journal_path.stat().st_size == 0
+    add_tiddler(wiki, "Added later")
+    wiki = parse(wiki_file, journal=True)
+    assert wiki.get("Added") is not None
+    assert wiki.get("Added later") is not None
+
+
+def test_compact_past_threshold(wiki_file):
+    wiki = parse(wiki_file)
+    wiki.open_journal(compact_size=1000)
+    for index in range(20):
+        add_tiddler(wiki, f"Tiddler {index}", text="x" * 100)
+
+    assert wiki.stats.counters["journal_compactions"] > 0
+    assert wiki.journal_path.stat().st_size <= 1000
+    assert parse(wiki_file, journal=True).get("Tiddler 19") is not None
+    assert parse(wiki_file).get("Tiddler 10") is not None
+
+
+def test_partial_line_is_dropped(wiki_file):
+    wiki = parse(wiki_file, journal=True)
+    add_tiddler(wiki, "Complete")
+    wiki.close_journal()
+    with open(wiki.journal_path, "ab") as fp:
+        fp.write(b'{"add":{"title":"Partial"')
+
+    wiki = parse(wiki_file, journal=True)
+    add_tiddler(wiki, "Next")
+
+    assert wiki.get("Partial") is None
+    replayed = parse(wiki_file, journal=True)
+    assert replayed.get("Complete") is not None
+    assert replayed.get("Next") is not None
+
+
+def test_invalid_journal(wiki_file):
+    wiki_file.with_name("wiki.html.journal").write_text('{"add":"x"}\n')
+
+    with raises(ValueError):
+        parse(wiki_file, journal=True)
@@ -0,0 +1,57 @@
+from pytest import mark
+
+from tiddlyparse import parse
+from tiddlyparse.stats import WikiStats
+
+
+@mark.parametrize("fast", [True, False])
+def test_parse_and_save_stats(wiki_file, fast):
+    events = []
+    stats = WikiStats(sink=lambda name, value: events.append(name))
+    size = wiki_file.stat().st_size
+
+    wiki = parse(wiki_file, fast=fast, stats=stats)
+    tiddler = wiki.get_or_create("New tiddler")
+    wiki.add(tiddler)
+    wiki.remove(wiki["$:/isEncrypted"])
+    wiki.save()
+
+    assert wiki.stats is stats
+    read_phases = ["parse.read", "parse.read_store"] if fast else ["parse.soup"]
+    assert list(stats.phases) == [
+        *read_phases,
+        "parse.load_tiddlers",
+        "parse",
+        "save.render",
+        "save.write",
+        "save",
+    ]
+    assert stats.counters == {
+        "bytes_read": size,
+        "tiddlers_loaded": len(wiki),
+        "bytes_written": wiki_file.stat().st_size,
+        "changes_saved": 2,
+    }
+    assert events[-1] == "phases.save"
+    assert "counters.changes_saved" in events
+    assert stats.to_dict()["counters"] == stats.counters
+
+
+def test_cache_stats(wiki_file, tmp_path):
+    cache = tmp_path / "cache.sqlite"
+    parse(wiki_file, cache=cache)
+
+    wiki = parse(wiki_file, cache=cache)
+
+    assert list(wiki.stats.phases) == ["parse.cache", "parse"]
+    assert wiki.stats.counters == {"cache_hits": 1, "tiddlers_loaded": len(wiki)}
+
+
+def test_stats_add_up(wiki_file):
+    stats = WikiStats()
+    for _ in range(2):
+        parse(wiki_file, stats=stats)
+
+    assert stats.counters["bytes_read"] == 2 * wiki_file.stat().st_size
+    stats.reset()
+    assert stats.to_dict() == {"phases": {}, "counters": {}}
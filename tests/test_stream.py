@@ -0,0 +1,80 @@
+import itertools
+
+from pytest import mark, raises
+
+from tests.helpers import FIXTURES, JSON_FIXTURE
+from tiddlyparse import iter_tiddlers, parse
+from tiddlyparse.parser import UnknownTiddlywikiFormatError
+from tiddlyparse.store import stream_store
+
+
+@mark.parametrize("chunk_size", [7, 4096, 1024 * 1024])
+@mark.parametrize("name", ["empty-5.2.0.html", "empty-5.1.23.html"])
+def test_iter_tiddlers(name, chunk_size):
+    wiki = parse(FIXTURES / name)
+
+    tiddlers = list(iter_tiddlers(FIXTURES / name, chunk_size=chunk_size))
+
+    assert tiddlers == [t.to_dict() for t in wiki.items()]
+
+
+def test_iter_tiddlers_other_json_layout(tmp_path):
+    path = tmp_path / "wiki.html"
+    content = JSON_FIXTURE.read_text()
+    path.write_text(content.replace("},\n{", "} ,{").replace("[\n{", "[ {"))
+
+    titles = [fields["title"] for fields in iter_tiddlers(path, chunk_size=100)]
+
+    assert titles == [t.title for t in parse(path).items()]
+
+
+def test_iter_tiddlers_is_lazy(tmp_path):
+    path = tmp_path / "wiki.html"
+    content = JSON_FIXTURE.read_text()
+    # The rest of the store area is broken, but never read
+    path.write_text(content.replace('{"title":"$:/isEncrypted"', "broken"))
+
+    tiddlers = iter_tiddlers(path, chunk_size=1024)
+
+    assert next(tiddlers)["title"] == "$:/config/OfficialPluginLibrary"
+    tiddlers.close()
+
+
+@mark.parametrize(
+    "content",
+    [
+        "<html><body><p>Not a wiki</p></body></html>",
+        '<script class="tiddlywiki-tiddler-store">[{"title": "a"},',
+        '<script class="tiddlywiki-tiddler-store">[{"title": "a"} {"title": "b"}]',
+        '<div id="storeArea"><div title="a"><pre></pre></div>',
+        '<div id="storeArea"><div title="a"><!-- <div> --></div></div>',
+    ],
+)
+def test_iter_tiddlers_errors(tmp_path, content):
+    path = tmp_path / "wiki.html"
+    path.write_text(content)
+
+    with raises(UnknownTiddlywikiFormatError):
+        list(iter_tiddlers(path, chunk_size=16))
+
+
+def test_iter_tiddlers_bounds_invalid_tiddler(tmp_path, monkeypatch):
+    monkeypatch.setattr("tiddlyparse.store._MAX_RECORD_SIZE", 1000)
+    path = tmp_path / "wiki.html"
+    store = '[{"title": "a", "text": "%s"},\n{"title" "b", "text": "%s"}]'
+    path.write_text(
+        '<script class="tiddlywiki-tiddler-store">'
+        + store % ("a" * 900, "b" * 5000)
+        + "</script>"
+    )
+
+    tiddlers = iter_tiddlers(path, chunk_size=16)
+    assert next(tiddlers)["title"] == "a"
+    with raises(UnknownTiddlywikiFormatError, match="no complete tiddler"):
+        next(tiddlers)
+
+    # The rest of the stream isn't read once the limit is reached
+    tag = b'<script class="tiddlywiki-tiddler-store">[{"title" "a"'
+    chunks = itertools.chain([tag], itertools.repeat(b"x" * 100))
+    with raises(ValueError, match="no complete tiddler"):
+        list(stream_store(chunks))
@@ -0,0 +1,55 @@
+from pytest import raises
+
+from tests.helpers import add_tiddler
+from tiddlyparse.parser import TiddlerNotFoundError
+from tiddlyparse.tags import parse_list, stringify_list
+
+
+def test_parse_list():
+    assert parse_list("foo [[multi word]] bar foo") == ["foo", "multi word", "bar"]
+    assert parse_list("  a\tb\nc  ") == ["a", "b", "c"]
+    assert parse_list("non\xa0breaking [[]]") == ["non\xa0breaking", ""]
+    assert parse_list("") == []
+
+
+def test_stringify_list():
+    titles = ["foo", "multi word", "non\xa0breaking"]
+
+    assert stringify_list(titles) == "foo [[multi word]] non\xa0breaking"
+    assert parse_list(stringify_list(titles)) == titles
+
+
+def test_tagged(json_wiki):
+    add_tiddler(json_wiki, "b", tags="Topic")
+    add_tiddler(json_wiki, "A", tags="[[Other topic]] Topic")
+    add_tiddler(json_wiki, "c", tags="Other")
+
+    assert [t.title for t in json_wiki.tagged("Topic")] == ["A", "b"]
+    assert json_wiki.tags_of("A") == ["Other topic", "Topic"]
+    assert json_wiki.tags_of("$:/isEncrypted") == []
+    with raises(TiddlerNotFoundError):
+        json_wiki.tags_of("missing")
+
+
+def test_tagged_follows_list_field(json_wiki):
+    add_tiddler(json_wiki, "a", tags="Topic")
+    add_tiddler(json_wiki, "b", tags="Topic")
+    add_tiddler(json_wiki, "c", tags="Topic")
+    assert [t.title for t in json_wiki.tagged("Topic")] == ["a", "b", "c"]
+
+    add_tiddler(json_wiki, "Topic", list="c [[not tagged]] b")
+    assert [t.title for t in json_wiki.tagged("Topic")] == ["c", "b", "a"]
+
+
+def test_tagged_follows_changes(json_wiki):
+    tiddler = add_tiddler(json_wiki, "a", tags="Topic")
+    assert [t.title for t in json_wiki.tagged("Topic")] == ["a"]
+
+    tiddler.tags = "Other"
+    json_wiki.add(tiddler)
+    add_tiddler(json_wiki, "b", tags="Topic")
+    assert [t.title for t in json_wiki.tagged("Topic")] == ["b"]
+    assert [t.title for t in json_wiki.tagged("Other")] == ["a"]
+
+    json_wiki.remove(json_wiki["b"])
+    assert json_wiki.tagged("Topic") == []
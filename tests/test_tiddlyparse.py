@@ -1,35 +1,11 @@
 import re
 import shutil
 import time
-from pathlib import Path
 
-from pytest import fixture
+from pytest import fixture, mark
 
-from tiddlyparse import __version__, parse
-from tiddlyparse.parser import FileFormat
-
-FIXTURES = Path(__file__).parent / "fixtures"
-
-
-@fixture
-def div_file_name():
-    yield FIXTURES / "empty-5.1.23.html"
-
-
-@fixture
-def div_wiki(div_file_name):
-    wiki = parse(file=div_file_name)
-    yield wiki
-
-
-@fixture
-def json_file_name():
-    yield FIXTURES / "empty-5.2.0.html"
-
-
-@fixture
-def json_wiki(json_file_name):
-    yield parse(file=json_file_name)
+from tiddlyparse import __version__, parse, parse_many
+from tiddlyparse.parser import FileFormat, UnknownTiddlywikiFormatError
 
 
 @fixture
@@ -99,6 +75,53 @@ def test_div_write_no_modification(div_file_name, tmp_path):
     assert orig_content == new_content
 
 
+def test_div_write_no_modification_exact(div_file_name, tmp_path):
+    """Without a soup, the store area is written back byte for byte."""
+    fixture_name = tmp_path / "wiki.html"
+    shutil.copy(div_file_name, fixture_name)
+
+    wiki = parse(fixture_name)
+    wiki.save()
+
+    assert div_file_name.read_bytes() == fixture_name.read_bytes()
+
+
+def test_div_write_remove(div_file_name, tmp_path):
+    fixture_name = tmp_path / "wiki.html"
+    shutil.copy(div_file_name, fixture_name)
+
+    wiki = parse(fixture_name)
+    wiki.remove(wiki["$:/isEncrypted"])
+    tiddler = wiki.get_or_create("my_new_tiddler")
+    wiki.add(tiddler)
+    wiki.remove(tiddler)
+    wiki.save()
+
+    wiki2 = parse(fixture_name)
+    assert len(wiki2) == 3
+    assert wiki2.get("$:/isEncrypted") is None
+    assert wiki2.get("my_new_tiddler") is None
+
+
+def test_div_write_new_tiddler_twice(div_file_name, tmp_path):
+    fixture_name = tmp_path / "wiki.html"
+    shutil.copy(div_file_name, fixture_name)
+
+    wiki = parse(fixture_name)
+    tiddler = wiki.get_or_create("my_new_tiddler")
+    tiddler.text = "first"
+    wiki.add(tiddler)
+    wiki.save()
+    tiddler.text = "second"
+    wiki.add(tiddler)
+    wiki.save()
+
+    assert fixture_name.read_text().count('title="my_new_tiddler"') == 1
+    wiki2 = parse(fixture_name)
+    assert len(wiki2) == 5
+    assert wiki2["my_new_tiddler"].text == "second"
+
+
 def test_div_noop_modification_write_no_modification(div_file_name, tmp_path):
     """Ensure that adding a Tiddler without modifications doesn't change the file."""
     fixture_name = tmp_path / "wiki.html"
@@ -145,6 +168,31 @@ def test_div_write_changed_title(div_file_name, tmp_path):
     assert tiddler3.text == "This is a test for a new tiddler - changed."
 
 
+def test_div_fast_parse_matches_soup(div_file_name):
+    fast_wiki = parse(div_file_name)
+    soup_wiki = parse(div_file_name, fast=False)
+
+    assert fast_wiki._store is not None
+    assert soup_wiki._store is None
+    assert [t.to_dict() for t in fast_wiki.items()] == [
+        t.to_dict() for t in soup_wiki.items()
+    ]
+
+
+def test_div_parse_unusual_markup_falls_back(div_file_name, tmp_path):
+    fixture_name = tmp_path / "wiki.html"
+    content = div_file_name.read_text()
+    content = content.replace(
+        '<div title="$:/isEncrypted">\n<pre>no</pre>',
+        '<div title="$:/isEncrypted">\n<pre>no</pre><br>',
+    )
+    fixture_name.write_text(content)
+
+    wiki = parse(fixture_name)
+    assert wiki._store is None
+    assert wiki["$:/isEncrypted"].text == "no"
+
+
 def test_parse_json_format(json_wiki):
     assert json_wiki.fileformat == FileFormat.JSON
 
@@ -153,6 +201,32 @@ def test_parse_json_length(json_wiki):
     assert len(json_wiki) == 7
 
 
+def test_json_fast_parse_matches_soup(json_file_name):
+    fast_wiki = parse(json_file_name)
+    soup_wiki = parse(json_file_name, fast=False)
+
+    assert fast_wiki._store is not None
+    assert soup_wiki._store is None
+    assert [t.to_dict() for t in fast_wiki.items()] == [
+        t.to_dict() for t in soup_wiki.items()
+    ]
+
+
+def test_json_parse_unusual_markup_falls_back(json_file_name, tmp_path):
+    """A second store area can't be handled by the fast path."""
+    fixture_name = tmp_path / "wiki.html"
+    content = json_file_name.read_text()
+    content = content.replace(
+        "<!--~~ Ordinary tiddlers ~~-->",
+        '<!-- <script class="tiddlywiki-tiddler-store"></script> -->',
+    )
+    fixture_name.write_text(content)
+
+    wiki = parse(fixture_name)
+    assert wiki._store is None
+    assert len(wiki) == 7
+
+
 def test_json_tiddler_by_title(json_wiki):
     tiddler = json_wiki["$:/isEncrypted"]
     assert tiddler.title == "$:/isEncrypted"
@@ -304,3 +378,256 @@ def test_json_write_dont_overwrite_modification(json_file_name, tmp_path, mock_t
     tiddler2 = wiki2["my_new_tiddler"]
     assert tiddler2.modified == "20210724100928000"
     assert tiddler2.created == "20210722011012000"
+
+
+def test_json_add_existing_title_replaces_tiddler(json_wiki):
+    tiddler = json_wiki.new_tiddler("$:/isEncrypted")
+    tiddler.text = "yes"
+    json_wiki.add(tiddler)
+
+    assert len(json_wiki) == 7
+    assert json_wiki["$:/isEncrypted"].text == "yes"
+
+
+def test_json_rename_reindexes_tiddler(json_wiki):
+    tiddler = json_wiki["$:/isEncrypted"]
+    tiddler.title = "$:/renamed"
+    json_wiki.add(tiddler)
+
+    assert len(json_wiki) == 7
+    assert json_wiki.get("$:/isEncrypted") is None
+    assert json_wiki["$:/renamed"] is tiddler
+    titles = [t.title for t in json_wiki.items()]
+    assert titles == sorted(titles, key=str.lower)
+
+
+def test_json_remove(json_wiki):
+    json_wiki.remove(json_wiki["$:/isEncrypted"])
+
+    assert len(json_wiki) == 6
+    assert json_wiki.get("$:/isEncrypted") is None
+    assert json_wiki.deletions == ["$:/isEncrypted"]
+
+
+def test_div_add_existing_title_is_modification(div_wiki):
+    tiddler = div_wiki.new_tiddler("$:/isEncrypted")
+    tiddler.text = "yes"
+    div_wiki.add(tiddler)
+
+    assert len(div_wiki) == 4
+    assert list(div_wiki._modified_tiddlers) == ["$:/isEncrypted"]
+    assert not div_wiki._new_tiddlers
+
+
+def test_json_write_keeps_unmodified_tiddlers(json_file_name, tmp_path):
+    fixture_name = tmp_path / "wiki.html"
+    shutil.copy(json_file_name, fixture_name)
+
+    wiki = parse(fixture_name)
+    tiddler = wiki["$:/StoryList"]
+    tiddler.list = "TestTiddler"
+    wiki.add(tiddler, track_modified=False)
+    wiki.save()
+
+    orig_lines = json_file_name.read_text().splitlines()
+    new_lines = fixture_name.read_text().splitlines()
+    changed = [(a, b) for a, b in zip(orig_lines, new_lines) if a != b]
+    assert len(orig_lines) == len(new_lines)
+    assert changed == [
+        (
+            '{"title":"$:/StoryList","text":"","list":"GettingStarted"},',
+            '{"title":"$:/StoryList","text":"","list":"TestTiddler"},',
+        )
+    ]
+
+
+def test_json_write_renamed_twice(json_file_name, tmp_path):
+    fixture_name = tmp_path / "wiki.html"
+    shutil.copy(json_file_name, fixture_name)
+
+    wiki = parse(fixture_name)
+    tiddler = wiki["$:/StoryList"]
+    tiddler.title = "renamed"
+    wiki.add(tiddler)
+    wiki.save()
+    tiddler.title = "renamed again"
+    wiki.add(tiddler)
+    wiki.save()
+
+    wiki2 = parse(fixture_name)
+    assert len(wiki2) == 7
+    assert wiki2.get("renamed") is None
+    assert wiki2["renamed again"].list == "GettingStarted"
+
+
+def test_json_parse_other_store_layout(json_file_name, tmp_path):
+    fixture_name = tmp_path / "wiki.html"
+    content = json_file_name.read_text().replace("},\n{", "}, {")
+    fixture_name.write_text(content)
+
+    wiki = parse(fixture_name)
+    assert len(wiki) == 7
+    assert wiki["$:/isEncrypted"].text == "no"
+
+
+@mark.parametrize("lazy", [False, True])
+def test_json_parse_tiddlers_on_one_line(json_file_name, tmp_path, lazy):
+    fixture_name = tmp_path / "wiki.html"
+    # Two tiddlers on one line, with braces within a string on another one
+    content = json_file_name.read_text().replace("},\n{", "},{", 1)
+    content = content.replace('"text":"no"', '"text":"}, {no"')
+    fixture_name.write_text(content)
+
+    wiki = parse(fixture_name, lazy=lazy)
+    assert len(wiki) == 7
+    assert [t.to_dict() for t in wiki.items()] == [
+        t.to_dict() for t in parse(fixture_name).items()
+    ]
+    assert wiki["$:/isEncrypted"].text == "}, {no"
+
+
+def test_json_lazy_parse(json_file_name):
+    wiki = parse(json_file_name, lazy=True)
+    eager_wiki = parse(json_file_name)
+
+    tiddler = wiki["$:/isEncrypted"]
+    assert tiddler._stored is None
+    assert tiddler.text == "no"
+    assert tiddler._stored is not None
+    assert wiki["$:/core"]._stored is None
+    assert [t.to_dict() for t in wiki.items()] == [
+        t.to_dict() for t in eager_wiki.items()
+    ]
+
+
+def test_json_lazy_write(json_file_name, tmp_path):
+    fixture_name = tmp_path / "wiki.html"
+    shutil.copy(json_file_name, fixture_name)
+
+    wiki = parse(fixture_name, lazy=True)
+    tiddler = wiki.get_or_create("my_new_tiddler")
+    tiddler.text = "This is a test for a new tiddler."
+    wiki.add(tiddler)
+    wiki.save()
+
+    assert wiki["$:/core"]._stored is None
+    wiki2 = parse(fixture_name, lazy=True)
+    assert len(wiki2) == 8
+    assert wiki2["my_new_tiddler"].text == "This is a test for a new tiddler."
+
+
+@mark.parametrize("lazy", [False, True])
+def test_mmap_parse(json_file_name, div_file_name, lazy):
+    for file_name in [json_file_name, div_file_name]:
+        wiki = parse(file_name, mmap=True, lazy=lazy)
+        read_wiki = parse(file_name, lazy=lazy)
+
+        assert wiki._store is not None
+        assert isinstance(wiki._store.content, memoryview)
+        assert [t.to_dict() for t in wiki.items()] == [
+            t.to_dict() for t in read_wiki.items()
+        ]
+
+
+def test_mmap_write(json_file_name, div_file_name, tmp_path):
+    for file_name in [json_file_name, div_file_name]:
+        fixture_name = tmp_path / file_name.name
+        shutil.copy(file_name, fixture_name)
+
+        wiki = parse(fixture_name, mmap=True, lazy=True)
+        wiki.save()
+        assert fixture_name.read_bytes() == file_name.read_bytes()
+
+        tiddler = wiki.get_or_create("my_new_tiddler")
+        tiddler.text = "This is a test for a new tiddler."
+        wiki.add(tiddler)
+        wiki.save()
+        wiki.remove(wiki["my_new_tiddler"])
+        wiki.save()
+
+        wiki2 = parse(fixture_name, mmap=True)
+        assert wiki2.get("my_new_tiddler") is None
+        assert wiki2["$:/isEncrypted"].text == "no"
+
+
+def test_add_many(json_file_name, div_file_name, tmp_path):
+    for file_name in [json_file_name, div_file_name]:
+        fixture_name = tmp_path / file_name.name
+        shutil.copy(file_name, fixture_name)
+        wiki = parse(fixture_name)
+        tiddlers = []
+        for title in ["b", "A", "c"]:
+            tiddler = wiki.get_or_create(title)
+            tiddler.tags = "Imported"
+            tiddlers.append(tiddler)
+        stored = wiki["$:/isEncrypted"]
+        stored.text = "yes"
+        tiddlers.append(stored)
+
+        wiki.add_many(tiddlers)
+        wiki.remove_many([wiki["c"]])
+        wiki.save()
+
+        assert wiki.changes == []
+        assert [t.title for t in wiki.tagged("Imported")] == ["A", "b"]
+        wiki2 = parse(fixture_name)
+        assert [t.title for t in wiki2.items()][-2:] == ["A", "b"]
+        assert wiki2.get("c") is None
+        assert wiki2["$:/isEncrypted"].text == "yes"
+
+
+def test_batch(json_wiki):
+    tiddler = json_wiki["$:/StoryList"]
+    with json_wiki.batch():
+        tiddler.title = "renamed"
+        json_wiki.add(tiddler)
+        assert json_wiki.get("$:/StoryList") is None
+        # Queries within the batch see the changes so far
+        assert json_wiki.titles_with_prefix("ren") == ["renamed"]
+
+        with json_wiki.batch():
+            new = json_wiki.get_or_create("new")
+            new.list = "GettingStarted"
+            json_wiki.add(new)
+        json_wiki.remove(json_wiki["$:/isEncrypted"])
+
+    assert json_wiki._pending is None
+    assert json_wiki.changes == ["renamed", "new"]
+    assert json_wiki.deletions == ["$:/isEncrypted"]
+    assert [t.title for t in json_wiki.search(list="GettingStarted")] == [
+        "new",
+        "renamed",
+    ]
+    assert "$:/isEncrypted" not in list(json_wiki._titles)
+
+
+def test_parse_many(json_file_name, div_file_name, tmp_path):
+    not_a_wiki = tmp_path / "not-a-wiki.html"
+    not_a_wiki.write_text("<html><body><p>Nothing here</p></body></html>")
+    missing = tmp_path / "missing.html"
+
+    results = {
+        result.file: result
+        for result in parse_many(
+            [json_file_name, div_file_name, not_a_wiki, missing], workers=2
+        )
+    }
+
+    assert results[json_file_name].wiki.fileformat == FileFormat.JSON
+    assert results[json_file_name].wiki["$:/isEncrypted"].text == "no"
+    assert [t.to_dict() for t in results[div_file_name].wiki.items()] == [
+        t.to_dict() for t in parse(div_file_name).items()
+    ]
+    assert isinstance(results[not_a_wiki].error, UnknownTiddlywikiFormatError)
+    assert results[not_a_wiki].wiki is None
+    assert isinstance(results[missing].error, FileNotFoundError)
+
+
+def test_parse_many_write(json_file_name, tmp_path):
+    fixture_name = tmp_path / "wiki.html"
+    shutil.copy(json_file_name, fixture_name)
+
+    [result] = parse_many([fixture_name], workers=1, lazy=True)
+    result.wiki.save()
+
+    assert fixture_name.read_bytes() == json_file_name.read_bytes()
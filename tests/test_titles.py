@@ -0,0 +1,62 @@
+import random
+
+from tiddlyparse import titles
+from tiddlyparse.index import title_sort_key
+from tiddlyparse.titles import SortedTitles
+
+
+def test_sorted_titles_stay_sorted(monkeypatch):
+    monkeypatch.setattr(titles, "CHUNK_SIZE", 4)
+    names = [f"Tiddler {i}" for i in range(50)] + [f"tiddler {i}" for i in range(10)]
+    random.Random(1).shuffle(names)
+    sorted_titles = SortedTitles(names[:20])
+
+    for name in names[20:]:
+        sorted_titles.add(name)
+    for name in names[:30]:
+        sorted_titles.remove(name)
+
+    expected = sorted(names[30:], key=title_sort_key)
+    assert list(sorted_titles) == expected
+    assert list(reversed(sorted_titles)) == expected[::-1]
+    assert len(sorted_titles) == 30
+    assert names[40] in sorted_titles
+    assert names[0] not in sorted_titles
+    assert max(len(chunk) for chunk in sorted_titles._chunks) < 8
+
+
+def test_sorted_titles_prefix_and_range():
+    sorted_titles = SortedTitles(
+        ["$:/config/a", "$:/Config/b", "$:/config/c", "$:/core", "2026-09-30"]
+        + ["2026-10-01", "2026-10-31", "2026-11-01"]
+    )
+
+    assert list(sorted_titles.with_prefix("$:/config/")) == [
+        "$:/config/a",
+        "$:/config/c",
+    ]
+    assert list(sorted_titles.with_prefix("x")) == []
+    assert list(sorted_titles.irange("2026-10-", "2026-11-")) == [
+        "2026-10-01",
+        "2026-10-31",
+    ]
+    assert list(sorted_titles.irange(stop="$:/config/b")) == [
+        "$:/config/a",
+        "$:/Config/b",
+    ]
+    assert list(sorted_titles.irange("2026-10-31")) == ["2026-10-31", "2026-11-01"]
+
+
+def test_wiki_titles_with_prefix(json_wiki):
+    wiki = json_wiki
+    wiki.add(wiki.get_or_create("$:/themes/custom"))
+
+    assert wiki.titles_with_prefix("$:/themes/") == [
+        "$:/themes/custom",
+        "$:/themes/tiddlywiki/snowwhite",
+        "$:/themes/tiddlywiki/vanilla",
+    ]
+    assert list(wiki.titles_between("$:/t", "$:/themes/tiddlywiki/t")) == [
+        "$:/themes/custom",
+        "$:/themes/tiddlywiki/snowwhite",
+    ]
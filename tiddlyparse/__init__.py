@@ -1,6 +1,6 @@
-from tiddlyparse.parser import parse
+from tiddlyparse.parser import ParseResult, aparse, iter_tiddlers, parse, parse_many
 
 __version__ = "0.1.0"
 
 
-__all__ = ["parse"]
+__all__ = ["ParseResult", "aparse", "iter_tiddlers", "parse", "parse_many"]
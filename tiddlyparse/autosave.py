@@ -0,0 +1,158 @@
+"""Save a wiki in the background once it stops changing.
+
+With autosave, `add` and `remove` only mark the wiki as changed. A background
+thread saves it once no change was made for `quiet_period` seconds, or at the
+latest `max_delay` seconds after the first unsaved change. A burst of changes
+is then written to the file with a single save.
+"""
+
+import atexit
+import threading
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from tiddlyparse.parser import TiddlyParser
+
+# Defaults of `TiddlyParser.autosave`, in seconds
+QUIET_PERIOD = 1.0
+MAX_DELAY = 10.0
+
+
+class AutoSave:
+    """The background saving of a wiki, started with `TiddlyParser.autosave`.
+
+    The wiki is saved while holding `lock`, which `add`, `remove` and `batch`
+    also take. Changes made in other ways, like setting the fields of a tiddler
+    before adding it, should hold the lock as well if a save may run at the
+    same time. Call `flush` instead of `save` to save right away.
+
+    Errors of background saves are passed to `on_error`. Without it, the error
+    is raised by the next `flush` or `close`, unless a later save succeeded.
+    The wiki stays unsaved then, and the save is tried again after `max_delay`.
+
+    Pending changes are saved when the autosave is closed, at the latest when
+    the interpreter exits.
+    """
+
+    def __init__(
+        self,
+        wiki: "TiddlyParser",
+        *,
+        quiet_period: float = QUIET_PERIOD,
+        max_delay: float = MAX_DELAY,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        if quiet_period < 0 or max_delay < quiet_period:
+            raise ValueError("Need 0 <= quiet_period <= max_delay.")
+        self.wiki = wiki
+        self.quiet_period = quiet_period
+        self.max_delay = max_delay
+        self.on_error = on_error
+        self.lock = threading.RLock()
+        # Guards the scheduling state, which changes also during a save
+        self._condition = threading.Condition(threading.Lock())
+        # Monotonic times of the first and last unsaved change, or None if the
+        # wiki is saved
+        self._first_change: Optional[float] = None
+        self._last_change = 0.0
+        self._closed = False
+        self._error: Optional[Exception] = None
+        self._thread = threading.Thread(
+            target=self._run, name="tiddlyparse-autosave", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def pending(self) -> bool:
+        """Whether there are changes that haven't been saved yet."""
+        return self._first_change is not None
+
+    def touch(self) -> None:
+        """Mark the wiki as changed, which schedules a save."""
+        with self._condition:
+            now = time.monotonic()
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+            self._condition.notify()
+
+    def flush(self) -> None:
+        """Save pending changes now, in the calling thread."""
+        with self.lock:
+            if self.pending:
+                self._save()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Stop the background thread and save pending changes."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        atexit.unregister(self.close)
+        if self.wiki._autosave is self:
+            self.wiki._autosave = None
+        self.flush()
+
+    def __enter__(self) -> "AutoSave":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed:
+                    deadline = self._deadline()
+                    now = time.monotonic()
+                    if deadline is not None and deadline <= now:
+                        break
+                    self._condition.wait(None if deadline is None else deadline - now)
+                if self._closed:
+                    return
+            try:
+                with self.lock:
+                    # Unless `flush` saved the wiki in the meantime
+                    if self.pending:
+                        self._save()
+            except Exception as e:
+                if self.on_error is None:
+                    self._error = e
+                else:
+                    self.on_error(e)
+                with self._condition:
+                    # Retry later rather than right away
+                    if not self._closed:
+                        self._condition.wait(self.max_delay)
+
+    def _deadline(self) -> Optional[float]:
+        if self._first_change is None:
+            return None
+        return min(
+            self._last_change + self.quiet_period,
+            self._first_change + self.max_delay,
+        )
+
+    def _save(self) -> None:
+        # Changes wait for the lock, so none can be made during the save
+        # An error of an earlier save is superseded by the result of this one
+        self._error = None
+        try:
+            self.wiki.save()
+        except BaseException:
+            with self._condition:
+                self._first_change = self._last_change = time.monotonic()
+            raise
+        with self._condition:
+            self._first_change = None
+
+    def _raise_error(self) -> None:
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
@@ -0,0 +1,149 @@
+"""Cache of parsed wikis in an SQLite database.
+
+For each wiki file, the cache keeps the location of the store area and the
+records of its tiddlers. Parsing an unchanged file then only needs to read its
+store area again, without decoding any tiddlers.
+
+A file is considered unchanged if its size and modification time are the same
+as when it was cached. Like git, the cache doesn't trust the modification time
+of files that were modified shortly before they were cached, as they may have
+been modified again within the resolution of the timestamp. Those files are
+compared by the digest of their content.
+"""
+
+import marshal
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+from tiddlyparse.fileio import data_digest, file_digest
+from tiddlyparse.store import Buffer, StoreRecord, dump_records, load_records
+
+# Changed whenever the cached data changes
+CACHE_VERSION = 1
+# Modification times this close to the time the file was cached aren't trusted
+RACY_NS = 2_000_000_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS wikis (
+    path TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    checked_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    format TEXT NOT NULL,
+    store_start INTEGER NOT NULL,
+    store_end INTEGER NOT NULL,
+    records BLOB NOT NULL
+)
+"""
+# Records are serialized with marshal, so include its format in the version
+_VERSION = f"{CACHE_VERSION}.{marshal.version}"
+
+
+class CacheEntry(NamedTuple):
+    """The cached results of parsing a wiki file.
+
+    `fileformat` is the name of the `FileFormat` of the wiki.
+    """
+
+    fileformat: str
+    store_start: int
+    store_end: int
+    records: list[StoreRecord]
+
+
+class ParseCache:
+    """An SQLite database with the parse results of any number of wikis.
+
+    The database can be shared between processes, and the cache between
+    threads, e.g. to parse in an executor with `aparse`.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        # The connection is shared, so only one thread may use it at a time
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "ParseCache":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def get(self, file: Union[str, Path], stat: os.stat_result) -> Optional[CacheEntry]:
+        """Return the entry of the file if it's still current.
+
+        `stat` is the current status of the file, e.g. from `os.fstat`.
+        """
+        path = _cache_key(file)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, checked_ns, digest, format, store_start,"
+                " store_end, records FROM wikis WHERE path = ? AND version = ?",
+                (path, _VERSION),
+            ).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, checked_ns, digest, fileformat, start, end, records = row
+        if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+            return None
+        if mtime_ns >= checked_ns - RACY_NS:
+            if file_digest(file) != digest:
+                return None
+            # The file is known to be unchanged now, so it's no longer racy
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "UPDATE wikis SET checked_ns = ? WHERE path = ?",
+                    (time.time_ns(), path),
+                )
+        return CacheEntry(fileformat, start, end, load_records(records))
+
+    def put(
+        self,
+        file: Union[str, Path],
+        stat: os.stat_result,
+        data: Buffer,
+        entry: CacheEntry,
+    ) -> None:
+        """Cache the entry for the file.
+
+        `data` is the content of the file when it was parsed and `stat` its
+        status from just before it was read.
+        """
+        records = dump_records(entry.records)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO wikis VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    _cache_key(file),
+                    _VERSION,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    time.time_ns(),
+                    data_digest(data),
+                    entry.fileformat,
+                    entry.store_start,
+                    entry.store_end,
+                    records,
+                ),
+            )
+
+    def discard(self, file: Union[str, Path]) -> None:
+        """Remove the entry of the file, if there is one."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM wikis WHERE path = ?", (_cache_key(file),))
+
+
+def _cache_key(file: Union[str, Path]) -> str:
+    return os.path.realpath(file)
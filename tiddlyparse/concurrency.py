@@ -0,0 +1,260 @@
+"""Share a wiki between threads, e.g. the request threads of a web server.
+
+`ConcurrentWiki` lets any number of threads read the wiki at the same time,
+including searches, while changes are made by one thread at a time with all
+readers excluded. The indexes of searches are built by the first query that
+needs them, which other queries needing the same index wait for.
+
+Changes replace tiddlers instead of modifying them in place, so `snapshot`
+only needs to copy the titles and the references to the current tiddlers,
+not their fields. The copy is reused until the wiki changes. A long export
+can then work on the snapshot while the wiki keeps changing.
+
+Saving only excludes other writers. The tiddlers that a save takes as stored
+are the ones changed since the last save, which readers see with the same
+fields before and after.
+"""
+
+import threading
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Literal, Optional, Sequence, Union
+
+from tiddlyparse.export import ExportFormat, export_tiddlers
+from tiddlyparse.parser import Tiddler, TiddlyParser
+
+
+class RWLock:
+    """A lock that is shared by readers and exclusive for a writer.
+
+    Writers take precedence: once a writer waits, new readers wait for it, so
+    a steady stream of readers can't starve it. The lock isn't reentrant, a
+    thread must not take it again while holding it.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._condition:
+            while self._writer or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+
+class WikiSnapshot:
+    """The tiddlers of a wiki at one point in time, in store order.
+
+    The tiddlers are shared with the wiki. They keep their fields as long as
+    the wiki is only changed through `ConcurrentWiki`.
+    """
+
+    def __init__(self, titles: Sequence[str], tiddlers: Mapping[str, Tiddler]):
+        self._titles = titles
+        self._tiddlers = tiddlers
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def __contains__(self, title: object) -> bool:
+        return title in self._tiddlers
+
+    def get(self, title: str) -> Optional[Tiddler]:
+        return self._tiddlers.get(title)
+
+    def titles(self) -> Sequence[str]:
+        return self._titles
+
+    def items(self) -> Iterator[Tiddler]:
+        for title in self._titles:
+            yield self._tiddlers[title]
+
+    def export(
+        self, format: ExportFormat, dest: Path, *, workers: Optional[int] = None
+    ) -> None:
+        """Export the tiddlers like `TiddlyParser.export`."""
+        tiddlers = (tiddler.to_dict() for tiddler in self.items())
+        export_tiddlers(tiddlers, format, dest, workers=workers)
+
+
+class ConcurrentWiki:
+    """A wiki that can be used from many threads at the same time.
+
+    Reads like `get`, `items` and `search` run in parallel. `put`, `update`
+    and `delete` each wait for the current readers and then change the wiki
+    exclusively. Other changes, e.g. `import_tiddlers` or a `batch`, are made
+    on the wiki yielded by `write`. They should replace tiddlers, using
+    `new_tiddler` and `add`, rather than set fields on the ones in the wiki:
+    readers would otherwise see the fields change, and so would snapshots.
+
+    The wiki must only be used through this wrapper, and saved with its
+    `save`. Autosave isn't supported, as it saves the wiki without taking the
+    locks.
+    """
+
+    def __init__(self, wiki: TiddlyParser):
+        self.wiki = wiki
+        self._lock = RWLock()
+        # Serializes writers and saves
+        self._write_mutex = threading.Lock()
+        # The snapshot of the current tiddlers, until the wiki is changed
+        self._snapshot: Optional[WikiSnapshot] = None
+
+    @contextmanager
+    def read(self) -> Iterator[TiddlyParser]:
+        """Give shared access to the wiki, which mustn't be changed."""
+        with self._lock.read():
+            yield self.wiki
+
+    @contextmanager
+    def write(self) -> Iterator[TiddlyParser]:
+        """Give exclusive access to the wiki, to change it."""
+        with self._write_mutex, self._lock.write():
+            self._snapshot = None
+            yield self.wiki
+
+    def __len__(self) -> int:
+        with self._lock.read():
+            return len(self.wiki)
+
+    def get(self, title: str) -> Optional[Tiddler]:
+        with self._lock.read():
+            return self.wiki.get(title)
+
+    def items(self) -> Sequence[Tiddler]:
+        """Return the tiddlers in store order."""
+        with self._lock.read():
+            return list(self.wiki.items())
+
+    def titles_with_prefix(self, prefix: str) -> Sequence[str]:
+        with self._lock.read():
+            return self.wiki.titles_with_prefix(prefix)
+
+    def search(self, **query: Union[str, Literal[True]]) -> Sequence[Tiddler]:
+        with self._lock.read():
+            return self.wiki.search(**query)
+
+    def filter(self, expression: str) -> Sequence[str]:
+        with self._lock.read():
+            return self.wiki.filter(expression)
+
+    def tagged(self, tag: str) -> Sequence[Tiddler]:
+        with self._lock.read():
+            return self.wiki.tagged(tag)
+
+    def tags_of(self, title: str) -> Sequence[str]:
+        with self._lock.read():
+            return self.wiki.tags_of(title)
+
+    def fulltext(
+        self, query: str, *, prefix: bool = False, limit: Optional[int] = None
+    ) -> Sequence[Tiddler]:
+        with self._lock.read():
+            return self.wiki.fulltext(query, prefix=prefix, limit=limit)
+
+    def put(self, fields: Mapping[str, str], *, track_modified: bool = True) -> Tiddler:
+        """Add a new tiddler with the fields, replacing one with its title."""
+        title = fields.get("title")
+        if not title:
+            raise ValueError("Need a title for the tiddler.")
+        tiddler = self.wiki.new_tiddler(title)
+        for key, value in fields.items():
+            setattr(tiddler, key, value)
+        with self.write() as wiki:
+            wiki.add(tiddler, track_modified=track_modified)
+        return tiddler
+
+    def update(self, title: str, **fields: str) -> Tiddler:
+        """Replace the tiddler with a copy that has the fields changed.
+
+        The tiddler is created if it doesn't exist yet.
+        """
+        with self.write() as wiki:
+            existing = wiki.get(title)
+            values = dict(existing.to_dict()) if existing is not None else {}
+            values.update(fields)
+            tiddler = wiki.new_tiddler(title)
+            for key, value in values.items():
+                setattr(tiddler, key, value)
+            wiki.add(tiddler)
+        return tiddler
+
+    def delete(self, title: str) -> bool:
+        """Remove the tiddler, and return whether it existed."""
+        with self.write() as wiki:
+            tiddler = wiki.get(title)
+            if tiddler is None:
+                return False
+            wiki.remove(tiddler)
+            return True
+
+    def snapshot(self) -> WikiSnapshot:
+        """Return the current tiddlers, unaffected by later changes.
+
+        Only the titles and references to the tiddlers are copied, which is
+        done once after each change.
+        """
+        with self._lock.read():
+            snapshot = self._snapshot
+            if snapshot is None:
+                snapshot = self._snapshot = WikiSnapshot(
+                    tuple(self.wiki._titles), dict(self.wiki._tiddlers)
+                )
+            return snapshot
+
+    def export(
+        self, format: ExportFormat, dest: Path, *, workers: Optional[int] = None
+    ) -> None:
+        """Export a snapshot, see `TiddlyParser.export`."""
+        self.snapshot().export(format, dest, workers=workers)
+
+    def save(self) -> None:
+        """Save the wiki, while readers continue.
+
+        Wikis parsed with BeautifulSoup (`fast=False`) are saved exclusively,
+        as the save changes the document tree that tiddlers may still load
+        their fields from.
+        """
+        with self._write_mutex:
+            if self.wiki._store is None:
+                with self._lock.write():
+                    self.wiki.save()
+                return
+            with self._lock.write():
+                # Load the stored fields of changed tiddlers that haven't been
+                # accessed yet, which a reader could otherwise do while the
+                # save replaces them
+                for title in self.wiki.changes:
+                    tiddler = self.wiki.get(title)
+                    if tiddler is not None:
+                        tiddler.stored_values
+            self.wiki.save()
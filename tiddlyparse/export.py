@@ -0,0 +1,258 @@
+"""Export tiddlers to the file formats of TiddlyWiki on Node.js.
+
+The tiddlers are passed as mappings of their fields, like the ones returned by
+`Tiddler.to_dict` or `iter_tiddlers`, and written in that order as they are
+consumed. The formats are:
+
+- `tid`: a directory with one file per tiddler, as written by TiddlyWiki's
+  filesystem plugin. Tiddlers that can't be represented as a `.tid` file are
+  written as `.json` files, binary tiddlers like images as their decoded
+  content with a `.meta` file.
+- `jsonl`: a single file with the JSON of one tiddler per line.
+- `folder`: a wiki folder that can be served with `tiddlywiki --listen`. The
+  tiddlers are written like for `tid` into its `tiddlers` directory. The core
+  and the official plugins are referenced in `tiddlywiki.info` instead.
+"""
+
+import base64
+import json
+import os
+import re
+from collections import deque
+from collections.abc import Iterable, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Literal, Optional, Union
+
+from tiddlyparse.fileio import atomic_write
+
+ExportFormat = Literal["tid", "jsonl", "folder"]
+# The fields of a tiddler
+Fields = Mapping[str, str]
+
+# Buffer size of the JSON Lines file
+WRITE_BUFSIZE = 1024 * 1024
+# Number of tiddlers written by each task of the thread pool
+BATCH_SIZE = 64
+# Number of tasks that may be waiting to be written
+MAX_PENDING = 16
+# Default number of threads writing files. More only contend for the GIL.
+MAX_WORKERS = 8
+
+# Plugins that the server provides and a wiki folder references by name, by the
+# title prefix of their tiddler and the key in `tiddlywiki.info`
+_OFFICIAL_PLUGINS = [
+    ("$:/plugins/tiddlywiki/", "plugins", "tiddlywiki/"),
+    ("$:/themes/tiddlywiki/", "themes", "tiddlywiki/"),
+    ("$:/languages/", "languages", ""),
+]
+# Plugins needed to serve and edit a wiki folder
+_SERVER_PLUGINS = ["tiddlywiki/tiddlyweb", "tiddlywiki/filesystem"]
+
+# Types of the tiddlers whose text is the base64 encoded content of a file,
+# with the extension TiddlyWiki gives those files
+_BINARY_TYPES = {
+    "application/pdf": ".pdf",
+    "application/zip": ".zip",
+    "audio/mpeg": ".mp3",
+    "audio/ogg": ".ogg",
+    "font/woff": ".woff",
+    "font/woff2": ".woff2",
+    "image/gif": ".gif",
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/x-icon": ".ico",
+    "video/mp4": ".mp4",
+}
+# Same as the characters replaced by TiddlyWiki's filesystem plugin
+_UNSAFE_FILENAME = re.compile(r'[<>~:"|?*^/\\\x00-\x1f]')
+_MAX_FILENAME = 200
+# Field names and values that don't survive a `.tid` header line
+_UNSAFE_FIELD_NAME = re.compile(r"^$|[:\s]")
+_UNSAFE_FIELD_VALUE = re.compile(r"^\s|\s$|[\r\n]")
+
+
+def export_tiddlers(
+    tiddlers: Iterable[Fields],
+    format: ExportFormat,
+    dest: Union[str, Path],
+    *,
+    workers: Optional[int] = None,
+) -> None:
+    """Write the tiddlers to `dest` in the format.
+
+    `dest` is the file for `jsonl` and a directory for the others, which must
+    not exist yet or be empty. Files are written by a pool of `workers`
+    threads, which defaults to the number of CPUs but at most `MAX_WORKERS`.
+    """
+    dest = Path(dest)
+    if format == "jsonl":
+        export_jsonl(tiddlers, dest)
+    elif format == "tid":
+        _create_empty_dir(dest)
+        export_tid(tiddlers, dest, workers=workers)
+    elif format == "folder":
+        export_folder(tiddlers, dest, workers=workers)
+    else:
+        raise ValueError(f"Unknown export format {format!r}.")
+
+
+def export_jsonl(tiddlers: Iterable[Fields], dest: Path) -> None:
+    """Write the tiddlers to the file `dest` in JSON Lines."""
+    with atomic_write(dest) as tmpf:
+        with open(tmpf, "w", encoding="utf-8", buffering=WRITE_BUFSIZE) as fp:
+            for fields in tiddlers:
+                fp.write(
+                    json.dumps(dict(fields), separators=(",", ":"), ensure_ascii=False)
+                )
+                fp.write("\n")
+
+
+def export_tid(
+    tiddlers: Iterable[Fields], dest: Path, *, workers: Optional[int] = None
+) -> None:
+    """Write each tiddler to a file in the directory `dest`."""
+    filenames = _Filenames()
+    if workers is None:
+        workers = min(MAX_WORKERS, os.cpu_count() or 1)
+    with ThreadPoolExecutor(workers) as executor:
+        # Only keep a bounded number of tiddlers waiting to be written
+        pending: deque[Future[None]] = deque()
+        batch: list[tuple[str, bytes]] = []
+        for count, fields in enumerate(tiddlers, 1):
+            batch.extend(_tiddler_files(fields, filenames))
+            if count % BATCH_SIZE == 0:
+                pending.append(executor.submit(_write_files, dest, batch))
+                batch = []
+                if len(pending) >= MAX_PENDING:
+                    pending.popleft().result()
+        pending.append(executor.submit(_write_files, dest, batch))
+        while pending:
+            pending.popleft().result()
+
+
+def export_folder(
+    tiddlers: Iterable[Fields], dest: Path, *, workers: Optional[int] = None
+) -> None:
+    """Write the tiddlers as a wiki folder in the directory `dest`."""
+    _create_empty_dir(dest)
+    info: dict[str, list[str]] = {
+        "plugins": list(_SERVER_PLUGINS),
+        "themes": [],
+        "languages": [],
+    }
+
+    def wiki_tiddlers() -> Iterable[Fields]:
+        for fields in tiddlers:
+            if fields.get("title") == "$:/core":
+                # Always loaded by the server
+                continue
+            reference = _plugin_reference(fields)
+            if reference is None:
+                yield fields
+            else:
+                key, name = reference
+                if name not in info[key]:
+                    info[key].append(name)
+
+    tiddlers_dir = dest / "tiddlers"
+    tiddlers_dir.mkdir()
+    export_tid(wiki_tiddlers(), tiddlers_dir, workers=workers)
+    with open(dest / "tiddlywiki.info", "w", encoding="utf-8") as fp:
+        json.dump(info, fp, indent=4)
+        fp.write("\n")
+
+
+def render_tid(fields: Fields) -> Optional[str]:
+    """Return the content of the `.tid` file of the tiddler.
+
+    Returns None if a field can't be written in the header of the file.
+    """
+    lines = []
+    for key, value in fields.items():
+        if key == "text":
+            continue
+        if _UNSAFE_FIELD_NAME.search(key) or _UNSAFE_FIELD_VALUE.search(value):
+            return None
+        lines.append(f"{key}: {value}\n")
+    lines.append("\n")
+    lines.append(fields.get("text", ""))
+    return "".join(lines)
+
+
+def _tiddler_files(fields: Fields, filenames: "_Filenames") -> list[tuple[str, bytes]]:
+    """Return the names and contents of the files of the tiddler."""
+    title = fields.get("title", "")
+    extension = _BINARY_TYPES.get(fields.get("type", ""))
+    if extension is not None:
+        meta = {key: value for key, value in fields.items() if key != "text"}
+        meta_content = render_tid(meta)
+        try:
+            content = base64.b64decode(fields.get("text", ""), validate=True)
+        except ValueError:
+            meta_content = None
+        if meta_content is not None:
+            name = filenames.claim(title, extension)
+            # The `.meta` file has no text, so drop the separating blank line
+            meta_bytes = meta_content.rstrip("\n").encode("utf-8") + b"\n"
+            return [(name, content), (name + ".meta", meta_bytes)]
+
+    tid = render_tid(fields)
+    if tid is not None:
+        return [(filenames.claim(title, ".tid"), tid.encode("utf-8"))]
+    # Like TiddlyWiki, write tiddlers with multi-line fields as JSON
+    json_tiddler = json.dumps([dict(fields)], ensure_ascii=False, indent=1)
+    return [(filenames.claim(title, ".json"), json_tiddler.encode("utf-8"))]
+
+
+def _write_files(dest: Path, files: list[tuple[str, bytes]]) -> None:
+    for name, content in files:
+        with open(dest / name, "xb") as fp:
+            fp.write(content)
+
+
+def _plugin_reference(fields: Fields) -> Optional[tuple[str, str]]:
+    """Return the key in `tiddlywiki.info` and the name of an official plugin.
+
+    Returns None for other tiddlers, which are written to files.
+    """
+    title = fields.get("title", "")
+    if not fields.get("plugin-type"):
+        return None
+    for prefix, key, name_prefix in _OFFICIAL_PLUGINS:
+        if title.startswith(prefix):
+            return key, name_prefix + title.removeprefix(prefix)
+    return None
+
+
+class _Filenames:
+    """Unique file names for tiddler titles, like TiddlyWiki generates them.
+
+    Names are compared case-insensitively, as some file systems do.
+    """
+
+    def __init__(self) -> None:
+        self._taken: set[str] = set()
+
+    def claim(self, title: str, extension: str) -> str:
+        base = _UNSAFE_FILENAME.sub("_", title)[:_MAX_FILENAME].strip()
+        if base.lower().endswith(extension):
+            # Titles like `image.png` keep their extension
+            base = base[: -len(extension)]
+        if not base or base.startswith("."):
+            base = "_" + base
+        name = base + extension
+        count = 0
+        while name.lower() in self._taken:
+            count += 1
+            name = f"{base} {count}{extension}"
+        self._taken.add(name.lower())
+        return name
+
+
+def _create_empty_dir(path: Path) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+    with os.scandir(path) as entries:
+        if any(entries):
+            raise FileExistsError(f"The export directory {path} isn't empty.")
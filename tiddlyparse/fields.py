@@ -0,0 +1,77 @@
+"""Compact storage for the stored fields of tiddlers.
+
+Most tiddlers of a wiki have the same few fields in the same order. Instead of
+a dictionary per tiddler, the field names are kept once per distinct layout and
+each tiddler only keeps a tuple with its values.
+"""
+
+import sys
+import weakref
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any, Optional
+
+
+class FieldLayout:
+    """The field names of tiddlers, in order, with their positions.
+
+    Use `get_layout` to get the shared instance for some field names.
+    """
+
+    __slots__ = ("names", "positions", "__weakref__")
+
+    names: tuple[str, ...]
+    positions: dict[str, int]
+
+    def __init__(self, names: tuple[str, ...]):
+        self.names = names
+        self.positions = {name: idx for idx, name in enumerate(names)}
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # Keep layouts shared when they are unpickled
+        return (get_layout, (self.names,))
+
+
+_layouts: "weakref.WeakValueDictionary[tuple[str, ...], FieldLayout]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def get_layout(names: Iterable[str]) -> FieldLayout:
+    """Return the shared layout for the field names, with the names interned."""
+    key = tuple(names)
+    layout = _layouts.get(key)
+    if layout is None:
+        layout = FieldLayout(tuple(sys.intern(name) for name in key))
+        _layouts[layout.names] = layout
+    return layout
+
+
+EMPTY_LAYOUT = get_layout(())
+
+
+class FieldValues(Mapping[str, str]):
+    """Read-only mapping view of the values of a tiddler in a layout."""
+
+    __slots__ = ("_layout", "_values")
+
+    def __init__(self, layout: FieldLayout, values: tuple[str, ...]):
+        self._layout = layout
+        self._values = values
+
+    def __getitem__(self, key: str) -> str:
+        return self._values[self._layout.positions[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._layout.names)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._layout.positions
+
+    def get(  # type: ignore[override]
+        self, key: str, default: Optional[str] = None
+    ) -> Optional[str]:
+        idx = self._layout.positions.get(key)
+        return default if idx is None else self._values[idx]
@@ -0,0 +1,172 @@
+"""Helpers to rewrite wiki files efficiently and atomically."""
+
+import errno
+import hashlib
+import os
+import stat
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Union
+
+# Chunk size for copies that have to go through user space
+COPY_BUFSIZE = 1024 * 1024
+
+# Size in bytes of the digests of file contents
+DIGEST_SIZE = 16
+
+# Errors signalling that a zero-copy method isn't supported for the files
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EBADF,
+}
+
+
+@contextmanager
+def atomic_write(path: Union[str, Path], *, durable: bool = False) -> Iterator[Path]:
+    """Yield a temporary file that replaces `path` once the block completes.
+
+    The temporary file is created in the same directory, so the final rename is
+    atomic. If the block raises, the temporary file is removed and `path` is
+    left untouched. Symlinks are resolved, so they stay intact.
+
+    With `durable`, the new content and the rename are synced to disk before
+    this returns, so they survive a crash of the system.
+    """
+    target = Path(os.path.realpath(path))
+    fd, tmpname = tempfile.mkstemp(
+        dir=target.parent, prefix=f".{target.name}.", suffix=".tmp"
+    )
+    os.close(fd)
+    tmpf = Path(tmpname)
+    try:
+        try:
+            os.chmod(tmpf, stat.S_IMODE(target.stat().st_mode))
+        except FileNotFoundError:
+            pass
+        yield tmpf
+        if durable:
+            fsync_path(tmpf)
+        os.replace(tmpf, target)
+        if durable:
+            fsync_path(target.parent)
+    except BaseException:
+        tmpf.unlink(missing_ok=True)
+        raise
+
+
+def fsync_path(path: Union[str, Path]) -> None:
+    """Sync the file or directory to disk."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def file_digest(path: Union[str, Path]) -> str:
+    """Return a digest of the file content, to detect changes to the file."""
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with open(path, "rb") as fp:
+        while chunk := fp.read(COPY_BUFSIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def data_digest(data: Union[bytes, memoryview]) -> str:
+    """Return the same digest as `file_digest` for content already read."""
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
+
+
+def splice_file(
+    path: Union[str, Path],
+    start: int,
+    end: int,
+    content: bytes,
+    *,
+    durable: bool = False,
+) -> None:
+    """Replace the bytes from `start` to `end` in the file with `content`.
+
+    The unchanged prefix and suffix are copied inside the kernel where
+    possible, so they never need to be read into Python. `durable` is passed
+    on to `atomic_write`.
+    """
+    with atomic_write(path, durable=durable) as tmpf:
+        with open(path, "rb") as src, open(tmpf, "wb", buffering=0) as dst:
+            size = os.fstat(src.fileno()).st_size
+            if not 0 <= start <= end <= size:
+                raise ValueError(
+                    f"Can't splice bytes {start} to {end} of a file with {size} bytes."
+                )
+            copy_range(src.fileno(), dst.fileno(), 0, start)
+            write_all(dst.fileno(), content)
+            copy_range(src.fileno(), dst.fileno(), end, size - end)
+
+
+def copy_range(src: int, dst: int, offset: int, count: int) -> None:
+    """Copy `count` bytes at `offset` of `src` to the current position of `dst`.
+
+    Uses `copy_file_range` or `sendfile` where available and falls back to
+    buffered copies otherwise.
+    """
+    for copy_func in _ZERO_COPY_FUNCS:
+        if count <= 0:
+            return
+        copied = _copy_with(copy_func, src, dst, offset, count)
+        offset, count = offset + copied, count - copied
+    while count > 0:
+        chunk = os.pread(src, min(COPY_BUFSIZE, count), offset)
+        if not chunk:
+            raise EOFError("File got truncated while copying.")
+        write_all(dst, chunk)
+        offset += len(chunk)
+        count -= len(chunk)
+
+
+def write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+_CopyFunc = Callable[[int, int, int, int], int]
+
+
+def _copy_file_range(src: int, dst: int, count: int, offset: int) -> int:
+    return os.copy_file_range(src, dst, count, offset)
+
+
+def _sendfile(src: int, dst: int, count: int, offset: int) -> int:
+    return os.sendfile(dst, src, offset, count)
+
+
+_ZERO_COPY_FUNCS: list[_CopyFunc] = []
+if hasattr(os, "copy_file_range"):
+    _ZERO_COPY_FUNCS.append(_copy_file_range)
+if hasattr(os, "sendfile"):
+    _ZERO_COPY_FUNCS.append(_sendfile)
+
+
+def _copy_with(
+    copy_func: _CopyFunc, src: int, dst: int, offset: int, count: int
+) -> int:
+    """Copy as much as possible with `copy_func` and return the bytes copied."""
+    copied = 0
+    while copied < count:
+        try:
+            n = copy_func(src, dst, count - copied, offset + copied)
+        except OSError as e:
+            if e.errno in _UNSUPPORTED_ERRNOS:
+                break
+            raise
+        if n == 0:
+            break
+        copied += n
+    return copied
@@ -0,0 +1,419 @@
+"""Evaluate a subset of the TiddlyWiki filter syntax against a wiki.
+
+A filter like `[tag[Journal]!has[draft.of]sort[modified]limit[20]]` is parsed
+once into runs of steps, which are cached for repeated use. Each step gets the
+titles selected by the previous step. The first step of a run gets all
+tiddlers, which is left implicit so that the step can be answered from the
+field or tag index without looking at every tiddler.
+
+Only literal operands in square brackets are supported, no text references,
+variables or regular expressions. Like in TiddlyWiki, unknown operators are
+taken as the name of a field to compare against.
+"""
+
+import re
+from collections.abc import Callable, Collection, Iterable
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, NamedTuple, Optional
+
+from tiddlyparse.index import title_sort_key
+
+if TYPE_CHECKING:
+    from tiddlyparse.parser import TiddlyParser
+
+
+class FilterSyntaxError(ValueError):
+    pass
+
+
+# The titles selected by the previous step, None for all tiddlers
+Titles = Optional[list[str]]
+
+
+class Step(NamedTuple):
+    """An operator of a filter run with its operand."""
+
+    operator: str
+    suffix: str
+    operand: str
+    negated: bool
+    func: "OperatorFunc"
+
+
+OperatorFunc = Callable[["TiddlyParser", Step, Titles], list[str]]
+
+
+class Run(NamedTuple):
+    """A run of steps, combined with the previous runs according to `prefix`.
+
+    The prefix is one of "or", "and", "except" and "else".
+    """
+
+    prefix: str
+    steps: tuple[Step, ...]
+
+
+class Filter:
+    """A compiled filter expression."""
+
+    def __init__(self, expression: str, runs: Iterable[Run]):
+        self.expression = expression
+        self.runs = tuple(runs)
+
+    def __repr__(self) -> str:
+        return f"Filter({self.expression!r})"
+
+    def __call__(self, wiki: "TiddlyParser") -> list[str]:
+        """Return the titles selected by the filter in the wiki."""
+        wiki._reconcile()
+        results: dict[str, None] = {}
+        for run in self.runs:
+            if run.prefix == "and":
+                results = dict.fromkeys(self._evaluate(wiki, run, list(results)))
+            elif run.prefix == "except":
+                for title in self._evaluate(wiki, run, None):
+                    results.pop(title, None)
+            elif run.prefix == "else":
+                if not results:
+                    results = dict.fromkeys(self._evaluate(wiki, run, None))
+            else:
+                # Titles that are selected again move to the end
+                for title in self._evaluate(wiki, run, None):
+                    results.pop(title, None)
+                    results[title] = None
+        return list(results)
+
+    @staticmethod
+    def _evaluate(wiki: "TiddlyParser", run: Run, titles: Titles) -> list[str]:
+        for step in run.steps:
+            titles = step.func(wiki, step, titles)
+        return _all(wiki, titles)
+
+
+@lru_cache(maxsize=512)
+def compile_filter(expression: str) -> Filter:
+    """Parse the filter expression.
+
+    Raises a `FilterSyntaxError` for invalid or unsupported filters.
+    """
+    runs: list[Run] = []
+    pos = _skip_whitespace(expression, 0)
+    while pos < len(expression):
+        match = _RUN.match(expression, pos)
+        if not match:
+            raise FilterSyntaxError(
+                f"Syntax error at position {pos} of filter {expression!r}."
+            )
+        prefix = _RUN_PREFIXES.get(match.group("prefix") or "")
+        if prefix is None:
+            raise FilterSyntaxError(
+                f"Unsupported filter run prefix {match.group('prefix')!r}."
+            )
+        if match.group("bracket"):
+            steps, pos = _parse_steps(expression, match.end())
+        else:
+            title = next(g for g in match.group("dq", "sq", "bare") if g is not None)
+            steps = [_step("title", "", title, False)]
+            pos = match.end()
+        runs.append(Run(prefix, tuple(steps)))
+        pos = _skip_whitespace(expression, pos)
+    return Filter(expression, runs)
+
+
+_RUN = re.compile(
+    r"(?P<prefix>[+\-~=]|:\w+)?"
+    r"(?:(?P<bracket>\[)|\"(?P<dq>[^\"]*)\"|'(?P<sq>[^']*)'|(?P<bare>[^\s\[\]]+))"
+)
+_RUN_PREFIXES = {
+    "": "or",
+    ":or": "or",
+    "+": "and",
+    ":and": "and",
+    "-": "except",
+    ":except": "except",
+    "~": "else",
+    ":else": "else",
+}
+_OPERATOR_NAME = re.compile(r"[^\[\]{}<>/]*")
+_OPERAND_ENDS = {"[": "]", "{": "}", "<": ">", "/": "/"}
+_WHITESPACE = re.compile(r"\s*")
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    match = _WHITESPACE.match(text, pos)
+    assert match
+    return match.end()
+
+
+def _parse_steps(expression: str, pos: int) -> tuple[list[Step], int]:
+    """Parse the steps of a run up to its closing bracket."""
+    steps: list[Step] = []
+    while pos < len(expression):
+        if expression[pos] == "]":
+            if not steps:
+                raise FilterSyntaxError(f"Empty filter run in {expression!r}.")
+            return steps, pos + 1
+        negated = expression[pos] == "!"
+        if negated:
+            pos += 1
+        name_match = _OPERATOR_NAME.match(expression, pos)
+        assert name_match
+        name, _, suffix = name_match.group().partition(":")
+        pos = name_match.end()
+
+        start = pos + 1
+        bracket = expression[pos:start]
+        end = expression.find(_OPERAND_ENDS.get(bracket, "]"), start)
+        if bracket not in _OPERAND_ENDS or end == -1:
+            raise FilterSyntaxError(
+                f"Missing operand at position {pos} of filter {expression!r}."
+            )
+        if bracket != "[":
+            raise FilterSyntaxError(
+                f"Only literal operands are supported, got {bracket!r} in "
+                f"filter {expression!r}."
+            )
+        operand = expression[start:end]
+        steps.append(_step(name or "title", suffix, operand, negated))
+        pos = end + 1
+    raise FilterSyntaxError(f"Missing closing bracket in filter {expression!r}.")
+
+
+def _step(operator: str, suffix: str, operand: str, negated: bool) -> Step:
+    func = _OPERATORS.get(operator)
+    if func is None:
+        if operator in _UNSUPPORTED_OPERATORS:
+            raise FilterSyntaxError(f"The filter operator {operator!r} is unsupported.")
+        # Like TiddlyWiki, take unknown operators as field names
+        operator, suffix, func = "field", operator, _field
+    allowed = _OPERANDS.get(operator)
+    if allowed is not None and operand not in allowed:
+        raise FilterSyntaxError(
+            f"Unsupported operand {operand!r} for the filter operator {operator!r}."
+        )
+    if operator in _NUMERIC_OPERATORS and not re.fullmatch(r"-?\d*", operand):
+        raise FilterSyntaxError(
+            f"Expected a number for the filter operator {operator!r}, got {operand!r}."
+        )
+    return Step(operator, suffix, operand, negated, func)
+
+
+def _all(wiki: "TiddlyParser", titles: Titles) -> list[str]:
+    return list(wiki._titles) if titles is None else titles
+
+
+def _select(
+    wiki: "TiddlyParser",
+    titles: Titles,
+    matching: Collection[str],
+    negated: bool,
+) -> list[str]:
+    """Keep the titles that are in `matching`, or not in it if `negated`."""
+    if titles is None:
+        if not negated:
+            # Cheaper than looking at all titles if only a few match
+            return sorted(matching, key=title_sort_key)
+        return [title for title in wiki._titles if title not in matching]
+    return [title for title in titles if (title in matching) != negated]
+
+
+def _filter(titles: Iterable[str], predicate: Callable[[str], bool]) -> list[str]:
+    return [title for title in titles if predicate(title)]
+
+
+def _value(wiki: "TiddlyParser", title: str, field: str) -> str:
+    if field == "title":
+        return title
+    tiddler = wiki._tiddlers.get(title)
+    return "" if tiddler is None else getattr(tiddler, field)
+
+
+def _title(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    if step.negated:
+        return [title for title in _all(wiki, titles) if title != step.operand]
+    return [step.operand]
+
+
+def _field(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    field = step.suffix or "title"
+    if field == "title":
+        return _title(wiki, step, titles)
+    matching = wiki._field_index.lookup(field, step.operand)
+    return _select(wiki, titles, matching, step.negated)
+
+
+def _has(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    if step.suffix == "field":
+        # The field exists, even if it's empty
+        def has_field(title: str) -> bool:
+            tiddler = wiki._tiddlers.get(title)
+            exists = tiddler is not None and step.operand in tiddler.to_dict()
+            return exists != step.negated
+
+        return _filter(_all(wiki, titles), has_field)
+    matching = wiki._field_index.present(step.operand)
+    return _select(wiki, titles, matching, step.negated)
+
+
+def _tag(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    tagged = wiki._tag_index.tagged(step.operand)
+    if step.negated:
+        return _select(wiki, titles, set(tagged), True)
+    if titles is None:
+        return list(tagged)
+    # Keep the order of the tag
+    selected = set(titles)
+    return [title for title in tagged if title in selected]
+
+
+def _tags(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    tags: dict[str, None] = {}
+    for title in _all(wiki, titles):
+        tags.update(dict.fromkeys(wiki._tag_index.tags_of(title)))
+    return list(tags)
+
+
+def _tagging(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    tagging: dict[str, None] = {}
+    for title in _all(wiki, titles):
+        tagging.update(dict.fromkeys(wiki._tag_index.tagged(title)))
+    return list(tagging)
+
+
+def _prefix(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    prefix = step.operand
+    if titles is None and not step.negated:
+        return list(wiki._titles.with_prefix(prefix))
+    return _filter(
+        _all(wiki, titles), lambda title: title.startswith(prefix) != step.negated
+    )
+
+
+def _suffix(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    suffix = step.operand
+    return _filter(
+        _all(wiki, titles), lambda title: title.endswith(suffix) != step.negated
+    )
+
+
+def _is(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    if step.operand == "draft":
+        return _select(
+            wiki, titles, wiki._field_index.present("draft.of"), step.negated
+        )
+    elif step.operand == "tiddler":
+        return _select(wiki, titles, wiki._tiddlers.keys(), step.negated)
+    elif step.operand == "missing":
+        return _select(wiki, titles, wiki._tiddlers.keys(), not step.negated)
+    else:
+        step = step._replace(operand="$:/")
+        return _prefix(wiki, step, titles)
+
+
+def _all_operator(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    return list(wiki._titles)
+
+
+def _sort_by(key: Callable[[str], Any]) -> OperatorFunc:
+    def sort(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+        field = step.operand or "title"
+        return sorted(
+            _all(wiki, titles),
+            key=lambda title: key(_value(wiki, title, field)),
+            reverse=step.negated,
+        )
+
+    return sort
+
+
+def _number_key(value: str) -> tuple[int, float, str]:
+    try:
+        return (0, float(value), "")
+    except ValueError:
+        # Sort values that aren't numbers last
+        return (1, 0.0, value)
+
+
+def _count(step: Step, default: int) -> int:
+    return int(step.operand) if step.operand else default
+
+
+def _limit(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    count = max(_count(step, 0), 0)
+    if step.negated:
+        return _all(wiki, titles)[-count:] if count else []
+    if titles is None:
+        return wiki._titles.head(count)
+    return titles[:count]
+
+
+def _first(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    return _limit(wiki, step._replace(operand=str(_count(step, 1))), titles)
+
+
+def _last(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    step = step._replace(operand=str(_count(step, 1)), negated=True)
+    return _limit(wiki, step, titles)
+
+
+def _rest(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    count = max(_count(step, 1), 0)
+    return _all(wiki, titles)[count:]
+
+
+def _reverse(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    return _all(wiki, titles)[::-1]
+
+
+def _count_operator(wiki: "TiddlyParser", step: Step, titles: Titles) -> list[str]:
+    return [str(len(_all(wiki, titles)))]
+
+
+_OPERATORS: dict[str, OperatorFunc] = {
+    "title": _title,
+    "field": _field,
+    "has": _has,
+    "tag": _tag,
+    "tags": _tags,
+    "tagging": _tagging,
+    "prefix": _prefix,
+    "suffix": _suffix,
+    "is": _is,
+    "all": _all_operator,
+    "sort": _sort_by(str.lower),
+    "sortcs": _sort_by(str),
+    "nsort": _sort_by(_number_key),
+    "limit": _limit,
+    "first": _first,
+    "last": _last,
+    "rest": _rest,
+    "reverse": _reverse,
+    "count": _count_operator,
+}
+# The operands supported by some of the operators
+_OPERANDS = {
+    "all": {"tiddlers"},
+    "is": {"system", "tiddler", "missing", "draft"},
+}
+_NUMERIC_OPERATORS = {"limit", "first", "last", "rest"}
+# Operators of TiddlyWiki that would otherwise be taken as field names
+_UNSUPPORTED_OPERATORS = {
+    "backlinks",
+    "each",
+    "eachday",
+    "enlist",
+    "filter",
+    "get",
+    "getindex",
+    "links",
+    "list",
+    "listed",
+    "lookup",
+    "nsortcs",
+    "range",
+    "regexp",
+    "search",
+    "shadowsource",
+    "subfilter",
+    "untagged",
+}
@@ -0,0 +1,163 @@
+"""Full-text index over the text of tiddlers.
+
+The text is split into lowercase word tokens. For each token the index keeps
+how often it occurs in each tiddler, which is used to rank the results. The
+index can be written to a file next to the wiki and loaded again, as long as
+the wiki file hasn't changed since.
+"""
+
+import bisect
+import json
+import re
+import threading
+from collections import Counter
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from tiddlyparse.fileio import atomic_write
+from tiddlyparse.index import TiddlerIndex, TiddlerSource
+
+# Format of the persisted index, changed whenever tokens are split differently
+INDEX_VERSION = 1
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split the text into the tokens used by the index."""
+    return _TOKEN.findall(text.casefold())
+
+
+class FullTextIndex(TiddlerIndex):
+    """Index of the tiddler titles by the tokens of their text.
+
+    Nothing is indexed until `build` or `load` is called. Afterwards the
+    entries are kept up to date until the index is cleared. Concurrent readers
+    should hold `build_lock` while building or loading it, so that it's done
+    only once and nobody searches a partial index.
+    """
+
+    def __init__(self, source: TiddlerSource):
+        self._source = source
+        # Number of occurrences of each token by title, and the other way round
+        self._counts: dict[str, dict[str, int]] = {}
+        self._postings: dict[str, dict[str, int]] = {}
+        self._built = False
+        # All tokens in order for prefix searches, created on demand
+        self._sorted_tokens: Optional[list[str]] = None
+        self.build_lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def build(self) -> None:
+        """Index the text of all tiddlers."""
+        self.clear()
+        for title, tiddler in self._source():
+            self._add(title, Counter(tokenize(tiddler.text)))
+        self._built = True
+
+    def update(self, title: str, tiddler: Any) -> None:
+        if self._built:
+            self.discard(title)
+            self._add(title, Counter(tokenize(tiddler.text)))
+
+    def discard(self, title: str) -> None:
+        counts = self._counts.pop(title, None)
+        if counts is None:
+            return
+        for token in counts:
+            titles = self._postings[token]
+            del titles[title]
+            if not titles:
+                del self._postings[token]
+                self._sorted_tokens = None
+
+    def clear(self) -> None:
+        self._counts = {}
+        self._postings = {}
+        self._built = False
+        self._sorted_tokens = None
+
+    def search(self, query: str, *, prefix: bool = False) -> dict[str, int]:
+        """Return the titles of the tiddlers containing all tokens of the query.
+
+        Each title is mapped to its score, the number of occurrences of the
+        query tokens in the text. With `prefix`, query tokens also match the
+        longer tokens they are a prefix of.
+        """
+        assert self._built
+        scores: Optional[dict[str, int]] = None
+        for token in set(tokenize(query)):
+            matches: dict[str, int] = {}
+            for match in self._expand(token) if prefix else [token]:
+                for title, count in self._postings.get(match, {}).items():
+                    matches[title] = matches.get(title, 0) + count
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    title: score + matches[title]
+                    for title, score in scores.items()
+                    if title in matches
+                }
+            if not scores:
+                break
+        return scores or {}
+
+    def dump(self, path: Union[str, Path], fingerprint: str) -> None:
+        """Write the index to `path`, recording the fingerprint of the wiki."""
+        assert self._built
+        data = {
+            "version": INDEX_VERSION,
+            "fingerprint": fingerprint,
+            "tiddlers": self._counts,
+        }
+        with atomic_write(path) as tmpf:
+            with tmpf.open("w", encoding="utf-8") as fp:
+                json.dump(data, fp, ensure_ascii=False, separators=(",", ":"))
+
+    def load(self, path: Union[str, Path], fingerprint: str) -> bool:
+        """Load the index written by `dump` if it has the same fingerprint.
+
+        Returns whether the index was loaded. Indexes of other versions or of
+        other states of the wiki are ignored.
+        """
+        try:
+            with open(path, encoding="utf-8") as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            return False
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != INDEX_VERSION
+            or data.get("fingerprint") != fingerprint
+        ):
+            return False
+
+        self.clear()
+        for title, counts in data["tiddlers"].items():
+            self._add(title, counts)
+        self._built = True
+        return True
+
+    def _add(self, title: str, counts: dict[str, int]) -> None:
+        self._counts[title] = counts
+        for token, count in counts.items():
+            titles = self._postings.get(token)
+            if titles is None:
+                titles = self._postings[token] = {}
+                self._sorted_tokens = None
+            titles[title] = count
+
+    def _expand(self, prefix: str) -> Iterator[str]:
+        """Yield all indexed tokens starting with `prefix`."""
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._postings)
+        tokens = self._sorted_tokens
+        idx = bisect.bisect_left(tokens, prefix)
+        while idx < len(tokens) and tokens[idx].startswith(prefix):
+            yield tokens[idx]
+            idx += 1
@@ -0,0 +1,160 @@
+"""Read tiddlers from the file formats of TiddlyWiki on Node.js.
+
+This is the counterpart of `tiddlyparse.export`. Tiddlers are read from `.tid`
+files, `.json` files with one or more tiddlers, binary files with a `.meta`
+file, directories of those files, and JSON Lines. They are returned as
+mappings of their fields, to be merged into a wiki with
+`TiddlyParser.import_tiddlers`.
+"""
+
+import base64
+import itertools
+import json
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO, Any, Literal, NamedTuple, Optional, Union
+
+from tiddlyparse.export import _BINARY_TYPES, MAX_WORKERS
+from tiddlyparse.tags import stringify_list
+
+# How to import tiddlers whose title is already in the wiki
+ImportPolicy = Literal["overwrite", "newer", "skip"]
+
+# Number of files read by each task of the thread pool
+BATCH_SIZE = 64
+
+_BINARY_EXTENSIONS = {extension: type_ for type_, extension in _BINARY_TYPES.items()}
+
+
+class ImportResult(NamedTuple):
+    """The titles of the imported tiddlers, by what happened to them."""
+
+    added: list[str]
+    replaced: list[str]
+    skipped: list[str]
+
+
+def read_tiddlers(
+    source: Union[str, Path, IO[str]], *, workers: Optional[int] = None
+) -> Iterator[dict[str, str]]:
+    """Yield the fields of the tiddlers in `source`.
+
+    `source` is a directory, a file or a text stream of JSON Lines. The files
+    of a directory and its subdirectories are read in the order of their paths
+    by a pool of `workers` threads. Files other than tiddler files are ignored.
+
+    Raises a `ValueError` for files that aren't valid tiddler files.
+    """
+    if not isinstance(source, (str, Path)):
+        yield from read_jsonl(source)
+        return
+    path = Path(source)
+    if path.is_dir():
+        yield from _read_dir(path, workers)
+    elif path.suffix == ".jsonl":
+        with open(path, encoding="utf-8") as fp:
+            yield from read_jsonl(fp)
+    else:
+        tiddlers = _read_file(path)
+        if tiddlers is None:
+            raise ValueError(f"{path} isn't a tiddler file.")
+        yield from tiddlers
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterator[dict[str, str]]:
+    """Yield the tiddlers of JSON Lines, one tiddler per non-empty line."""
+    for line in lines:
+        if line.strip():
+            yield _normalize(json.loads(line))
+
+
+def parse_tid(content: str) -> dict[str, str]:
+    """Return the fields of the content of a `.tid` file.
+
+    The header lines up to the first empty line are the fields, the rest is
+    the text. Like in TiddlyWiki, values are stripped and lines without a
+    colon ignored.
+    """
+    content = content.replace("\r\n", "\n")
+    header, _, text = content.partition("\n\n")
+    fields = _parse_header(header)
+    fields["text"] = text
+    return fields
+
+
+def _parse_header(header: str) -> dict[str, str]:
+    fields = {}
+    for line in header.split("\n"):
+        key, sep, value = line.partition(":")
+        key = key.strip()
+        if sep and key:
+            fields[key] = value.strip()
+    return fields
+
+
+def _read_dir(path: Path, workers: Optional[int]) -> Iterator[dict[str, str]]:
+    files: list[Path] = []
+    for root, dirs, names in os.walk(path):
+        # Skip hidden directories, like the ones of version control
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        files.extend(
+            Path(root, name)
+            for name in names
+            if not name.startswith(".") and not name.endswith(".meta")
+        )
+    files.sort()
+
+    if workers is None:
+        workers = min(MAX_WORKERS, os.cpu_count() or 1)
+    batches: list[list[Path]] = []
+    for start in range(0, len(files), BATCH_SIZE):
+        end = start + BATCH_SIZE
+        batches.append(files[start:end])
+    with ThreadPoolExecutor(workers) as executor:
+        for tiddlers in executor.map(_read_files, batches):
+            yield from tiddlers
+
+
+def _read_files(files: list[Path]) -> list[dict[str, str]]:
+    return list(itertools.chain.from_iterable(_read_file(path) or () for path in files))
+
+
+def _read_file(path: Path) -> Optional[list[dict[str, str]]]:
+    """Return the tiddlers of the file, or None if it isn't a tiddler file."""
+    meta_path = path.with_name(path.name + ".meta")
+    if meta_path.exists():
+        fields = _parse_header(meta_path.read_text(encoding="utf-8"))
+        fields.setdefault("title", path.name)
+        type_ = fields.get("type") or _BINARY_EXTENSIONS.get(path.suffix.lower())
+        if type_ in _BINARY_TYPES:
+            fields["text"] = base64.b64encode(path.read_bytes()).decode("ascii")
+        else:
+            fields["text"] = path.read_text(encoding="utf-8")
+        return [fields]
+    elif path.suffix == ".tid":
+        return [parse_tid(path.read_text(encoding="utf-8"))]
+    elif path.suffix == ".json":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data, dict):
+            data = [data]
+        if not isinstance(data, list):
+            raise ValueError(f"{path} doesn't contain tiddlers.")
+        return [_normalize(fields) for fields in data]
+    return None
+
+
+def _normalize(fields: Any) -> dict[str, str]:
+    """Return the fields of a tiddler decoded from JSON with string values."""
+    if not isinstance(fields, dict):
+        raise ValueError(f"Expected the fields of a tiddler, got {fields!r}.")
+    normalized = {}
+    for key, value in fields.items():
+        if isinstance(value, list):
+            # Some tools write fields like `tags` as arrays of titles
+            value = stringify_list(str(item) for item in value)
+        elif not isinstance(value, str):
+            value = json.dumps(value)
+        normalized[key] = value
+    return normalized
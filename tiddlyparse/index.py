@@ -0,0 +1,149 @@
+"""Secondary indexes over the tiddlers of a wiki.
+
+The parser notifies its indexes whenever a tiddler is added or removed, so
+that lookups don't need to scan all tiddlers. Indexes only see the values a
+tiddler has when it is added, so modified tiddlers need to be added again.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any, Literal, Union
+
+# Function returning the current title and tiddler of each tiddler in a wiki
+TiddlerSource = Callable[[], Iterable[tuple[str, Any]]]
+
+
+def title_sort_key(title: str) -> tuple[str, str]:
+    """Return the key by which tiddlers are ordered in the store.
+
+    TiddlyWiki sorts the store area case-insensitively by title. The title
+    itself is used as a tie-breaker to get a total order.
+    """
+    return (title.lower(), title)
+
+
+class TiddlerIndex(ABC):
+    """Base class of the indexes kept up to date by the parser."""
+
+    @abstractmethod
+    def update(self, title: str, tiddler: Any) -> None:
+        """Index the tiddler under `title`, replacing any previous entry."""
+        pass
+
+    @abstractmethod
+    def discard(self, title: str) -> None:
+        """Remove the entry of the tiddler with `title`, if there is one."""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop all entries, e.g. because all tiddlers are replaced."""
+        pass
+
+
+class _FieldPostings:
+    """The titles of the tiddlers by the value of one field."""
+
+    __slots__ = ("values", "titles", "present")
+
+    def __init__(self) -> None:
+        # The indexed value of each tiddler, to find its entry again
+        self.values: dict[str, str] = {}
+        self.titles: dict[str, set[str]] = {}
+        # Titles of the tiddlers with a non-empty value
+        self.present: set[str] = set()
+
+    def add(self, title: str, value: str) -> None:
+        self.values[title] = value
+        self.titles.setdefault(value, set()).add(title)
+        if value:
+            self.present.add(title)
+
+    def discard(self, title: str) -> None:
+        if title not in self.values:
+            return
+        value = self.values.pop(title)
+        titles = self.titles[value]
+        titles.discard(title)
+        if not titles:
+            del self.titles[value]
+        self.present.discard(title)
+
+
+class FieldIndex(TiddlerIndex):
+    """Index of the tiddler titles by the values of their fields.
+
+    A field is only indexed when it's first looked up, by reading it from all
+    tiddlers returned by `source`. Afterwards its entries are kept up to date.
+    Concurrent lookups index a field only once.
+    """
+
+    def __init__(self, source: TiddlerSource):
+        self._source = source
+        self._fields: dict[str, _FieldPostings] = {}
+        self._build_lock = threading.Lock()
+
+    def update(self, title: str, tiddler: Any) -> None:
+        for field, postings in self._fields.items():
+            postings.discard(title)
+            postings.add(title, getattr(tiddler, field))
+
+    def discard(self, title: str) -> None:
+        for postings in self._fields.values():
+            postings.discard(title)
+
+    def clear(self) -> None:
+        self._fields = {}
+
+    def lookup(self, field: str, value: str) -> set[str]:
+        """Return the titles of the tiddlers where `field` equals `value`.
+
+        The returned set must not be modified.
+        """
+        return self._postings(field).titles.get(value, set())
+
+    def present(self, field: str) -> set[str]:
+        """Return the titles of the tiddlers with a non-empty `field`.
+
+        The returned set must not be modified.
+        """
+        return self._postings(field).present
+
+    def match(self, query: Mapping[str, Union[str, Literal[True]]]) -> set[str]:
+        """Return the titles of the tiddlers matching all parts of the query.
+
+        A value of `True` matches any non-empty value, a string matches that
+        exact value. The sets are intersected starting with the smallest one.
+        """
+        candidates: list[set[str]] = []
+        for field, value in query.items():
+            if value is True:
+                candidates.append(self.present(field))
+            elif isinstance(value, str):
+                candidates.append(self.lookup(field, value))
+            else:
+                return set()
+        if not candidates:
+            return {title for title, _ in self._source()}
+
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for titles in candidates[1:]:
+            if not result:
+                break
+            result.intersection_update(titles)
+        return result
+
+    def _postings(self, field: str) -> _FieldPostings:
+        postings = self._fields.get(field)
+        if postings is None:
+            with self._build_lock:
+                postings = self._fields.get(field)
+                if postings is None:
+                    postings = _FieldPostings()
+                    for title, tiddler in self._source():
+                        postings.add(title, getattr(tiddler, field))
+                    # Only published once complete
+                    self._fields[field] = postings
+        return postings
@@ -0,0 +1,96 @@
+"""An append-only journal of the changes of a wiki since it was last saved.
+
+Each change is a JSON line, `{"add": {...fields...}}` or `{"remove": title}`,
+appended to a file next to the wiki and synced to disk. Making a change durable
+then costs a write in proportion to the change, instead of rewriting the whole
+wiki file. The journal is replayed on top of the wiki file when it's parsed
+again, and emptied whenever the wiki is saved.
+
+Replaying is idempotent, so a crash between saving the wiki and emptying the
+journal only applies the same changes again. A line that was only partially
+written before a crash is dropped.
+"""
+
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, Union
+
+from tiddlyparse.fileio import fsync_path
+
+# Default size in bytes above which the journal is folded into the wiki file
+COMPACT_SIZE = 4 * 1024 * 1024
+
+
+class Journal:
+    """The journal file of a wiki, opened for appending changes."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        created = not self.path.exists()
+        self._fp = open(self.path, "a+b")
+        if created:
+            fsync_path(self.path.parent)
+        self._drop_partial_line()
+
+    def close(self) -> None:
+        self._fp.close()
+
+    @property
+    def size(self) -> int:
+        """The size in bytes of the journal, including unsynced changes."""
+        return self._fp.tell()
+
+    def records(self) -> Iterator[dict[str, Any]]:
+        """Yield the changes in the journal, in the order they were made."""
+        self._fp.flush()
+        with open(self.path, "rb") as fp:
+            for number, line in enumerate(fp, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not isinstance(record, dict) or not (
+                    isinstance(record.get("add"), dict)
+                    or isinstance(record.get("remove"), str)
+                ):
+                    raise ValueError(f"Invalid record on line {number} of {self.path}")
+                yield record
+
+    def add(self, fields: dict[str, str]) -> None:
+        """Append the fields of an added tiddler, without syncing."""
+        self._write({"add": fields})
+
+    def remove(self, title: str) -> None:
+        """Append the title of a removed tiddler, without syncing."""
+        self._write({"remove": title})
+
+    def sync(self) -> None:
+        """Make the appended changes durable."""
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+
+    def clear(self) -> None:
+        """Empty the journal, once its changes are saved in the wiki file."""
+        self._fp.truncate(0)
+        self._fp.seek(0)
+        self.sync()
+
+    def _write(self, record: dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+        self._fp.write(line.encode("utf-8") + b"\n")
+
+    def _drop_partial_line(self) -> None:
+        """Truncate a last line without a newline, left behind by a crash."""
+        size = self._fp.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        self._fp.seek(max(0, size - 1))
+        if self._fp.read(1) == b"\n":
+            return
+        self._fp.seek(0)
+        content = self._fp.read()
+        self._fp.truncate(content.rfind(b"\n") + 1)
+        self._fp.seek(0, os.SEEK_END)
+        self.sync()
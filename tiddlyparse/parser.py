@@ -1,18 +1,27 @@
-import bisect
+import asyncio
+import functools
+import heapq
 import html
 import json
-import tempfile
+import mmap
+import os
+import re
 import time
 from abc import ABC, abstractmethod
 from collections.abc import Iterator
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
 from enum import Enum
-from json.decoder import JSONDecodeError
 from pathlib import Path
 from typing import (
+    Callable,
+    ContextManager,
+    Iterable,
     Literal,
     Mapping,
     MutableMapping,
     MutableSequence,
+    NamedTuple,
     Optional,
     Sequence,
     Union,
@@ -22,6 +31,37 @@ from bs4 import BeautifulSoup
 from bs4.element import NavigableString, Tag
 from bs4.formatter import Formatter, HTMLFormatter
 
+from tiddlyparse.autosave import MAX_DELAY, QUIET_PERIOD, AutoSave
+from tiddlyparse.cache import CacheEntry, ParseCache
+from tiddlyparse.export import ExportFormat, export_tiddlers
+from tiddlyparse.fields import FieldLayout, FieldValues, get_layout
+from tiddlyparse.fileio import atomic_write, file_digest, splice_file
+from tiddlyparse.filters import compile_filter
+from tiddlyparse.fulltext import FullTextIndex
+from tiddlyparse.importer import ImportPolicy, ImportResult
+from tiddlyparse.index import FieldIndex, TiddlerIndex, title_sort_key
+from tiddlyparse.journal import COMPACT_SIZE, Journal
+from tiddlyparse.stats import WikiStats
+from tiddlyparse.store import (
+    Buffer,
+    Span,
+    StoreArea,
+    StoreRecord,
+    UnusualMarkupError,
+    dump_records,
+    find_div_store,
+    find_json_store,
+    is_single_json_object,
+    load_records,
+    read_div_store,
+    read_json_title,
+    render_div_tiddler,
+    split_json_store,
+    stream_store,
+)
+from tiddlyparse.tags import TagIndex
+from tiddlyparse.titles import SortedTitles
+
 
 class FileFormat(Enum):
     # Format for 5.1.23 and earlier
@@ -46,47 +86,99 @@ class DivHtmlFormatter(HTMLFormatter):
         return html.escape(s).replace("&#x27;", "'")
 
 
+_BLANK = re.compile(rb"\s*")
+# The titles are sorted again at the end of a batch that changed more than one
+# in this many of them, instead of inserting each title
+REBUILD_RATIO = 8
+# Bytes read at once by `iter_tiddlers`
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# Sets internal attributes without going through `Tiddler.__setattr__`, which
+# adds up when loading many tiddlers
+_set_slot = object.__setattr__
+
+
 class Tiddler:
-    _properties: MutableMapping[str, str]
+    """A tiddler with attribute access to its fields.
+
+    The stored fields are kept compactly as a tuple of values in a layout
+    shared with other tiddlers. Fields that are set on the tiddler are kept
+    separately as properties until the tiddler is saved.
+    """
+
+    __slots__ = ("_properties", "_stored")
+
+    _properties: Optional[MutableMapping[str, str]]
+    # None until the stored values have been loaded
+    _stored: Optional[FieldValues]
+
+    def __init__(self) -> None:
+        _set_slot(self, "_properties", None)
+        _set_slot(self, "_stored", None)
 
     def __getattr__(self, key: str) -> str:
-        if key in self._properties:
-            return self._properties[key]
-        elif key in self.stored_values:
-            return self.stored_values[key]
-        else:
-            return ""
+        if key.startswith("_") and key != "_canonical_uri":
+            # Internal attribute that hasn't been set
+            raise AttributeError(key)
+        properties = self._properties
+        if properties and key in properties:
+            return properties[key]
+        value = self.stored_values.get(key)
+        return "" if value is None else value
 
     def __setattr__(self, key: str, value: str) -> None:
         if key.startswith("_") and key != "_canonical_uri":
             object.__setattr__(self, key, value)
         else:
+            if self._properties is None:
+                self._properties = {}
             self._properties[key] = value
 
     @property
-    @abstractmethod
     def stored_values(self) -> Mapping[str, str]:
         """Return the original values present in the document.
 
         Overwritten values are not reflected here. To get the current value,
         use the properties instead.
         """
+        stored = self._stored
+        if stored is None:
+            stored = self._set_stored(self._load_stored_values())
+        return stored
+
+    @abstractmethod
+    def _load_stored_values(self) -> Mapping[str, str]:
+        """Load the values present in the document on first access."""
         pass
 
+    def _set_stored(self, values: Mapping[str, str]) -> FieldValues:
+        if not isinstance(values, FieldValues):
+            values = FieldValues(get_layout(values.keys()), tuple(values.values()))
+        # The layout and the values are replaced with a single assignment, so
+        # that a concurrent reader never pairs a layout with other values
+        _set_slot(self, "_stored", values)
+        return values
+
+    def _mark_stored(self) -> None:
+        """Take the current values as the ones present in the document."""
+        self._set_stored(self.to_dict())
+        self._properties = None
+
     @property
     def original_title(self) -> Optional[str]:
         return self.stored_values.get("title")
 
     def to_dict(self) -> Mapping[str, str]:
         ret = {}
+        properties = self._properties or {}
         # Loop first over the stored values, then over the manually defined
         # ones. This ensures we retain the order of keys where possible.
         for key, value in self.stored_values.items():
-            if key in self._properties:
-                ret[key] = self._properties[key]
+            if key in properties:
+                ret[key] = properties[key]
             else:
                 ret[key] = value
-        for key, value in self._properties.items():
+        for key, value in properties.items():
             if key not in ret:
                 ret[key] = value
         return ret
@@ -98,25 +190,40 @@ class Tiddler:
         # those lines.
         modified = self.modified  # type: ignore
         created: str = self.created  # type: ignore
-        if not modified:
-            self.modified = self._get_current_timestamp()
-        if not created:
-            self.created = self._get_current_timestamp()
+        if not modified or not created:
+            timestamp = self._get_current_timestamp()
+            if not modified:
+                self.modified = timestamp
+            if not created:
+                self.created = timestamp
 
     def _get_current_timestamp(self) -> str:
         return time.strftime("%Y%m%d%H%M%S000", time.gmtime())
 
 
 class DivTiddler(Tiddler):
-    _el: Optional[Tag]
+    __slots__ = ("_el",)
 
-    _stored_values: Optional[Mapping[str, str]]
+    _el: Optional[Tag]
 
-    def __init__(self, el: Optional[Tag] = None, title: Optional[str] = None):
-        self._properties = {}
-        self._stored_values = None
+    def __init__(
+        self,
+        el: Optional[Tag] = None,
+        title: Optional[str] = None,
+        *,
+        fields: Optional[Mapping[str, str]] = None,
+    ):
+        """Create a tiddler from its element, its stored fields or a new title."""
+        super().__init__()
+        _set_slot(self, "_el", None)
 
-        if el:
+        if fields is not None:
+            if not isinstance(fields.get("title"), str):
+                raise UnknownTiddlywikiFormatError(
+                    f"Got tiddler without title: {fields!r}"
+                )
+            self._set_stored(fields)
+        elif el:
             title_ = el["title"]
             if not isinstance(title_, str):
                 raise UnknownTiddlywikiFormatError(
@@ -124,17 +231,13 @@ class DivTiddler(Tiddler):
                 )
             self._el = el
         elif title:
+            # A new tiddler has nothing to load later on
+            self._set_stored(self._load_stored_values())
             self.title = title
-            self._properties["title"] = title
-            self._el = None
         else:
             raise ValueError("Need el or title")
 
-    @property
-    def stored_values(self) -> Mapping[str, str]:
-        if self._stored_values is not None:
-            return self._stored_values
-
+    def _load_stored_values(self) -> Mapping[str, str]:
         values = {"text": ""}
         if self._el:
             for key, value in self._el.attrs.items():
@@ -146,47 +249,135 @@ class DivTiddler(Tiddler):
                     f"Could not find text for tiddler {self.title!r}"
                 )
             values["text"] = text_tag.string or ""
-
-        self._stored_values = values
         return values
 
+    def _mark_stored(self) -> None:
+        super()._mark_stored()
+        self._el = None
+
 
 class JsonTiddler(Tiddler):
-    _tiddler: Optional[Mapping[str, str]]
+    __slots__ = ("_raw", "_raw_title")
+
+    # The JSON of the tiddler as found in the store
+    _raw: Optional[Buffer]
+    # Title of a tiddler whose JSON hasn't been decoded yet
+    _raw_title: Optional[str]
 
     def __init__(
-        self, tiddler: Optional[Mapping[str, str]] = None, title: Optional[str] = None
+        self,
+        tiddler: Optional[Mapping[str, str]] = None,
+        title: Optional[str] = None,
+        *,
+        raw: Optional[Buffer] = None,
     ):
-        self._properties = {}
+        """Create a tiddler from its stored values, raw JSON or a new title.
+
+        If only `raw` is passed, the JSON is decoded on first access. The
+        title then needs to be passed as well.
+        """
+        super().__init__()
+        _set_slot(self, "_raw", raw)
+        _set_slot(self, "_raw_title", None)
 
         if tiddler:
             assert title is None or tiddler["title"] == title
-            self._tiddler = tiddler
+            self._set_stored(tiddler)
+        elif raw is not None and title is not None:
+            _set_slot(self, "_raw_title", title)
         elif title:
+            self._set_stored(self._load_stored_values())
             self.title = title
-            self._tiddler = None
         else:
             raise ValueError("Need el or title")
 
+    def _load_stored_values(self) -> Mapping[str, str]:
+        if self._raw is None:
+            return {}
+        try:
+            values: Mapping[str, str] = json.loads(bytes(self._raw))
+        except ValueError:
+            raise UnknownTiddlywikiFormatError(
+                f"Could not parse the JSON of tiddler {self._raw_title!r}"
+            )
+        return values
+
     @property
-    def stored_values(self) -> Mapping[str, str]:
-        return self._tiddler or {}
+    def original_title(self) -> Optional[str]:
+        if self._stored is None and self._raw_title is not None:
+            return self._raw_title
+        return super().original_title
+
+    def _dump_json(self) -> Buffer:
+        """Return the JSON of the tiddler for the store.
+
+        The original JSON is reused if the tiddler hasn't been modified. Else
+        the tiddler is encoded and the result becomes its stored state.
+        """
+        if self._raw is not None and not self._properties:
+            return self._raw
+
+        tiddler = self.to_dict()
+        json_tiddler = json.dumps(tiddler, separators=(",", ":"), ensure_ascii=False)
+        json_tiddler = json_tiddler.replace("<", "\\u003C")
+        self._mark_stored()
+        self._raw = json_tiddler.encode("utf-8")
+        return self._raw
+
+
+class _LayoutCache(dict[tuple[str, ...], FieldLayout]):
+    """The layouts of field names already seen while loading tiddlers."""
+
+    def __missing__(self, names: tuple[str, ...]) -> FieldLayout:
+        layout = self[names] = get_layout(names)
+        return layout
 
 
 class TiddlyParser(ABC):
     filename: Path
     fileformat: FileFormat
 
-    _tiddlers: MutableSequence[Tiddler]
-    _changes: MutableSequence[str]
-    _deletions: MutableSequence[str]
+    # All tiddlers indexed by title, plus the titles in store order. The
+    # titles are always kept sorted by `title_sort_key`.
+    _tiddlers: MutableMapping[str, Tiddler]
+    _titles: SortedTitles
+    # Dictionaries are used as insertion-ordered sets here
+    _changes: MutableMapping[str, None]
+    _deletions: MutableMapping[str, None]
+    # The store area located in the raw file, if the file was parsed without
+    # building a tree of the whole document
+    _store: Optional[StoreArea]
     _soup: BeautifulSoup
     _root: Tag
+    # Secondary indexes, notified whenever a tiddler is inserted or discarded
+    _field_index: FieldIndex
+    _fulltext: FullTextIndex
+    _tag_index: TagIndex
+    _indexes: MutableSequence[TiddlerIndex]
+    # Titles whose order and index entries are out of date during a batch, or
+    # None outside of a batch
+    _pending: Optional[MutableMapping[str, None]]
+    # Timings and counters of parsing and saving, see `tiddlyparse.stats`
+    stats: WikiStats
+    _autosave: Optional[AutoSave]
+    _journal: Optional[Journal]
+    _compact_size: int
 
     def __init__(self) -> None:
-        self._tiddlers = []
-        self._changes = []
-        self._deletions = []
+        self._tiddlers = {}
+        self._titles = SortedTitles()
+        self._changes = {}
+        self._deletions = {}
+        self._store = None
+        self._field_index = FieldIndex(lambda: self._tiddlers.items())
+        self._fulltext = FullTextIndex(lambda: self._tiddlers.items())
+        self._tag_index = TagIndex(lambda: self._tiddlers.items(), title_sort_key)
+        self._indexes = [self._field_index, self._fulltext, self._tag_index]
+        self._pending = None
+        self.stats = WikiStats()
+        self._autosave = None
+        self._journal = None
+        self._compact_size = COMPACT_SIZE
 
     @classmethod
     @abstractmethod
@@ -194,50 +385,239 @@ class TiddlyParser(ABC):
         pass
 
     def items(self) -> Iterator[Tiddler]:
-        for tiddler in self._tiddlers:
-            yield tiddler
+        self._reconcile()
+        for title in self._titles:
+            yield self._tiddlers[title]
 
     def add(self, tiddler: Tiddler, *, track_modified: bool = True) -> None:
-        if track_modified:
-            tiddler.fixup()
-
-        # Insert the tiddler in the correct place of the list. The list is
-        # sorted, but not yet in an entirely predictable way. Thus we first
-        # do the search for existing tiddlers in a brute-force manner.
-        existing_index = None
-        for idx, original_tiddler in enumerate(self._tiddlers):
-            if original_tiddler.title == tiddler.original_title:
-                existing_index = idx
-                break
-        if existing_index is None:
-            # Bisect insert to put the new tiddler in the right place
-            bisect.insort(self._tiddlers, tiddler, key=lambda t: t.title)
-        else:
-            self._tiddlers[existing_index] = tiddler
-
-        if tiddler.title not in self._changes:
-            self._changes.append(tiddler.title)
+        with self._autosave_lock():
+            if track_modified:
+                tiddler.fixup()
+
+            title = tiddler.title
+            # A renamed tiddler is still indexed under its original title. Drop
+            # that entry, so the tiddler doesn't show up twice.
+            original_title = tiddler.original_title
+            if original_title is not None and original_title != title:
+                self._discard(original_title)
+                if self._journal is not None:
+                    self._journal.remove(original_title)
+            self._insert(title, tiddler)
+
+            self._changes[title] = None
+            if self._journal is not None:
+                self._journal.add(dict(tiddler.to_dict()))
+                self._sync_journal()
+            self._touch()
 
     def remove(self, tiddler: Tiddler) -> None:
-        tiddlers = [t for t in self._tiddlers if t.title != tiddler.original_title]
-        if tiddler.original_title not in self._deletions:
-            self._deletions.append(tiddler.title)
-        self._tiddlers = tiddlers
+        with self._autosave_lock():
+            title = tiddler.original_title or tiddler.title
+            self._discard(title)
+            self._deletions[title] = None
+            if self._journal is not None:
+                self._journal.remove(title)
+                self._sync_journal()
+            self._touch()
+
+    def add_many(
+        self, tiddlers: Iterable[Tiddler], *, track_modified: bool = True
+    ) -> None:
+        """Add all tiddlers, like `add` in a `batch`."""
+        with self.batch():
+            for tiddler in tiddlers:
+                self.add(tiddler, track_modified=track_modified)
+
+    def remove_many(self, tiddlers: Iterable[Tiddler]) -> None:
+        """Remove all tiddlers, like `remove` in a `batch`."""
+        with self.batch():
+            for tiddler in tiddlers:
+                self.remove(tiddler)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Defer the bookkeeping of `add` and `remove` to the end of the block.
+
+        Within the block, only the tiddlers by title are updated right away.
+        The store order and the indexes are brought up to date once for all
+        changed titles when the block exits, or before they are next queried.
+        This makes adding or removing many tiddlers take linear time. Batches
+        can be nested, the outermost one does the work.
+        """
+        if self._pending is not None:
+            yield
+            return
+        # A batch is saved as a whole by autosave
+        with self._autosave_lock():
+            self._pending = {}
+            try:
+                yield
+            finally:
+                self._reconcile()
+                self._pending = None
+                # The changes of a batch are synced to the journal at once
+                self._sync_journal()
+
+    def autosave(
+        self,
+        *,
+        quiet_period: float = QUIET_PERIOD,
+        max_delay: float = MAX_DELAY,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> AutoSave:
+        """Save the wiki in the background after changes, see `AutoSave`.
+
+        The wiki is saved once `add` and `remove` weren't called for
+        `quiet_period` seconds, or at the latest `max_delay` seconds after the
+        first unsaved change. The returned `AutoSave` saves pending changes
+        when it's closed, e.g. at the end of a `with` block, or at exit.
+        """
+        if self._autosave is not None:
+            raise RuntimeError("Autosave is already enabled for this wiki.")
+        self._autosave = AutoSave(
+            self, quiet_period=quiet_period, max_delay=max_delay, on_error=on_error
+        )
+        return self._autosave
 
     @property
     def changes(self) -> Sequence[str]:
-        return self._changes
+        return list(self._changes)
 
     @property
     def deletions(self) -> Sequence[str]:
-        return self._deletions
+        return list(self._deletions)
 
     @abstractmethod
     def save(self) -> None:
         self.dump_to_file()
+        if self._journal is not None:
+            # The changes are in the wiki file now
+            self._journal.clear()
 
-        self._changes = []
-        self._deletions = []
+        self.stats.count("changes_saved", len(self._changes) + len(self._deletions))
+        self._changes = {}
+        self._deletions = {}
+
+    @property
+    def journal_path(self) -> Path:
+        """The file next to the wiki where changes are journaled."""
+        filename = Path(self.filename)
+        return filename.with_name(filename.name + ".journal")
+
+    def open_journal(
+        self, path: Optional[Path] = None, *, compact_size: int = COMPACT_SIZE
+    ) -> None:
+        """Journal all changes to `path` or `journal_path`, see `Journal`.
+
+        The changes already in the journal are replayed first. From then on,
+        `add` and `remove` append each change to the journal and sync it to
+        disk, in a `batch` only once at its end. The journal is emptied when
+        the wiki is saved, and once it grows past `compact_size` bytes, the
+        wiki is saved by `compact`.
+        """
+        if self._journal is not None:
+            raise RuntimeError("The wiki already has an open journal.")
+        journal = Journal(path or self.journal_path)
+        try:
+            with self.batch():
+                for record in journal.records():
+                    fields = record.get("add")
+                    if fields is not None:
+                        tiddler = self.new_tiddler(fields["title"])
+                        for key, value in fields.items():
+                            setattr(tiddler, key, value)
+                        self.add(tiddler, track_modified=False)
+                    else:
+                        existing = self.get(record["remove"])
+                        if existing is not None:
+                            self.remove(existing)
+                    self.stats.count("journal_replayed")
+        except BaseException:
+            journal.close()
+            raise
+        self._journal = journal
+        self._compact_size = compact_size
+
+    def close_journal(self) -> None:
+        """Stop journaling. Unsaved changes stay in the journal."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def compact(self) -> None:
+        """Fold the journal into the wiki file, by saving the wiki."""
+        self.save()
+        self.stats.count("journal_compactions")
+
+    def _sync_journal(self) -> None:
+        if self._journal is None or self._pending is not None:
+            return
+        self._journal.sync()
+        if self._journal.size > self._compact_size:
+            self.compact()
+
+    def export(
+        self, format: ExportFormat, dest: Path, *, workers: Optional[int] = None
+    ) -> None:
+        """Export the tiddlers in store order to `dest`.
+
+        The `format` is `tid`, `jsonl` or `folder`, see `tiddlyparse.export`.
+        Modified tiddlers are exported with their current fields, even if they
+        haven't been added to the wiki again.
+        """
+        tiddlers = (tiddler.to_dict() for tiddler in self.items())
+        export_tiddlers(tiddlers, format, dest, workers=workers)
+
+    def import_tiddlers(
+        self,
+        tiddlers: Iterable[Mapping[str, str]],
+        *,
+        policy: ImportPolicy = "overwrite",
+    ) -> ImportResult:
+        """Merge the tiddlers into the wiki in a single `batch`.
+
+        The tiddlers are mappings of their fields, e.g. from `read_tiddlers`,
+        and keep them as imported, including `created` and `modified`. The
+        `policy` decides about tiddlers whose title is already in the wiki:
+        `overwrite` replaces them, `newer` only if the imported one has a later
+        `modified` timestamp, and `skip` keeps the existing ones. Tiddlers
+        without a title are ignored, like TiddlyWiki does.
+        """
+        if policy not in ("overwrite", "newer", "skip"):
+            raise ValueError(f"Unknown import policy {policy!r}.")
+        result = ImportResult([], [], [])
+        with self.batch():
+            for fields in tiddlers:
+                title = fields.get("title")
+                if not title:
+                    continue
+                existing = self._tiddlers.get(title)
+                if existing is not None:
+                    if policy == "skip" or (
+                        policy == "newer"
+                        and fields.get("modified", "") <= existing.modified
+                    ):
+                        result.skipped.append(title)
+                        continue
+                    result.replaced.append(title)
+                else:
+                    result.added.append(title)
+                tiddler = self.new_tiddler(title)
+                for key, value in fields.items():
+                    setattr(tiddler, key, value)
+                self.add(tiddler, track_modified=False)
+        return result
+
+    async def asave(self) -> None:
+        """Save the wiki without blocking the event loop.
+
+        The tiddlers are encoded and written in the default executor of the
+        loop. The wiki must not be modified until this returns. If the task is
+        cancelled, the save still completes before the cancellation is raised,
+        so the wiki and its file are never left in between.
+        """
+        loop = asyncio.get_running_loop()
+        await _complete(loop.run_in_executor(None, self.save))
 
     def dump_to_file(self) -> None:
         """Dump the file back out.
@@ -246,9 +626,15 @@ class TiddlyParser(ABC):
         formatting and whitespace as possible. So any markup except the root
         tag and its content is copied verbatim.
 
-        To know where we need to stop/restart the copying, we use the
-        `sourceline` and `sourcepos` properties of the root tag.
+        If the store area was located in the raw file, only its content is
+        replaced using the recorded offsets. Otherwise we use the `sourceline`
+        and `sourcepos` properties of the root tag to know where we need to
+        stop/restart the copying.
         """
+        if self._store is not None:
+            self._dump_store_area(self._store)
+            return
+
         root = self._root
         root_next_strings = []
 
@@ -276,9 +662,14 @@ class TiddlyParser(ABC):
                 "Could not find source lines of root tags."
             )
 
-        with tempfile.TemporaryDirectory() as tmpd:
-            tmpf = Path(tmpd) / "new.html"
+        with self.stats.phase("save.render"):
+            # rendered_root = self._root.decode(formatter="minimal")
+            rendered_root = self._root.decode(formatter=self._get_html_formatter())
 
+        durable = self._journal is not None
+        with self.stats.phase("save.write"), atomic_write(
+            self.filename, durable=durable
+        ) as tmpf:
             with self.filename.open() as origf, tmpf.open("w") as outf:
                 for idx, line in enumerate(origf):
                     output = None
@@ -286,10 +677,7 @@ class TiddlyParser(ABC):
                         output = line
                     elif idx + 1 == copy_until_line:
                         output = line[:copy_until_pos]
-                        # output += self._root.decode(formatter="minimal")
-                        output += self._root.decode(
-                            formatter=self._get_html_formatter()
-                        )
+                        output += rendered_root
                     elif idx + 1 == copy_from_line:
                         output = "".join(root_next_strings)
                         output += line[copy_from_pos:]
@@ -297,10 +685,34 @@ class TiddlyParser(ABC):
                         output = line
                     if output is not None:
                         outf.write(output)
+        self.stats.count("bytes_written", self.filename.stat().st_size)
+
+    def _dump_store_area(self, store: StoreArea) -> None:
+        with self.stats.phase("save.render"):
+            content = self._store_content()
+        with self.stats.phase("save.write"):
+            # The journal is emptied next, so the file must be on disk first
+            splice_file(
+                self.filename,
+                store.start,
+                store.end,
+                content,
+                durable=self._journal is not None,
+            )
+        self.stats.count("bytes_written", self.filename.stat().st_size)
+        self._store = StoreArea(store.start, store.start + len(content), content)
+        self._store_written()
+
+    @abstractmethod
+    def _store_content(self) -> bytes:
+        """Return the serialized content of the store area element."""
+        pass
 
-            tmpf.rename(self.filename)
+    def _store_written(self) -> None:
+        """Called once the content of the store area has been written."""
+        pass
 
-    def _get_html_formatter(self) -> Union[str, Formatter]:
+    def _get_html_formatter(self) -> Union[Literal["minimal"], Formatter]:
         return "minimal"
 
     @abstractmethod
@@ -308,10 +720,7 @@ class TiddlyParser(ABC):
         pass
 
     def get(self, title: str) -> Union[Tiddler, None]:
-        for tiddler in self._tiddlers:
-            if tiddler.title == title:
-                return tiddler
-        return None
+        return self._tiddlers.get(title)
 
     def get_or_create(self, title: str) -> Tiddler:
         tiddler = self.get(title)
@@ -326,69 +735,260 @@ class TiddlyParser(ABC):
         else:
             raise TiddlerNotFoundError(f"Could not find tiddler {title}")
 
-    def search(
-        self, **query: Mapping[str, Union[str, Literal[True]]]
+    def search(self, **query: Union[str, Literal[True]]) -> Sequence[Tiddler]:
+        """Return the tiddlers matching all fields of the query, in store order.
+
+        The fields are looked up in an index that is built on the first search
+        for each field. It reflects the tiddlers as they were last added, so
+        modified tiddlers need to be passed to `add` to be found.
+        """
+        if not query:
+            return list(self.items())
+        self._reconcile()
+        titles = self._field_index.match(query)
+        return [self._tiddlers[title] for title in sorted(titles, key=title_sort_key)]
+
+    def titles_with_prefix(self, prefix: str) -> Sequence[str]:
+        """Return the titles starting with `prefix`, in store order.
+
+        Only the titles with the prefix are looked at, e.g. to list the system
+        tiddlers under `$:/config/`.
+        """
+        self._reconcile()
+        return list(self._titles.with_prefix(prefix))
+
+    def titles_between(
+        self, start: Optional[str] = None, stop: Optional[str] = None
+    ) -> Iterator[str]:
+        """Iterate over the titles from `start` up to but excluding `stop`.
+
+        Titles are compared in store order, which is case-insensitive. The
+        bounds don't need to be existing titles, so e.g. the journal entries of
+        a month are between `2026-10-` and `2026-11-`.
+        """
+        self._reconcile()
+        return self._titles.irange(start, stop)
+
+    def filter(self, expression: str) -> Sequence[str]:
+        """Return the titles selected by a TiddlyWiki filter expression.
+
+        See `tiddlyparse.filters` for the supported subset of the syntax.
+        Raises a `FilterSyntaxError` for invalid or unsupported filters.
+        """
+        return compile_filter(expression)(self)
+
+    def tagged(self, tag: str) -> Sequence[Tiddler]:
+        """Return the tiddlers with the tag.
+
+        Like in TiddlyWiki, the tiddlers listed in the `list` field of the tag
+        tiddler come first in that order, followed by the others in store
+        order. The tags are indexed on first use.
+        """
+        self._reconcile()
+        return [self._tiddlers[title] for title in self._tag_index.tagged(tag)]
+
+    def tags_of(self, title: str) -> Sequence[str]:
+        """Return the tags of the tiddler, parsed from its `tags` field."""
+        if title not in self._tiddlers:
+            raise TiddlerNotFoundError(f"Could not find tiddler {title}")
+        self._reconcile()
+        return list(self._tag_index.tags_of(title))
+
+    def fulltext(
+        self, query: str, *, prefix: bool = False, limit: Optional[int] = None
     ) -> Sequence[Tiddler]:
-        ret = []
-        for tiddler in self._tiddlers:
-            if self._tiddler_matches(tiddler, **query):
-                ret.append(tiddler)
-        return ret
+        """Return the tiddlers whose text contains all words of the query.
 
-    def _tiddler_matches(
-        self, tiddler: Tiddler, **query: Mapping[str, Union[str, Literal[True]]]
-    ) -> bool:
-        matches = 0
-        for key, value in query.items():
-            if isinstance(value, bool) and value is True and getattr(tiddler, key):
-                matches += 1
-            elif isinstance(value, str) and getattr(tiddler, key) == value:
-                matches += 1
-        matched = matches == len(query)
-        return matched
+        The tiddlers are ranked by the number of occurrences of the words. With
+        `prefix`, the words also match longer words starting with them.
+
+        The index is built on first use, unless it can be loaded from
+        `fulltext_index_path`. Like for `search`, modified tiddlers need to be
+        passed to `add` to be found.
+        """
+        self._reconcile()
+        self._ensure_fulltext(load=True)
+        scores = self._fulltext.search(query, prefix=prefix)
+
+        def rank(title: str) -> tuple[int, tuple[str, str]]:
+            return (-scores[title], title_sort_key(title))
+
+        if limit is None:
+            titles = sorted(scores, key=rank)
+        else:
+            titles = heapq.nsmallest(limit, scores, key=rank)
+        return [self._tiddlers[title] for title in titles]
+
+    @property
+    def fulltext_index_path(self) -> Path:
+        """The file next to the wiki where the full-text index is saved."""
+        filename = Path(self.filename)
+        return filename.with_name(filename.name + ".fulltext.json")
+
+    def save_fulltext_index(self, path: Optional[Path] = None) -> None:
+        """Write the full-text index to `path` or `fulltext_index_path`.
+
+        The index is only loaded again for the same content of the wiki file,
+        so any changes need to be saved first.
+        """
+        if self._changes or self._deletions:
+            raise ValueError("The wiki needs to be saved before its full-text index.")
+        self._reconcile()
+        self._ensure_fulltext(load=False)
+        self._fulltext.dump(
+            path or self.fulltext_index_path, file_digest(self.filename)
+        )
+
+    def _ensure_fulltext(self, *, load: bool) -> None:
+        """Build the full-text index, or with `load` read it if possible."""
+        if self._fulltext.built:
+            return
+        with self._fulltext.build_lock:
+            if not self._fulltext.built and not (load and self._load_fulltext_index()):
+                self._fulltext.build()
+
+    def _load_fulltext_index(self) -> bool:
+        path = self.fulltext_index_path
+        if self._changes or self._deletions or not path.exists():
+            return False
+        return self._fulltext.load(path, file_digest(self.filename))
 
     @abstractmethod
     def new_tiddler(self, title: str) -> Tiddler:
         pass
 
+    def _autosave_lock(self) -> ContextManager[object]:
+        """Return the lock that autosave holds while saving, if it's enabled."""
+        if self._autosave is None:
+            return nullcontext()
+        return self._autosave.lock
+
+    def _touch(self) -> None:
+        if self._autosave is not None:
+            self._autosave.touch()
+
+    def _set_tiddlers(self, tiddlers: MutableMapping[str, Tiddler]) -> None:
+        """Replace the indexed tiddlers with the ones loaded from the store.
+
+        The tiddlers are keyed by their stored title, which is known from the
+        store without decoding them.
+        """
+        self._tiddlers = tiddlers
+        # TiddlyWiki writes the store sorted already, so this is cheap
+        self._titles = SortedTitles(self._tiddlers)
+        for index in self._indexes:
+            index.clear()
+
+    def _insert(self, title: str, tiddler: Tiddler) -> None:
+        if self._pending is not None:
+            self._tiddlers[title] = tiddler
+            self._pending[title] = None
+            return
+        if title not in self._tiddlers:
+            self._titles.add(title)
+        self._tiddlers[title] = tiddler
+        for index in self._indexes:
+            index.update(title, tiddler)
+
+    def _discard(self, title: str) -> Optional[Tiddler]:
+        tiddler = self._tiddlers.pop(title, None)
+        if tiddler is not None and self._pending is not None:
+            self._pending[title] = None
+        elif tiddler is not None:
+            self._titles.remove(title)
+            for index in self._indexes:
+                index.discard(title)
+        return tiddler
+
+    def _reconcile(self) -> None:
+        """Bring the order and indexes up to date with the changes of a batch."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        if len(pending) * REBUILD_RATIO > len(self._titles):
+            # Sorting all titles at once is faster than inserting that many
+            self._titles = SortedTitles(self._tiddlers)
+        else:
+            for title in pending:
+                present = title in self._tiddlers
+                if present != (title in self._titles):
+                    if present:
+                        self._titles.add(title)
+                    else:
+                        self._titles.remove(title)
+        for title in pending:
+            tiddler = self._tiddlers.get(title)
+            for index in self._indexes:
+                if tiddler is not None:
+                    index.update(title, tiddler)
+                else:
+                    index.discard(title)
+
 
 class JsonTiddlyParser(TiddlyParser):
     fileformat: FileFormat = FileFormat.JSON
 
-    def __init__(self, file: Path, soup: BeautifulSoup):
+    def __init__(
+        self,
+        file: Path,
+        soup: Optional[BeautifulSoup] = None,
+        *,
+        store: Optional[StoreArea] = None,
+        lazy: bool = False,
+        records: Optional[Sequence[StoreRecord]] = None,
+    ):
+        """Load the tiddlers from the soup or the located store area.
+
+        With `lazy`, the JSON of each tiddler is only decoded on first access.
+        The `records` of the store area can be passed if they were already read
+        with `read_records`, e.g. from a cache.
+        """
         super().__init__()
 
         self.fileformat = FileFormat.JSON
         self.filename = file
-        self._soup = soup
-        root = self._get_container(soup)
-        if not isinstance(root, Tag):
-            raise UnknownTiddlywikiFormatError("Could not find root element.")
-        self._root = root
-        self._tiddlers = self._load_tiddlers()
+        if store is not None:
+            self._store = store
+            content = store.content
+        elif soup is not None:
+            self._soup = soup
+            root = self._get_container(soup)
+            if not isinstance(root, Tag):
+                raise UnknownTiddlywikiFormatError("Could not find root element.")
+            self._root = root
+            content = (root.string or "").encode("utf-8")
+        else:
+            raise ValueError("Need soup or store")
+        if records is None:
+            records = self.read_records(content, lazy=lazy)
+        self._set_tiddlers(self._load_tiddlers(content, records, lazy=lazy))
 
     @classmethod
     def is_format(cls, file: Path, soup: BeautifulSoup) -> bool:
         return bool(cls._get_container(soup))
 
     def save(self) -> None:
+        with self.stats.phase("save"):
+            if self._store is None:
+                with self.stats.phase("save.render"):
+                    self._root.string = self._store_content().decode("utf-8")
+
+            super().save()
+
+    def _store_content(self) -> bytes:
         # We manually encode each row, so that we can separate every list item
-        # with a newline.
-        out = ["["]
-        for idx, tiddler in enumerate(self._tiddlers):
+        # with a newline. Only modified tiddlers need to be encoded again.
+        out: list[Buffer] = [b"["]
+        for idx, tiddler in enumerate(self.items()):
             if idx > 0:
-                out.append(",")
-            out.append("\n")
-            json_tiddler = json.dumps(
-                tiddler.to_dict(), separators=(",", ":"), ensure_ascii=False
-            )
-            json_tiddler = json_tiddler.replace("<", "\\u003C")
-            out.append(json_tiddler)
-        out.append("\n]")
-        tiddlers_json = "".join(out)
-        self._root.string = tiddlers_json
-
-        super().save()
+                out.append(b",")
+            out.append(b"\n")
+            if isinstance(tiddler, JsonTiddler):
+                out.append(tiddler._dump_json())
+            else:
+                out.append(JsonTiddler(tiddler.to_dict())._dump_json())
+        out.append(b"\n]")
+        return b"".join(out)
 
     def __len__(self) -> int:
         return len(self._tiddlers)
@@ -400,20 +1000,68 @@ class JsonTiddlyParser(TiddlyParser):
     def _get_container(soup: BeautifulSoup) -> Union[Tag, NavigableString, None]:
         return soup.find("script", class_="tiddlywiki-tiddler-store")
 
-    def _load_tiddlers(self) -> MutableSequence[Tiddler]:
-        tiddlers: list[Tiddler] = []
-        text = self._root.string
-        if not text:
+    @classmethod
+    def read_records(cls, content: Buffer, *, lazy: bool = False) -> list[StoreRecord]:
+        """Read the tiddlers of the content of a JSON store area.
+
+        With `lazy`, only the titles are read where possible.
+        """
+        if _BLANK.fullmatch(content):
             raise UnknownTiddlywikiFormatError("No tiddler content found.")
         try:
-            raw_tiddlers = json.loads(text)
-        except JSONDecodeError:
+            try:
+                return cls._read_spans(content, split_json_store(content), lazy)
+            except ValueError:
+                # Some line didn't contain exactly one tiddler
+                spans = split_json_store(content, by_line=False)
+                return cls._read_spans(content, spans, lazy)
+        except ValueError:
             raise UnknownTiddlywikiFormatError(
-                f"Could not parse the JSON tiddler with the text {text[0:100]!r}"
+                "Could not parse the JSON tiddler with the text"
+                f" {bytes(content[:100])!r}"
             )
-        for tiddler in raw_tiddlers:
-            tid = JsonTiddler(tiddler)
-            tiddlers.append(tid)
+
+    @staticmethod
+    def _read_spans(
+        content: Buffer, spans: Iterable[Span], lazy: bool
+    ) -> list[StoreRecord]:
+        records: list[StoreRecord] = []
+        for start, end in spans:
+            title = read_json_title(content, start, end) if lazy else None
+            if title is not None:
+                # A line with several tiddlers would only fail once decoded
+                if not is_single_json_object(content, start, end):
+                    raise ValueError(f"Not a single tiddler at offset {start}")
+                records.append(StoreRecord(start, end, title, None, None))
+            else:
+                values = json.loads(bytes(content[start:end]))
+                records.append(
+                    StoreRecord(
+                        start,
+                        end,
+                        values.get("title", ""),
+                        tuple(values),
+                        tuple(values.values()),
+                    )
+                )
+        return records
+
+    def _load_tiddlers(
+        self, content: Buffer, records: Iterable[StoreRecord], *, lazy: bool
+    ) -> MutableMapping[str, Tiddler]:
+        # The tiddlers reference their JSON in the content without copying it
+        view = memoryview(content)
+        layouts = _LayoutCache()
+        tiddlers: dict[str, Tiddler] = {}
+        for start, end, title, names, values in records:
+            raw = view[start:end]
+            if names is not None and values is not None:
+                stored = FieldValues(layouts[names], values)
+                tiddlers[title] = JsonTiddler(stored, raw=raw)
+            elif lazy:
+                tiddlers[title] = JsonTiddler(title=title, raw=raw)
+            else:
+                tiddlers[title] = JsonTiddler(json.loads(bytes(raw)), raw=raw)
         return tiddlers
 
 
@@ -423,18 +1071,41 @@ class DivTiddlyParser(TiddlyParser):
     # Keep track of changes for persisting later
     _new_tiddlers: MutableMapping[str, Tiddler]
     _modified_tiddlers: MutableMapping[str, Tiddler]
+    # Title and position of each tiddler element in the located store area
+    _div_spans: MutableSequence[tuple[str, Span]]
+    _next_div_spans: MutableSequence[tuple[str, Span]]
 
-    def __init__(self, file: Path, soup: BeautifulSoup):
+    def __init__(
+        self,
+        file: Path,
+        soup: Optional[BeautifulSoup] = None,
+        *,
+        store: Optional[StoreArea] = None,
+        records: Optional[Sequence[StoreRecord]] = None,
+    ):
+        """Load the tiddlers from the soup or the located store area.
+
+        The `records` of the store area can be passed if they were already read
+        with `read_records`, e.g. from a cache.
+        """
         super().__init__()
 
         self.fileformat = FileFormat.DIV
         self.filename = file
-        self._soup = soup
-        root = self._get_container(soup)
-        if not isinstance(root, Tag):
-            raise UnknownTiddlywikiFormatError("Could not find root element.")
-        self._root = root
-        self._tiddlers = self._load_tiddlers()
+        self._div_spans = []
+        if store is not None:
+            self._store = store
+            if records is None:
+                records = self.read_records(store.content)
+        elif soup is not None:
+            self._soup = soup
+            root = self._get_container(soup)
+            if not isinstance(root, Tag):
+                raise UnknownTiddlywikiFormatError("Could not find root element.")
+            self._root = root
+        else:
+            raise ValueError("Need soup or store")
+        self._set_tiddlers(self._load_tiddlers(records))
         self._new_tiddlers = {}
         self._modified_tiddlers = {}
 
@@ -443,6 +1114,23 @@ class DivTiddlyParser(TiddlyParser):
         return bool(cls._get_container(soup))
 
     def save(self) -> None:
+        with self.stats.phase("save"):
+            if self._store is None:
+                with self.stats.phase("save.render"):
+                    self._update_soup()
+
+            super().save()
+
+            for tiddler in [
+                *self._modified_tiddlers.values(),
+                *self._new_tiddlers.values(),
+            ]:
+                if isinstance(tiddler, DivTiddler):
+                    tiddler._mark_stored()
+            self._new_tiddlers = {}
+            self._modified_tiddlers = {}
+
+    def _update_soup(self) -> None:
         dumped = set()
 
         for container in self._root("div"):
@@ -464,44 +1152,125 @@ class DivTiddlyParser(TiddlyParser):
             assert title not in dumped
             self._root.append(self._dump_tiddler(tiddler))
 
-        super().save()
-
-        self._new_tiddlers = {}
-        self._modified_tiddlers = {}
-
     def __len__(self) -> int:
         return len(self._tiddlers)
 
     def add(self, tiddler: Tiddler, *, track_modified: bool = True) -> None:
-        title = tiddler.original_title or tiddler.title
-        if title in self._new_tiddlers:
-            self._new_tiddlers[title] = tiddler
-        elif title in self._modified_tiddlers:
-            self._modified_tiddlers[title] = tiddler
-        elif title in [t.original_title for t in self._tiddlers]:
-            self._modified_tiddlers[title] = tiddler
-        else:
-            self._new_tiddlers[title] = tiddler
+        with self._autosave_lock():
+            title = tiddler.original_title or tiddler.title
+            if title in self._new_tiddlers:
+                self._new_tiddlers[title] = tiddler
+            elif title in self._modified_tiddlers:
+                self._modified_tiddlers[title] = tiddler
+            elif self._is_stored(title):
+                self._modified_tiddlers[title] = tiddler
+            else:
+                self._new_tiddlers[title] = tiddler
+
+            super().add(tiddler=tiddler, track_modified=track_modified)
+
+    def remove(self, tiddler: Tiddler) -> None:
+        with self._autosave_lock():
+            # Pending changes of the tiddler must not be written anymore
+            title = tiddler.original_title or tiddler.title
+            self._new_tiddlers.pop(title, None)
+            self._modified_tiddlers.pop(title, None)
 
-        super().add(tiddler=tiddler, track_modified=track_modified)
+            super().remove(tiddler)
 
     def new_tiddler(self, title: str) -> Tiddler:
         return DivTiddler(title=title)
 
+    def _is_stored(self, title: str) -> bool:
+        """Return whether the store area contains a tiddler with this title."""
+        existing = self._tiddlers.get(title)
+        return existing is not None and existing.original_title == title
+
     @staticmethod
     def _get_container(soup: BeautifulSoup) -> Union[Tag, NavigableString, None]:
         return soup.find("div", id="storeArea")
 
-    def _load_tiddlers(self) -> MutableSequence[Tiddler]:
-        tiddlers: list[Tiddler] = []
-        for container in self._root("div"):
-            if isinstance(container, Tag):
-                tiddlers.append(DivTiddler(container))
+    @staticmethod
+    def read_records(content: Buffer) -> list[StoreRecord]:
+        """Read the tiddlers of the content of a DIV store area."""
+        return [
+            StoreRecord(
+                record.start,
+                record.end,
+                record.fields.get("title", ""),
+                tuple(record.fields),
+                tuple(record.fields.values()),
+            )
+            for record in read_div_store(content)
+        ]
+
+    def _load_tiddlers(
+        self, records: Optional[Iterable[StoreRecord]]
+    ) -> MutableMapping[str, Tiddler]:
+        tiddlers: dict[str, Tiddler] = {}
+        if records is not None:
+            layouts = _LayoutCache()
+            for start, end, title, names, values in records:
+                assert names is not None and values is not None
+                fields = FieldValues(layouts[names], values)
+                tiddlers[title] = DivTiddler(fields=fields)
+                self._div_spans.append((title, (start, end)))
+        else:
+            for container in self._root("div"):
+                if isinstance(container, Tag):
+                    tiddler = DivTiddler(container)
+                    tiddlers[tiddler.title] = tiddler
         return tiddlers
 
-    def _get_html_formatter(self) -> Union[str, Formatter]:
+    def _get_html_formatter(self) -> Union[Literal["minimal"], Formatter]:
         return DivHtmlFormatter()
 
+    def _store_content(self) -> bytes:
+        """Write the tiddler elements of the store area.
+
+        Unmodified tiddlers are copied verbatim from the original content,
+        new tiddlers are added after the last one.
+        """
+        assert self._store is not None
+        content = memoryview(self._store.content)
+        out: list[Buffer] = []
+        size = 0
+        spans: list[tuple[str, Span]] = []
+
+        def write(chunk: Buffer, title: Optional[str] = None) -> None:
+            nonlocal size
+            if title is not None:
+                spans.append((title, (size, size + len(chunk))))
+            out.append(chunk)
+            size += len(chunk)
+
+        pos = 0
+        for title, (start, end) in self._div_spans:
+            if title in self._deletions:
+                # Drop the whitespace before the element as well
+                pos = end
+                continue
+            write(content[pos:start])
+            pos = end
+            tiddler = self._modified_tiddlers.get(title)
+            if tiddler is not None:
+                write(self._render_tiddler(tiddler), tiddler.title)
+            else:
+                write(content[start:end], title)
+        for tiddler in self._new_tiddlers.values():
+            write(b"\n")
+            write(self._render_tiddler(tiddler), tiddler.title)
+        write(content[pos:])
+
+        self._next_div_spans = spans
+        return b"".join(out)
+
+    def _store_written(self) -> None:
+        self._div_spans = self._next_div_spans
+
+    def _render_tiddler(self, tiddler: Tiddler) -> bytes:
+        return render_div_tiddler(tiddler.to_dict()).encode("utf-8")
+
     def _dump_tiddler(self, tiddler: Tiddler) -> Tag:
         tag = self._soup.new_tag("div")
         data = tiddler.to_dict()
@@ -517,14 +1286,332 @@ class DivTiddlyParser(TiddlyParser):
         return tag
 
 
-def parse(file: Path) -> TiddlyParser:
-    """Parse the Wiki file and return a parser for the detected format."""
+def parse(
+    file: Path,
+    *,
+    fast: bool = True,
+    lazy: bool = False,
+    cache: Union[ParseCache, str, Path, None] = None,
+    mmap: bool = False,
+    stats: Optional[WikiStats] = None,
+    journal: bool = False,
+) -> TiddlyParser:
+    """Parse the Wiki file and return a parser for the detected format.
+
+    By default the store area is located directly in the raw file content,
+    which avoids building a tree of the whole document. Files with unusual
+    markup fall back to parsing them with BeautifulSoup, which can also be
+    forced by passing `fast=False`.
+
+    With `lazy`, tiddlers of the JSON format are only decoded when they are
+    first accessed. This speeds up reading a few tiddlers of a large wiki.
+
+    With `cache`, a `ParseCache` or the path of its database, the results of
+    the fast path are cached. Parsing the same file again while it's unchanged
+    then only needs to read its store area.
+
+    With `mmap`, the file is memory-mapped instead of read into memory. The
+    store area and the JSON of the tiddlers then reference the mapping without
+    copying, so large wikis, e.g. with embedded images, aren't held in memory
+    twice. Tiddlers are still decoded into strings as they are accessed. The
+    file must not be modified in place while the parser is in use, which the
+    atomic writes of `save` ensure. On Windows, a mapped file can't be replaced,
+    so it can't be saved either.
+
+    The time spent in each phase of parsing is recorded in `stats`, see
+    `tiddlyparse.stats`, or in a new `WikiStats` if it isn't given. It becomes
+    the `stats` of the parser, so that saving is recorded in it as well.
+
+    With `journal`, the changes in the journal next to the file are replayed,
+    and later changes are journaled, see `TiddlyParser.open_journal`.
+    """
+    if stats is None:
+        stats = WikiStats()
+    with stats.phase("parse"):
+        parser = _parse(file, fast, lazy, cache, mmap, stats)
+    stats.count("tiddlers_loaded", len(parser))
+    parser.stats = stats
+    if journal:
+        parser.open_journal()
+    return parser
+
+
+def _parse(
+    file: Path,
+    fast: bool,
+    lazy: bool,
+    cache: Union[ParseCache, str, Path, None],
+    mmap: bool,
+    stats: WikiStats,
+) -> TiddlyParser:
+    if fast:
+        if cache is not None and not isinstance(cache, ParseCache):
+            with ParseCache(cache) as parse_cache:
+                return _parse(file, fast, lazy, parse_cache, mmap, stats)
+
+        with open(file, "rb") as fp:
+            stat = os.fstat(fp.fileno())
+            mapped = _map_file(fp.fileno(), stat) if mmap else None
+            if cache is not None:
+                with stats.phase("parse.cache"):
+                    parser = _parse_cached(file, fp.fileno(), stat, cache, lazy, mapped)
+                if parser is not None:
+                    stats.count("cache_hits")
+                    return parser
+                stats.count("cache_misses")
+            with stats.phase("parse.read"):
+                data: Buffer = fp.read() if mapped is None else mapped
+            stats.count("bytes_read", len(data))
+        try:
+            with stats.phase("parse.read_store"):
+                located = _read_store(data, lazy)
+        except UnusualMarkupError:
+            pass
+        else:
+            if cache is not None:
+                entry = CacheEntry(
+                    located.fileformat.name,
+                    located.store.start,
+                    located.store.end,
+                    located.records,
+                )
+                with stats.phase("parse.cache"):
+                    cache.put(file, stat, data, entry)
+            with stats.phase("parse.load_tiddlers"):
+                return _store_parser(file, located, lazy)
+
     with open(file) as fp:
-        soup = BeautifulSoup(fp, "html.parser")
+        stats.count("bytes_read", os.fstat(fp.fileno()).st_size)
+        with stats.phase("parse.soup"):
+            soup = BeautifulSoup(fp, "html.parser")
+
+    with stats.phase("parse.load_tiddlers"):
+        if JsonTiddlyParser.is_format(file, soup):
+            return JsonTiddlyParser(file, soup, lazy=lazy)
+        elif DivTiddlyParser.is_format(file, soup):
+            return DivTiddlyParser(file, soup)
+    raise UnknownTiddlywikiFormatError("Could not find any store area in the wiki.")
+
+
+def iter_tiddlers(
+    file: Path, *, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[dict[str, str]]:
+    """Yield the fields of each tiddler of the wiki file, in store order.
+
+    Unlike `parse`, the file is read in chunks of `chunk_size` bytes as the
+    tiddlers are consumed. The memory used only depends on the largest tiddler,
+    so wikis larger than the available memory can be scanned. Only the markup
+    written by TiddlyWiki is recognised, anything else raises an
+    `UnknownTiddlywikiFormatError`.
+    """
+    with open(file, "rb") as fp:
+        chunks = iter(functools.partial(fp.read, chunk_size), b"")
+        try:
+            yield from stream_store(chunks)
+        except ValueError as e:
+            raise UnknownTiddlywikiFormatError(str(e)) from e
+
+
+async def aparse(
+    file: Path,
+    *,
+    fast: bool = True,
+    lazy: bool = False,
+    cache: Union[ParseCache, str, Path, None] = None,
+    mmap: bool = False,
+    stats: Optional[WikiStats] = None,
+    journal: bool = False,
+) -> TiddlyParser:
+    """Parse the wiki file like `parse`, without blocking the event loop.
+
+    The file is read and decoded in the default executor of the loop. If the
+    task is cancelled, the parse continues in the background and its result is
+    discarded, closing its journal.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(
+        parse,
+        file,
+        fast=fast,
+        lazy=lazy,
+        cache=cache,
+        mmap=mmap,
+        stats=stats,
+        journal=journal,
+    )
+    future = loop.run_in_executor(None, call)
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        future.add_done_callback(_discard_parser)
+        raise
+
+
+def _discard_parser(future: "asyncio.Future[TiddlyParser]") -> None:
+    """Close the journal of a parse whose result isn't needed anymore."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close_journal()
+
+
+async def _complete(future: "asyncio.Future[None]") -> None:
+    """Wait for the future, which isn't cancelled with the waiting task.
+
+    A cancellation of the task is only raised once the future is done.
+    """
+    cancelled = False
+    while not future.done():
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancelled = True
+    future.result()
+    if cancelled:
+        raise asyncio.CancelledError()
+
+
+class ParseResult(NamedTuple):
+    """The outcome of parsing one file with `parse_many`.
+
+    Either `wiki` is the parser of the file, or `error` is the exception that
+    parsing it raised.
+    """
+
+    file: Path
+    wiki: Optional[TiddlyParser]
+    error: Optional[Exception]
+
+
+def parse_many(
+    files: Iterable[Path], *, workers: Optional[int] = None, lazy: bool = False
+) -> Iterator[ParseResult]:
+    """Parse the wiki files in a pool of `workers` processes.
+
+    The results are yielded as soon as each file is parsed, so not in the order
+    of `files`. Errors, e.g. an `UnknownTiddlywikiFormatError` for a file that
+    isn't a wiki, are reported in the result of the file instead of being
+    raised. Only a broken process pool stops the iteration.
+
+    The workers locate the store area and decode the tiddlers, this process
+    then creates the tiddlers from the decoded records. Files with unusual
+    markup fall back to BeautifulSoup like in `parse`, but in this process,
+    as the document tree can't be sent back from a worker. These files are
+    parsed one at a time, while the workers continue with the other files.
+    `workers` defaults to the number of CPUs.
+    """
+    executor = ProcessPoolExecutor(workers)
+    try:
+        futures = {
+            executor.submit(_read_file_store, Path(file), lazy): Path(file)
+            for file in files
+        }
+        for future in as_completed(futures):
+            file = futures[future]
+            try:
+                read = future.result()
+                if read is not None:
+                    fileformat, store, records = read
+                    located = _LocatedStore(fileformat, store, load_records(records))
+                    wiki = _store_parser(file, located, lazy)
+                else:
+                    wiki = parse(file, fast=False, lazy=lazy)
+            except BrokenExecutor:
+                raise
+            except Exception as e:
+                result = ParseResult(file, None, e)
+            else:
+                result = ParseResult(file, wiki, None)
+            yield result
+    finally:
+        # Don't parse the remaining files if the caller stopped early
+        executor.shutdown(cancel_futures=True)
+
 
-    if JsonTiddlyParser.is_format(file, soup):
-        return JsonTiddlyParser(file, soup)
-    elif DivTiddlyParser.is_format(file, soup):
-        return DivTiddlyParser(file, soup)
+def _map_file(fd: int, stat: os.stat_result) -> Optional[memoryview]:
+    """Return a view of the read-only memory mapping of the file.
+
+    Returns None for files that can't be mapped, e.g. empty files.
+    """
+    if stat.st_size == 0:
+        return None
+    try:
+        return memoryview(mmap.mmap(fd, 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError):
+        return None
+
+
+class _LocatedStore(NamedTuple):
+    """The store area located in the raw file content, with its tiddlers."""
+
+    fileformat: FileFormat
+    store: StoreArea
+    records: list[StoreRecord]
+
+
+def _read_store(data: Buffer, lazy: bool) -> _LocatedStore:
+    """Locate the store area in the raw file content and read its tiddlers.
+
+    Raises an `UnusualMarkupError` if the store area couldn't be located.
+    """
+    store = find_json_store(data)
+    if store is not None:
+        records = JsonTiddlyParser.read_records(store.content, lazy=lazy)
+        return _LocatedStore(FileFormat.JSON, store, records)
+    store = find_div_store(data)
+    if store is not None:
+        records = DivTiddlyParser.read_records(store.content)
+        return _LocatedStore(FileFormat.DIV, store, records)
+    raise UnusualMarkupError("Could not find the store area.")
+
+
+def _store_parser(file: Path, located: _LocatedStore, lazy: bool) -> TiddlyParser:
+    """Create the parser for the format of the located store area."""
+    fileformat, store, records = located
+    if fileformat == FileFormat.JSON:
+        return JsonTiddlyParser(file, store=store, lazy=lazy, records=records)
+    return DivTiddlyParser(file, store=store, records=records)
+
+
+def _read_file_store(
+    file: Path, lazy: bool
+) -> Optional[tuple[FileFormat, StoreArea, bytes]]:
+    """Read the store area of the file in a worker process of `parse_many`.
+
+    The records are returned serialized, which is much faster to send back
+    than pickling them. Returns None if the store area couldn't be located.
+    """
+    with open(file, "rb") as fp:
+        data = fp.read()
+    try:
+        fileformat, store, records = _read_store(data, lazy)
+    except UnusualMarkupError:
+        return None
+    return fileformat, store, dump_records(records)
+
+
+def _parse_cached(
+    file: Path,
+    fd: int,
+    stat: os.stat_result,
+    cache: ParseCache,
+    lazy: bool,
+    mapped: Optional[memoryview],
+) -> Optional[TiddlyParser]:
+    """Create the parser from the cache if the file is unchanged.
+
+    The store area is sliced from the `mapped` file if it's given, else it's
+    read from the file.
+    """
+    entry = cache.get(file, stat)
+    if entry is None:
+        return None
+    start, end = entry.store_start, entry.store_end
+    content: Buffer
+    if mapped is not None:
+        content = mapped[start:end]
     else:
-        raise UnknownTiddlywikiFormatError("Could not find any store area in the wiki.")
+        content = os.pread(fd, end - start, start)
+    if len(content) != end - start:
+        return None
+    store = StoreArea(start, end, content)
+    located = _LocatedStore(FileFormat[entry.fileformat], store, entry.records)
+    return _store_parser(file, located, lazy)
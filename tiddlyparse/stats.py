@@ -0,0 +1,79 @@
+"""Timings and counters of parsing and saving a wiki.
+
+Every parser has a `WikiStats` as its `stats` attribute, which `parse` and
+`save` record into. The phases are timed in seconds of wall time and add up
+over repeated calls, e.g. of `save`:
+
+- `parse`: all of `parse`, which includes the following phases.
+- `parse.cache`: looking up the file in the cache and, on a hit, loading the
+  tiddlers from it, or caching the file after it was parsed.
+- `parse.read`: reading the file into memory, or mapping it with `mmap`.
+- `parse.read_store`: locating the store area in the raw file and splitting it
+  into tiddlers, which decodes their JSON unless parsing lazily.
+- `parse.soup`: parsing the whole document with BeautifulSoup, for files with
+  unusual markup or with `fast=False`.
+- `parse.load_tiddlers`: creating the tiddlers of the parser.
+- `save`: all of `save`, which includes the following phases.
+- `save.render`: encoding the tiddlers and the store area, or updating and
+  formatting the tree of the document.
+- `save.write`: writing the file.
+
+The counters are `bytes_read` (the size of the file read or mapped),
+`bytes_written`, `tiddlers_loaded`, `changes_saved` (the changed and deleted
+tiddlers written by `save`), `cache_hits` and `cache_misses`. With a journal,
+also `journal_replayed` (the changes replayed from it) and
+`journal_compactions`.
+
+To send the stats to a metrics system, pass a `sink` that is called with the
+name and the seconds of each phase or the increment of each counter as they
+are recorded. The names are the same as in `to_dict`, e.g. `phases.parse.read`
+or `counters.bytes_read`:
+
+    stats = WikiStats(sink=metrics.observe)
+    wiki = parse(wiki_file, stats=stats)
+"""
+
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Optional, Union
+
+StatsSink = Callable[[str, float], None]
+
+
+class WikiStats:
+    """The phase timings and counters of a wiki.
+
+    The sink is called synchronously from the thread doing the work, so it
+    should be cheap, e.g. only queue the values to be sent later.
+    """
+
+    def __init__(self, sink: Optional[StatsSink] = None):
+        self.sink = sink
+        self.phases: dict[str, float] = {}
+        self.counters: dict[str, int] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the wall time of the block to the phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+            if self.sink is not None:
+                self.sink(f"phases.{name}", seconds)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """Add the value to the counter."""
+        self.counters[name] = self.counters.get(name, 0) + value
+        if self.sink is not None:
+            self.sink(f"counters.{name}", value)
+
+    def reset(self) -> None:
+        self.phases.clear()
+        self.counters.clear()
+
+    def to_dict(self) -> dict[str, dict[str, Union[float, int]]]:
+        return {"phases": dict(self.phases), "counters": dict(self.counters)}
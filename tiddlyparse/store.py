@@ -0,0 +1,540 @@
+"""Locate the tiddler store area in the raw bytes of a wiki file.
+
+Building a BeautifulSoup tree of a whole wiki takes seconds for larger files,
+while the store area can be found with a few regular expression searches. Only
+the markup that TiddlyWiki itself writes is recognised. Anything unusual raises
+an `UnusualMarkupError`, so that the caller can fall back to a full parse.
+
+The functions accept any buffer of the raw content, e.g. a `memoryview` of a
+memory-mapped file. Parts of the content are then sliced without copying.
+"""
+
+import codecs
+import html
+import json
+import marshal
+import re
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from html.parser import HTMLParser
+from typing import NamedTuple, Optional, Union
+
+
+class UnusualMarkupError(ValueError):
+    pass
+
+
+# Raw content of the store, possibly referenced without copying
+Buffer = Union[bytes, memoryview]
+# Start and end offset of a part of the store area
+Span = tuple[int, int]
+
+
+class StoreArea(NamedTuple):
+    """The content of the store area element.
+
+    `start` and `end` are the absolute byte offsets of the content in the file,
+    excluding the tags of the element itself. The content is a `memoryview`
+    if the store area was located in a memory-mapped file.
+    """
+
+    start: int
+    end: int
+    content: Buffer
+
+
+_JSON_STORE_TAG = re.compile(
+    rb"<script\b[^>]*\bclass=[\"']?(?:[^\"'>]*\s)?tiddlywiki-tiddler-store"
+    rb"(?![\w-])[^>]*>"
+)
+_SCRIPT_END_TAG = re.compile(rb"</script\s*>")
+_DIV_STORE_TAG = re.compile(rb"<div\b[^>]*?\bid=([\"']?)storeArea\1(?=[\s>/])[^>]*>")
+_DIV_TAG = re.compile(rb"<(/?)div\b[^>]*>")
+# Markup that would make counting the div tags unreliable
+_UNUSUAL_MARKUP = re.compile(rb"<!--|<!\[CDATA\[|<script\b|<style\b|<textarea\b")
+
+
+def find_json_store(data: Buffer) -> Optional[StoreArea]:
+    """Find the `<script class="tiddlywiki-tiddler-store">` element."""
+    start = _find_single_tag(_JSON_STORE_TAG, data)
+    if start is None:
+        return None
+
+    # The JSON is written with `<` escaped, so the first closing tag is the
+    # one of the store area.
+    end_match = _SCRIPT_END_TAG.search(data, start)
+    if not end_match:
+        raise UnusualMarkupError("Could not find the end of the JSON store area.")
+    end = end_match.start()
+    return StoreArea(start, end, data[start:end])
+
+
+def find_div_store(data: Buffer) -> Optional[StoreArea]:
+    """Find the `<div id="storeArea">` element."""
+    start = _find_single_tag(_DIV_STORE_TAG, data)
+    if start is None:
+        return None
+
+    depth = 1
+    for match in _DIV_TAG.finditer(data, start):
+        depth += -1 if match.group(1) else 1
+        if depth == 0:
+            end = match.start()
+            break
+    else:
+        raise UnusualMarkupError("Could not find the end of the DIV store area.")
+
+    if _UNUSUAL_MARKUP.search(data, start, end):
+        raise UnusualMarkupError("Found unexpected markup in the DIV store area.")
+    return StoreArea(start, end, data[start:end])
+
+
+def _find_single_tag(pattern: "re.Pattern[bytes]", data: Buffer) -> Optional[int]:
+    """Return the end offset of the only opening tag matching `pattern`."""
+    matches = list(pattern.finditer(data))
+    if not matches:
+        return None
+    elif len(matches) > 1:
+        raise UnusualMarkupError("Found more than one candidate store area.")
+    return matches[0].end()
+
+
+def split_json_store(content: Buffer, *, by_line: bool = True) -> list[Span]:
+    """Split the content of a JSON store area into the spans of each tiddler.
+
+    The spans are `(start, end)` byte offsets of each tiddler's JSON within
+    `content`. TiddlyWiki writes one tiddler per line, which can be split
+    much faster than decoding the array incrementally. Other layouts are
+    detected and split through the slower path. As the split by line only
+    looks at the start and end of each line, the content should be split
+    again with `by_line=False` if decoding a span fails, or if a span that
+    isn't decoded fails `is_single_json_object`.
+
+    Raises a `ValueError` for invalid content.
+    """
+    if by_line:
+        spans = _split_by_line(content)
+        if spans is not None:
+            return spans
+    return _decode_json_store(content)
+
+
+def read_json_title(content: Buffer, start: int, end: int) -> Optional[str]:
+    """Return the title of the tiddler JSON at the given span.
+
+    This only succeeds if the title is the first field, as written by
+    TiddlyWiki, and returns None otherwise.
+    """
+    match = _JSON_TITLE_FIELD.match(content, start, end)
+    if not match:
+        return None
+    raw_title = match.group(1)
+    if b"\\" in raw_title:
+        title: str = json.loads(b'"' + raw_title + b'"')
+        return title
+    return raw_title.decode("utf-8")
+
+
+def is_single_json_object(content: Buffer, start: int, end: int) -> bool:
+    """Return whether the span from `{` to `}` holds exactly one JSON object.
+
+    This tells a line with one tiddler from a line with several, without
+    decoding it. Only spans with a `}` followed by `,` and `{` can hold
+    several objects, so only in these the braces outside of strings are
+    counted.
+    """
+    if not _JSON_OBJECT_BOUNDARY.search(content, start, end):
+        return True
+    depth = 0
+    pos = start
+    while True:
+        skipped = _JSON_SKIP.match(content, pos, end)
+        assert skipped
+        pos = skipped.end()
+        if pos >= end:
+            return False
+        depth += 1 if content[pos] == ord("{") else -1
+        pos += 1
+        if depth == 0:
+            return pos == end
+
+
+_JSON_TITLE_FIELD = re.compile(rb'\{\s*"title"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_JSON_OBJECT_BOUNDARY = re.compile(rb"\}\s*,\s*\{")
+# Anything up to the next brace that isn't within a string
+_JSON_SKIP = re.compile(rb'(?:[^"{}]++|"(?:[^"\\]++|\\.)*+")*+', re.DOTALL)
+_NEWLINE = re.compile(rb"\n")
+_BLANK_LINE = re.compile(rb"\s*")
+_OPEN_LINE = re.compile(rb"\s*\[\s*")
+_CLOSE_LINE = re.compile(rb"\s*\]\s*")
+_TIDDLER_LINE = re.compile(rb"\s*(\{.*\})\s*(,?)\s*")
+
+
+def _split_by_line(content: Buffer) -> Optional[list[Span]]:
+    spans: list[Span] = []
+    opened = closed = False
+    # Whether the previous tiddler was followed by a comma
+    separated = False
+    pos = 0
+    while pos <= len(content):
+        # Memory views have no `find`, so search with a pattern instead
+        newline = _NEWLINE.search(content, pos)
+        end = newline.start() if newline else len(content)
+        if _BLANK_LINE.fullmatch(content, pos, end):
+            pass
+        elif not opened and _OPEN_LINE.fullmatch(content, pos, end):
+            opened = True
+        elif opened and not closed and _CLOSE_LINE.fullmatch(content, pos, end):
+            if separated:
+                return None
+            closed = True
+        elif opened and not closed:
+            match = _TIDDLER_LINE.fullmatch(content, pos, end)
+            if not match or (spans and not separated):
+                return None
+            spans.append(match.span(1))
+            separated = bool(match.group(2))
+        else:
+            return None
+        pos = end + 1
+    return spans if closed else None
+
+
+_WHITESPACE = re.compile(r"\s*")
+
+
+def _skip_whitespace(text: str, idx: int) -> int:
+    match = _WHITESPACE.match(text, idx)
+    assert match
+    return match.end()
+
+
+def _decode_json_store(content: Buffer) -> list[Span]:
+    text = str(content, "utf-8")
+    decoder = json.JSONDecoder()
+    spans: list[Span] = []
+    # Character offsets need to be converted to byte offsets for the spans
+    char_pos = byte_pos = 0
+
+    def to_byte_offset(idx: int) -> int:
+        nonlocal char_pos, byte_pos
+        byte_pos += len(text[char_pos:idx].encode("utf-8"))
+        char_pos = idx
+        return byte_pos
+
+    idx = _skip_whitespace(text, 0)
+    if not text.startswith("[", idx):
+        raise ValueError("The JSON store area doesn't contain a list.")
+    idx = _skip_whitespace(text, idx + 1)
+    if text.startswith("]", idx):
+        return spans
+    while True:
+        _, end = decoder.raw_decode(text, idx)
+        spans.append((to_byte_offset(idx), to_byte_offset(end)))
+        idx = _skip_whitespace(text, end)
+        if text.startswith("]", idx):
+            return spans
+        elif not text.startswith(",", idx):
+            raise ValueError(f"Expected ',' or ']' at position {idx}.")
+        idx = _skip_whitespace(text, idx + 1)
+
+
+class StoreRecord(NamedTuple):
+    """A tiddler read from a store area, in a form that can be cached.
+
+    `start` and `end` are the byte offsets of the tiddler within the content of
+    the store area. The fields are given by their names and values, which are
+    None if the tiddler hasn't been decoded yet.
+    """
+
+    start: int
+    end: int
+    title: str
+    names: Optional[tuple[str, ...]]
+    values: Optional[tuple[str, ...]]
+
+
+def dump_records(records: Iterable[StoreRecord]) -> bytes:
+    """Serialize the records, e.g. to cache them or send them to a process.
+
+    The records are marshalled as plain tuples, which is several times faster
+    than pickling them.
+    """
+    return marshal.dumps([tuple(record) for record in records])
+
+
+def load_records(data: bytes) -> list[StoreRecord]:
+    """Deserialize the records written by `dump_records`."""
+    return [StoreRecord(*record) for record in marshal.loads(data)]
+
+
+class DivRecord(NamedTuple):
+    """A tiddler of the DIV store area.
+
+    `start` and `end` are the byte offsets of its `<div>` element within the
+    content of the store area.
+    """
+
+    start: int
+    end: int
+    fields: dict[str, str]
+
+
+class DivStoreParser(HTMLParser):
+    """Event based parser for the tiddler `<div>` elements of a store area.
+
+    The fields of each tiddler are passed to the callback as soon as its
+    element is closed, without building a tree of the document. Any markup
+    other than the `<div>` and `<pre>` elements raises an `UnusualMarkupError`.
+    """
+
+    def __init__(self, callback: Callable[[dict[str, str]], None]):
+        super().__init__(convert_charrefs=True)
+        self._callback = callback
+        self._fields: Optional[dict[str, str]] = None
+        self._text: Optional[list[str]] = None
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        if tag == "div" and self._fields is None:
+            # Put the text first to match the order of the DIV tiddlers
+            self._fields = {"text": ""}
+            for key, value in attrs:
+                self._fields[key] = value or ""
+        elif tag == "pre" and self._fields is not None and self._text is None:
+            self._text = []
+        else:
+            raise UnusualMarkupError(f"Unexpected <{tag}> tag in the store area.")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "pre" and self._fields is not None and self._text is not None:
+            self._fields["text"] = "".join(self._text)
+        elif tag == "div" and self._fields is not None:
+            fields = self._fields
+            self._fields = None
+            self._text = None
+            self._callback(fields)
+        else:
+            raise UnusualMarkupError(f"Unexpected </{tag}> tag in the store area.")
+
+    def handle_data(self, data: str) -> None:
+        if self._text is not None:
+            self._text.append(data)
+
+    def handle_startendtag(
+        self, tag: str, attrs: list[tuple[str, Optional[str]]]
+    ) -> None:
+        raise UnusualMarkupError(f"Unexpected <{tag}/> tag in the store area.")
+
+
+def read_div_store(content: Buffer) -> list[DivRecord]:
+    """Read the tiddlers of the content of a DIV store area."""
+    spans: list[Span] = []
+    start = depth = 0
+    for match in _DIV_TAG.finditer(content):
+        if match.group(1):
+            depth -= 1
+            if depth == 0:
+                spans.append((start, match.end()))
+        else:
+            if depth == 0:
+                start = match.start()
+            depth += 1
+        if depth < 0:
+            raise UnusualMarkupError("Found unbalanced div tags in the store area.")
+
+    fields: list[dict[str, str]] = []
+    parser = DivStoreParser(fields.append)
+    for start, end in spans:
+        parser.feed(str(content[start:end], "utf-8"))
+    parser.close()
+    if len(fields) != len(spans):
+        raise UnusualMarkupError("Found unexpected markup in the store area.")
+
+    return [DivRecord(start, end, f) for (start, end), f in zip(spans, fields)]
+
+
+# Longest tag that is kept while looking for the store area in a stream
+_MAX_TAG_SIZE = 64 * 1024
+# Most characters of a JSON tiddler that are buffered while streaming it
+_MAX_RECORD_SIZE = 256 * 1024 * 1024
+
+
+def stream_store(chunks: Iterable[bytes]) -> Iterator[dict[str, str]]:
+    """Yield the fields of each tiddler of the store area in the raw chunks.
+
+    The chunks are consumed as the tiddlers are yielded, and only the current
+    chunk and tiddler are kept in memory. The first JSON or DIV store area is
+    read, in the same markup as `find_json_store` and `find_div_store` accept.
+
+    Raises an `UnusualMarkupError` if no store area is found, and a
+    `ValueError` for an invalid store area. Invalid JSON is only detected once
+    the tiddler can't be completed, so at most `_MAX_RECORD_SIZE` characters
+    are buffered before giving up.
+    """
+    chunk_iter = iter(chunks)
+    data = b""
+    for chunk in chunk_iter:
+        data += chunk
+        candidates = [
+            match
+            for match in (_JSON_STORE_TAG.search(data), _DIV_STORE_TAG.search(data))
+            if match is not None
+        ]
+        if candidates:
+            match = min(candidates, key=lambda match: match.start())
+            end = match.end()
+            rest = data[end:]
+            if match.re is _JSON_STORE_TAG:
+                yield from _stream_json_store(rest, chunk_iter)
+            else:
+                yield from _stream_div_store(rest, chunk_iter)
+            return
+        data = _incomplete_tag(data)
+    raise UnusualMarkupError("Could not find the store area.")
+
+
+def _incomplete_tag(data: bytes) -> bytes:
+    """Return the unfinished tag at the end of `data`, or nothing.
+
+    The tag may be completed by the next chunk, so it needs to be kept.
+    """
+    start = data.rfind(b"<")
+    if start == -1 or data.find(b">", start) != -1:
+        return b""
+    tag = data[start:]
+    return tag if len(tag) <= _MAX_TAG_SIZE else b""
+
+
+class _StreamText:
+    """Text decoded from a stream of UTF-8 chunks and consumed from the front."""
+
+    def __init__(self, data: bytes, chunks: Iterator[bytes]):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._chunks = chunks
+        self.text = self._decoder.decode(data)
+        self.pos = 0
+
+    def fill(self, size: int = 1) -> bool:
+        """Decode at least `size` more bytes, dropping the consumed text.
+
+        Returns False if the stream has ended.
+        """
+        read: list[str] = []
+        count = 0
+        for chunk in self._chunks:
+            read.append(self._decoder.decode(chunk))
+            count += len(chunk)
+            if count >= size:
+                break
+        else:
+            read.append(self._decoder.decode(b"", final=True))
+        if count == 0:
+            return False
+        pos = self.pos
+        self.text = self.text[pos:] + "".join(read)
+        self.pos = 0
+        return True
+
+    def peek(self) -> Optional[str]:
+        """Skip whitespace and return the next character, or None at the end."""
+        while True:
+            self.pos = _skip_whitespace(self.text, self.pos)
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return None
+
+
+def _stream_json_store(
+    data: bytes, chunks: Iterator[bytes]
+) -> Iterator[dict[str, str]]:
+    stream = _StreamText(data, chunks)
+    decoder = json.JSONDecoder()
+    if stream.peek() != "[":
+        raise ValueError("The JSON store area doesn't contain a list.")
+    stream.pos += 1
+    first = True
+    while True:
+        char = stream.peek()
+        if char == "]":
+            return
+        elif not first:
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' but got {char!r}.")
+            stream.pos += 1
+            stream.peek()
+        first = False
+        while True:
+            try:
+                fields, end = decoder.raw_decode(stream.text, stream.pos)
+            except json.JSONDecodeError:
+                # The tiddler may continue in the next chunks. Read at least as
+                # much as is buffered, so a large tiddler isn't decoded again
+                # for every chunk.
+                buffered = len(stream.text) - stream.pos
+                if buffered > _MAX_RECORD_SIZE:
+                    raise ValueError(
+                        f"Found no complete tiddler in {buffered} characters."
+                    )
+                if not stream.fill(buffered):
+                    raise
+                continue
+            break
+        if not isinstance(fields, dict):
+            raise ValueError("Found a tiddler that isn't an object.")
+        stream.pos = end
+        yield fields
+
+
+def _stream_div_store(data: bytes, chunks: Iterator[bytes]) -> Iterator[dict[str, str]]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    fields: list[dict[str, str]] = []
+    parser = DivStoreParser(fields.append)
+    depth = 1
+    while True:
+        for match in _DIV_TAG.finditer(data):
+            depth += -1 if match.group(1) else 1
+            if depth == 0:
+                _feed_div_store(parser, decoder, data[: match.start()], final=True)
+                parser.close()
+                yield from fields
+                return
+        rest = _incomplete_tag(data)
+        _feed_div_store(parser, decoder, data[: len(data) - len(rest)])
+        yield from fields
+        fields.clear()
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise UnusualMarkupError("Could not find the end of the DIV store area.")
+        data = rest + chunk
+
+
+def _feed_div_store(
+    parser: DivStoreParser,
+    decoder: codecs.IncrementalDecoder,
+    data: bytes,
+    *,
+    final: bool = False,
+) -> None:
+    # Markup like comments could hide tags from counting the div tags
+    if _UNUSUAL_MARKUP.search(data):
+        raise UnusualMarkupError("Found unexpected markup in the DIV store area.")
+    parser.feed(decoder.decode(data, final))
+
+
+def render_div_tiddler(fields: Mapping[str, str]) -> str:
+    """Return the `<div>` element of a tiddler for the DIV store area.
+
+    This produces the same markup as TiddlyWiki, with the attributes sorted
+    and the text in a `<pre>` element.
+    """
+    attrs = "".join(
+        f' {key}="{_escape_html(value)}"'
+        for key, value in sorted(fields.items())
+        if key != "text"
+    )
+    text = _escape_html(fields.get("text", ""))
+    return f"<div{attrs}>\n<pre>{text}</pre>\n</div>"
+
+
+def _escape_html(s: str) -> str:
+    return html.escape(s).replace("&#x27;", "'")
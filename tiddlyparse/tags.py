@@ -0,0 +1,128 @@
+"""Tags of tiddlers and the TiddlyWiki list syntax they are written in.
+
+Fields like `tags` and `list` contain several titles, separated by spaces.
+Titles containing spaces are wrapped in double square brackets:
+
+    foo [[multi word]] bar
+"""
+
+import re
+import threading
+from collections.abc import Callable, Iterable
+from typing import Any, Optional
+
+from tiddlyparse.index import TiddlerIndex, TiddlerSource
+
+# Same as TiddlyWiki's `$tw.utils.parseStringArray`, where a non-breaking space
+# doesn't separate titles
+_LIST_ITEM = re.compile(
+    r"(?:^|[^\S\xa0])(?:\[\[(.*?)\]\])(?=[^\S\xa0]|$)|([\S\xa0]+)", re.MULTILINE
+)
+_SEPARATOR = re.compile(r"[^\S\xa0]")
+
+
+def parse_list(value: str) -> list[str]:
+    """Return the titles of a field in list syntax, without duplicates."""
+    titles: dict[str, None] = {}
+    for match in _LIST_ITEM.finditer(value):
+        title = match.group(1)
+        if title is None:
+            title = match.group(2)
+        titles.setdefault(title, None)
+    return list(titles)
+
+
+def stringify_list(titles: Iterable[str]) -> str:
+    """Return the titles in list syntax, bracketing those that need it."""
+    return " ".join(
+        f"[[{title}]]" if not title or _SEPARATOR.search(title) else title
+        for title in titles
+    )
+
+
+class TagIndex(TiddlerIndex):
+    """Index of the tags of each tiddler and the tiddlers with each tag.
+
+    The index is built from all tiddlers returned by `source` when it's first
+    used, once even by concurrent lookups. The titles tagged with a tag are
+    ordered on first lookup and kept until a tiddler with that tag or the tag
+    tiddler itself changes.
+    """
+
+    def __init__(self, source: TiddlerSource, sort_key: Callable[[str], Any]):
+        self._source = source
+        self._sort_key = sort_key
+        self._built = False
+        self._tags: dict[str, tuple[str, ...]] = {}
+        self._tagged: dict[str, set[str]] = {}
+        # The `list` field of the tiddlers that have one, which orders the
+        # tiddlers tagged with their title
+        self._lists: dict[str, tuple[str, ...]] = {}
+        self._ordered: dict[str, tuple[str, ...]] = {}
+        self._build_lock = threading.Lock()
+
+    def update(self, title: str, tiddler: Any) -> None:
+        if self._built:
+            self.discard(title)
+            self._add(title, tiddler)
+
+    def discard(self, title: str) -> None:
+        if not self._built:
+            return
+        for tag in self._tags.pop(title, ()):
+            titles = self._tagged[tag]
+            titles.discard(title)
+            if not titles:
+                del self._tagged[tag]
+            self._ordered.pop(tag, None)
+        self._lists.pop(title, None)
+        self._ordered.pop(title, None)
+
+    def clear(self) -> None:
+        self._built = False
+        self._tags = {}
+        self._tagged = {}
+        self._lists = {}
+        self._ordered = {}
+
+    def tags_of(self, title: str) -> tuple[str, ...]:
+        """Return the tags of the tiddler in the order they are listed."""
+        self._build()
+        return self._tags.get(title, ())
+
+    def tagged(self, tag: str) -> tuple[str, ...]:
+        """Return the titles of the tiddlers with the tag.
+
+        The titles listed in the `list` field of the tag tiddler come first and
+        in that order. The other titles follow in store order.
+        """
+        self._build()
+        ordered = self._ordered.get(tag)
+        if ordered is None:
+            titles = self._tagged.get(tag, set())
+            listed = [title for title in self._lists.get(tag, ()) if title in titles]
+            rest = titles.difference(listed)
+            ordered = (*listed, *sorted(rest, key=self._sort_key))
+            self._ordered[tag] = ordered
+        return ordered
+
+    def _build(self) -> None:
+        if self._built:
+            return
+        with self._build_lock:
+            if not self._built:
+                for title, tiddler in self._source():
+                    self._add(title, tiddler)
+                self._built = True
+
+    def _add(self, title: str, tiddler: Any) -> None:
+        tags = tuple(parse_list(tiddler.tags))
+        if tags:
+            self._tags[title] = tags
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(title)
+            self._ordered.pop(tag, None)
+        list_field: Optional[str] = tiddler.list
+        if list_field:
+            self._lists[title] = tuple(parse_list(list_field))
+        self._ordered.pop(title, None)
@@ -0,0 +1,133 @@
+"""The titles of a wiki in store order.
+
+A plain sorted list needs to move all following titles on every insertion.
+The titles are kept in chunks of limited size instead, so that inserting or
+removing a title only touches one chunk.
+"""
+
+import bisect
+import itertools
+from collections.abc import Iterable, Iterator
+from typing import Optional
+
+from tiddlyparse.index import title_sort_key
+
+# Number of titles per chunk. Chunks are split once they reach twice the size.
+CHUNK_SIZE = 1000
+
+
+class SortedTitles:
+    """Titles ordered by `title_sort_key`, with prefix and range lookups."""
+
+    _chunks: list[list[str]]
+    # The key of the last title of each chunk
+    _maxes: list[tuple[str, str]]
+
+    def __init__(self, titles: Iterable[str] = ()):
+        ordered = sorted(titles, key=title_sort_key)
+        self._chunks = []
+        for start in range(0, len(ordered), CHUNK_SIZE):
+            end = start + CHUNK_SIZE
+            self._chunks.append(ordered[start:end])
+        self._maxes = [title_sort_key(chunk[-1]) for chunk in self._chunks]
+        self._len = len(ordered)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[str]:
+        return itertools.chain.from_iterable(self._chunks)
+
+    def __reversed__(self) -> Iterator[str]:
+        return (title for chunk in reversed(self._chunks) for title in reversed(chunk))
+
+    def __contains__(self, title: object) -> bool:
+        if not isinstance(title, str):
+            return False
+        chunk_idx, idx = self._locate(title_sort_key(title))
+        return chunk_idx < len(self._chunks) and self._chunks[chunk_idx][idx] == title
+
+    def add(self, title: str) -> None:
+        """Insert the title, which must not be present yet."""
+        key = title_sort_key(title)
+        if not self._chunks:
+            self._chunks.append([title])
+            self._maxes.append(key)
+            self._len = 1
+            return
+
+        chunk_idx = bisect.bisect_left(self._maxes, key)
+        if chunk_idx == len(self._chunks):
+            # Goes after all other titles
+            chunk_idx -= 1
+            self._maxes[chunk_idx] = key
+        chunk = self._chunks[chunk_idx]
+        bisect.insort(chunk, title, key=title_sort_key)
+        self._len += 1
+
+        if len(chunk) >= 2 * CHUNK_SIZE:
+            self._chunks[chunk_idx] = chunk[:CHUNK_SIZE]
+            self._chunks.insert(chunk_idx + 1, chunk[CHUNK_SIZE:])
+            self._maxes.insert(chunk_idx, title_sort_key(chunk[CHUNK_SIZE - 1]))
+
+    def remove(self, title: str) -> None:
+        """Remove the title, raising a `ValueError` if it isn't present."""
+        chunk_idx, idx = self._locate(title_sort_key(title))
+        if chunk_idx == len(self._chunks) or self._chunks[chunk_idx][idx] != title:
+            raise ValueError(f"Title {title!r} not present.")
+        chunk = self._chunks[chunk_idx]
+        del chunk[idx]
+        self._len -= 1
+        if not chunk:
+            del self._chunks[chunk_idx]
+            del self._maxes[chunk_idx]
+        elif idx == len(chunk):
+            self._maxes[chunk_idx] = title_sort_key(chunk[-1])
+
+    def head(self, count: int) -> list[str]:
+        """Return the first `count` titles."""
+        return list(itertools.islice(self, count))
+
+    def irange(
+        self, start: Optional[str] = None, stop: Optional[str] = None
+    ) -> Iterator[str]:
+        """Yield the titles from `start` up to but excluding `stop`.
+
+        The bounds are compared in store order and don't need to be titles
+        themselves. Without a bound, the titles start at the first or end at
+        the last title.
+        """
+        start_key = None if start is None else title_sort_key(start)
+        stop_key = None if stop is None else title_sort_key(stop)
+        for title in self._iter_from(start_key):
+            if stop_key is not None and title_sort_key(title) >= stop_key:
+                return
+            yield title
+
+    def with_prefix(self, prefix: str) -> Iterator[str]:
+        """Yield the titles starting with `prefix`, in store order."""
+        # The titles are ordered case-insensitively, so all titles with the
+        # prefix follow the lowercase prefix. Only the case needs checking.
+        lower = prefix.lower()
+        for title in self._iter_from((lower, "")):
+            if not title.lower().startswith(lower):
+                return
+            if title.startswith(prefix):
+                yield title
+
+    def _locate(self, key: tuple[str, str]) -> tuple[int, int]:
+        """Return the chunk and position where a title with `key` belongs."""
+        chunk_idx = bisect.bisect_left(self._maxes, key)
+        if chunk_idx == len(self._chunks):
+            return chunk_idx, 0
+        idx = bisect.bisect_left(self._chunks[chunk_idx], key, key=title_sort_key)
+        return chunk_idx, idx
+
+    def _iter_from(self, key: Optional[tuple[str, str]]) -> Iterator[str]:
+        if key is None:
+            yield from self
+            return
+        chunk_idx, idx = self._locate(key)
+        for chunk in itertools.islice(self._chunks, chunk_idx, None):
+            yield from itertools.islice(chunk, idx, None)
+            idx = 0